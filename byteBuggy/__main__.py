@@ -19,8 +19,17 @@ class ByteBuggy(object):
         Initializes byteBuggy. Checks for root permissions and ensures dependencies are installed.
         '''
 
+        if any(arg.split('=')[0] == '--scan-json' for arg in sys.argv):
+            # Keep stdout clean for the JSON lines, everything else goes to stderr.
+            from .util.scan_stream import ScanStream
+            ScanStream.claim_stdout()
+
         self.print_banner()
 
+        # Tools still running when byteBuggy exits (or is killed) are stopped
+        from .util.process import ChildManager
+        ChildManager.install()
+
         Configuration.initialize(load_interface=False)
 
         if os.getuid() != 0:
@@ -28,8 +37,10 @@ class ByteBuggy(object):
             print(' re-run with sudo')
             Configuration.exit_gracefully(0)
 
-        from .tools.dependency import Dependency
-        Dependency.run_dependency_check()
+        if not Configuration.show_cracked:
+            # --cracked only reads the results file: no tools to check
+            from .tools.dependency import Dependency
+            Dependency.run_dependency_check()
 
 
     def start(self):
@@ -49,6 +60,10 @@ class ByteBuggy(object):
         elif Configuration.crack_handshake:
             CrackHelper.run()
 
+        elif Configuration.scan_json:
+            Configuration.get_monitor_mode_interface()
+            self.scan_json()
+
         else:
             Configuration.get_monitor_mode_interface()
             self.scan_and_attack()
@@ -88,6 +103,12 @@ class ByteBuggy(object):
         print('Finished attacking %d target(s), exiting' % attacked_targets)
 
 
+    def scan_json(self):
+        '''Scans without attacking, streaming target changes as JSON lines.'''
+        from .util.scan_stream import ScanStream
+        ScanStream(Configuration.scan_json, Configuration.scan_json_rate).run()
+
+
 ##############################################################
 
 
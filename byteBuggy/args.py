@@ -3,53 +3,75 @@
 
 # from .util.color import Color
 
-import argparse, sys, io
-
-from io import StringIO
+import argparse, sys
 
 class Arguments(object):
-    ''' Holds arguments used by the byteBuggy '''
+    '''
+        Holds arguments used by the byteBuggy.
+
+        The command line is parsed once per process (see parse()); help text is
+        formatted once per verbosity (see help_text()). Building the parser is
+        the slow part, so every later Arguments(...) reuses the cached results.
+    '''
 
-    def __init__(self, configuration):
+    parsed = {}  # tuple(argv) -> argparse.Namespace
+    helps = {}   # verbose -> help text
+
+    def __init__(self, configuration, argv=None):
+        '''
+            Args:
+                configuration - Configuration (for defaults shown in the help text).
+                argv          - Arguments to parse (default: sys.argv[1:]).
+        '''
+        self.argv = sys.argv[1:] if argv is None else list(argv)
         # Hack: Check for -v before parsing args; so we know which commands to display.
-        self.verbose = '-v' in sys.argv or '-hv' in sys.argv or '-vh' in sys.argv
+        self.verbose = '-v' in self.argv or '-hv' in self.argv or '-vh' in self.argv
         self.config = configuration
-        self.args = self.get_arguments()
+        self.args = self.parse()
 
     def _verbose(self, msg):
         if self.verbose:
             return msg
         else:
             return argparse.SUPPRESS
-        
+
+    def parse(self):
+        '''Returns argparse.Namespace of the arguments, parsing them only the first time.'''
+        key = tuple(self.argv)
+        if key not in Arguments.parsed:
+            Arguments.parsed[key] = self.get_parser().parse_args(self.argv)
+        return Arguments.parsed[key]
+
     def get_help_text(self):
-        # Redirect output to capture help text
-        old_stdout = sys.stdout
-        sys.stdout = StringIO()
-        try:
-            self.get_arguments()
-        except SystemExit:
-            # argparse calls sys.exit() when printing help; catch it to prevent exit
-            pass
-        help_text = sys.stdout.getvalue()
-        sys.stdout = old_stdout
-        return help_text
+        '''Returns the help text (as printed by -h), formatted only the first time.'''
+        if self.verbose not in Arguments.helps:
+            Arguments.helps[self.verbose] = self.get_parser().format_help()
+        return Arguments.helps[self.verbose]
+
+    @classmethod
+    def help_text(cls, configuration, verbose=False):
+        '''Returns the help text without parsing sys.argv (e.g. for the web UI).'''
+        return cls(configuration, argv=['-v'] if verbose else []).get_help_text()
 
     def get_arguments(self):
         ''' Returns parser.args() containing all program arguments '''
+        return self.args
+
+    def get_parser(self):
+        ''' Returns the ArgumentParser for all program arguments '''
 
-        parser = argparse.ArgumentParser(usage=argparse.SUPPRESS,
+        parser = argparse.ArgumentParser(usage=argparse.SUPPRESS, add_help=False,
                 formatter_class=lambda prog: argparse.HelpFormatter(
                     prog, max_help_position=80, width=130))
 
         self._add_global_args(parser.add_argument_group('SETTINGS'))
         self._add_wep_args(parser.add_argument_group('WEP'))
         self._add_wpa_args(parser.add_argument_group('WPA'))
-        # self._add_wps_args(parser.add_argument_group('WPS'))
+        self._add_wps_args(parser.add_argument_group('WPS'))
         self._add_pmkid_args(parser.add_argument_group('PMKID'))
         # self._add_eviltwin_args(parser.add_argument_group('EVIL TWIN'))
         self._add_command_args(parser.add_argument_group('COMMANDS'))
-        
+
         parser.add_argument('-h', '--help', action='help', default=argparse.SUPPRESS,
                             help='Show this help message and exit')
 
@@ -107,6 +129,14 @@ class Arguments(object):
         glob.add_argument('--pillage', help=argparse.SUPPRESS, action='store',
                 dest='scan_time', nargs='?', const=10, type=int)
 
+        glob.add_argument('--temp-max',
+            action='store',
+            dest='temp_max_size',
+            metavar='[MB]',
+            type=int,
+            help=self._verbose('Prune old temporary captures once they use more than this ' +
+                '(default: %dMB, 0 for no limit)' % self.config.temp_max_size))
+
         glob.add_argument('--kill',
             action='store_true',
             dest='kill_conflicting_processes',
@@ -286,7 +316,7 @@ class Arguments(object):
             dest='wep_attack_caffe',
             help=self._verbose('Use caffe-latte WEP attack (default: on)'))
         wep.add_argument('-caffelatte', help=argparse.SUPPRESS, action='store_true',
-                dest='wep_attack_caffelatte')
+                dest='wep_attack_caffe')
 
         wep.add_argument('--p0841',
             action='store_true',
@@ -321,6 +351,20 @@ class Arguments(object):
         wpa.add_argument('-hs-dir', help=argparse.SUPPRESS, action='store',
                 dest='wpa_handshake_dir', type=str)
 
+        wpa.add_argument('--pmk-dir',
+            action='store',
+            dest='wpa_pmk_dir',
+            metavar='[dir]',
+            type=str,
+            help=self._verbose('Directory of precomputed PMKs used by the cpu cracker ' +
+                '(default: %s)' % self.config.wpa_pmk_dir))
+
+        wpa.add_argument('--pmk-store',
+            action='store_true',
+            dest='wpa_pmk_store',
+            help=self._verbose('Store PMKs computed by the cpu cracker in the PMK directory, ' +
+                'to reuse them for the same ESSID (32 bytes per word; default: off)'))
+
         wpa.add_argument('--new-hs',
             action='store_true',
             dest='ignore_old_handshakes',
@@ -367,83 +411,83 @@ class Arguments(object):
                 dest='wpa_strip_handshake')
 
 
-    # def _add_wps_args(self, wps):
-    #     wps.add_argument('--wps',
-    #         action='store_true',
-    #         dest='wps_filter',
-    #         help='Show only WPS-enabled networks')
-    #     wps.add_argument('-wps', help=argparse.SUPPRESS, action='store_true',
-    #             dest='wps_filter')
+    def _add_wps_args(self, wps):
+        wps.add_argument('--wps',
+            action='store_true',
+            dest='wps_filter',
+            help='Show only WPS-enabled networks')
+        wps.add_argument('-wps', help=argparse.SUPPRESS, action='store_true',
+                dest='wps_filter')
 
-    #     wps.add_argument('--no-wps',
-    #         action='store_true',
-    #         dest='no_wps',
-    #         help=self._verbose('Never use WPS PIN & Pixie-Dust' +
-    #             'attacks on targets (default: off)'))
+        wps.add_argument('--no-wps',
+            action='store_true',
+            dest='no_wps',
+            help=self._verbose('Never use WPS PIN & Pixie-Dust' +
+                'attacks on targets (default: off)'))
 
-    #     wps.add_argument('--wps-only',
-    #         action='store_true',
-    #         dest='wps_only',
-    #         help='Only use WPS PIN & Pixie-Dust ' +
-    #             'attacks (default: off)')
+        wps.add_argument('--wps-only',
+            action='store_true',
+            dest='wps_only',
+            help='Only use WPS PIN & Pixie-Dust ' +
+                'attacks (default: off)')
 
-    #     wps.add_argument('--pixie',    action='store_true', dest='wps_pixie',
-    #         help=self._verbose('Only use WPS Pixie-Dust attack ' +
-    #             '(do not use PIN attack)'))
+        wps.add_argument('--pixie',    action='store_true', dest='wps_pixie',
+            help=self._verbose('Only use WPS Pixie-Dust attack ' +
+                '(do not use PIN attack)'))
 
-    #     wps.add_argument('--no-pixie', action='store_true', dest='wps_no_pixie',
-    #         help=self._verbose('Never use WPS Pixie-Dust attack ' +
-    #             '(use PIN attack)'))
+        wps.add_argument('--no-pixie', action='store_true', dest='wps_no_pixie',
+            help=self._verbose('Never use WPS Pixie-Dust attack ' +
+                '(use PIN attack)'))
 
-    #     wps.add_argument('--bully',
-    #         action='store_true',
-    #         dest='use_bully',
-    #         help='Use bully program for WPS PIN & Pixie-Dust attacks ' +
-    #             '(default: reaver)')
-    #     # Alias
-    #     wps.add_argument('-bully', help=argparse.SUPPRESS, action='store_true',
-    #             dest='use_bully')
-
-    #     # Ignore lock-outs
-    #     wps.add_argument('--ignore-locks', action='store_true', dest='wps_ignore_lock',
-    #         help='Do not stop WPS PIN attack if AP becomes locked ' +
-    #             ' (default: stop)')
-
-    #     # Time limit on entire attack.
-    #     wps.add_argument('--wps-time',
-    #         action='store',
-    #         dest='wps_pixie_timeout',
-    #         metavar='[sec]',
-    #         type=int,
-    #         help=self._verbose('Total time to wait before failing PixieDust attack ' +
-    #             '(default: %d sec)' % self.config.wps_pixie_timeout))
-    #     # Alias
-    #     wps.add_argument('-wpst', help=argparse.SUPPRESS, action='store',
-    #             dest='wps_pixie_timeout', type=int)
-
-    #     # Maximum number of 'failures' (WPSFail)
-    #     wps.add_argument('--wps-fails',
-    #         action='store',
-    #         dest='wps_fail_threshold',
-    #         metavar='[num]',
-    #         type=int,
-    #         help=self._verbose('Maximum number of WPSFail/NoAssoc errors before ' +
-    #             'failing (default: %d)' % self.config.wps_fail_threshold))
-    #     # Alias
-    #     wps.add_argument('-wpsf', help=argparse.SUPPRESS, action='store',
-    #             dest='wps_fail_threshold', type=int)
-
-    #     # Maximum number of 'timeouts'
-    #     wps.add_argument('--wps-timeouts',
-    #         action='store',
-    #         dest='wps_timeout_threshold',
-    #         metavar='[num]',
-    #         type=int,
-    #         help=self._verbose('Maximum number of Timeouts before failing ' +
-    #             '(default: %d)' % self.config.wps_timeout_threshold))
-    #     # Alias
-    #     wps.add_argument('-wpsto', help=argparse.SUPPRESS, action='store',
-    #             dest='wps_timeout_threshold', type=int)
+        wps.add_argument('--bully',
+            action='store_true',
+            dest='use_bully',
+            help='Use bully program for WPS PIN & Pixie-Dust attacks ' +
+                '(default: reaver)')
+        # Alias
+        wps.add_argument('-bully', help=argparse.SUPPRESS, action='store_true',
+                dest='use_bully')
+
+        # Ignore lock-outs
+        wps.add_argument('--ignore-locks', action='store_true', dest='wps_ignore_lock',
+            help='Do not stop WPS PIN attack if AP becomes locked ' +
+                ' (default: stop)')
+
+        # Time limit on entire attack.
+        wps.add_argument('--wps-time',
+            action='store',
+            dest='wps_pixie_timeout',
+            metavar='[sec]',
+            type=int,
+            help=self._verbose('Total time to wait before failing PixieDust attack ' +
+                '(default: %d sec)' % self.config.wps_pixie_timeout))
+        # Alias
+        wps.add_argument('-wpst', help=argparse.SUPPRESS, action='store',
+                dest='wps_pixie_timeout', type=int)
+
+        # Maximum number of 'failures' (WPSFail)
+        wps.add_argument('--wps-fails',
+            action='store',
+            dest='wps_fail_threshold',
+            metavar='[num]',
+            type=int,
+            help=self._verbose('Maximum number of WPSFail/NoAssoc errors before ' +
+                'failing (default: %d)' % self.config.wps_fail_threshold))
+        # Alias
+        wps.add_argument('-wpsf', help=argparse.SUPPRESS, action='store',
+                dest='wps_fail_threshold', type=int)
+
+        # Maximum number of 'timeouts'
+        wps.add_argument('--wps-timeouts',
+            action='store',
+            dest='wps_timeout_threshold',
+            metavar='[num]',
+            type=int,
+            help=self._verbose('Maximum number of Timeouts before failing ' +
+                '(default: %d)' % self.config.wps_timeout_threshold))
+        # Alias
+        wps.add_argument('-wpsto', help=argparse.SUPPRESS, action='store',
+                dest='wps_timeout_threshold', type=int)
 
     def _add_pmkid_args(self, pmkid):
         pmkid.add_argument('--pmkid',
@@ -486,6 +530,23 @@ class Arguments(object):
             dest='crack_handshake',
             help='Show commands to crack a captured handshake')
 
+        commands.add_argument('--scan-json',
+            action='store',
+            metavar='file',
+            nargs='?',
+            const='-',
+            dest='scan_json',
+            help='Scan without attacking; write new/changed/lost targets as ' +
+                'JSON lines to file (default: stdout)')
+
+        commands.add_argument('--scan-json-rate',
+            action='store',
+            metavar='[sec]',
+            type=float,
+            dest='scan_json_rate',
+            help=self._verbose('Seconds between --scan-json updates ' +
+                '(default: %s)' % self.config.scan_json_rate))
+
 if __name__ == '__main__':
     from .config import Configuration
     Configuration.initialize(False)
@@ -6,6 +6,7 @@ from .wpa import AttackWPA
 # from .wps import AttackWPS
 from .pmkid import AttackPMKID
 from ..config import Configuration
+from ..tools.airodump import CaptureSession
 from ..util.color import Color
 
 class AttackAll(object):
@@ -22,19 +23,31 @@ class AttackAll(object):
 
         attacked_targets = 0
         targets_remaining = len(targets)
-        for index, target in enumerate(targets, start=1):
-            attacked_targets += 1
-            targets_remaining -= 1
 
-            bssid = target.bssid
-            essid = target.essid if target.essid_known else 'ESSID unknown'
-
-            print('\n (%d/%d)' % (index, len(targets)) +
-                     ' Starting attacks against %s (%s)' % (bssid, essid))
-
-            should_continue = cls.attack_single(target, targets_remaining)
-            if not should_continue:
-                break
+        # Keep one airodump per channel running across targets (see CaptureSession)
+        CaptureSession.shared = True
+        try:
+            for index, target in enumerate(targets, start=1):
+                attacked_targets += 1
+                targets_remaining -= 1
+
+                if Configuration.temp_full():
+                    # Between targets, nothing writes to the temporary directory once airodump stops
+                    CaptureSession.stop()
+                    Configuration.spill_temp()
+
+                bssid = target.bssid
+                essid = target.essid if target.essid_known else 'ESSID unknown'
+
+                print('\n (%d/%d)' % (index, len(targets)) +
+                         ' Starting attacks against %s (%s)' % (bssid, essid))
+
+                should_continue = cls.attack_single(target, targets_remaining)
+                if not should_continue:
+                    break
+        finally:
+            CaptureSession.shared = False
+            CaptureSession.stop()
 
         return attacked_targets
 
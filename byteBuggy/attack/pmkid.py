@@ -3,9 +3,12 @@
 
 from ..model.attack import Attack
 from ..config import Configuration
-from ..tools.hashcat import HcxDumpTool, HcxPcapTool, Hashcat
+from ..tools.hashcat import HcxDumpTool, Hashcat
+from ..tools.airodump import CaptureSession
+from ..model.pmkid import PmkidTracker
 from ..util.color import Color
 from ..util.timer import Timer
+from ..util.watcher import FileWatcher
 from ..model.pmkid_result import CrackResultPMKID
 
 from threading import Thread
@@ -62,14 +65,9 @@ class AttackPMKID(Attack):
         Returns:
             True if handshake is captured. False otherwise.
         '''
-        from ..util.process import Process
         # Check that we have all hashcat programs
-        dependencies = [
-            Hashcat.dependency_name,
-            HcxDumpTool.dependency_name,
-            HcxPcapTool.dependency_name
-        ]
-        missing_deps = [dep for dep in dependencies if not Process.exists(dep)]
+        dependencies = [Hashcat, HcxDumpTool]
+        missing_deps = [dep.dependency_name for dep in dependencies if not dep.exists()]
         if len(missing_deps) > 0:
             print(' Skipping PMKID attack, missing required tools: %s' % ', '.join(missing_deps))
             return False
@@ -103,30 +101,46 @@ class AttackPMKID(Attack):
 
     def capture_pmkid(self):
         '''
-        Runs hashcat's hcxpcaptool to extract PMKID hash from the .pcapng file.
+        Watches hcxdumptool's .pcapng as it grows and extracts the target's PMKID hash.
         Returns:
             The PMKID hash (str) if found, otherwise None.
         '''
         self.keep_capturing = True
         self.timer = Timer(Configuration.pmkid_timeout)
 
+        # hcxdumptool needs the interface to itself: pause the shared capture (restarted by the next view)
+        CaptureSession.stop()
+
         # Start hcxdumptool
         t = Thread(target=self.dumptool_thread)
         t.start()
 
-        # Repeatedly run pcaptool & check output for hash for self.target.essid
+        # Parse newly-captured packets & check for the PMKID of self.target
         pmkid_hash = None
-        pcaptool = HcxPcapTool(self.target)
-        while self.timer.remaining() > 0 and self.keep_capturing:
-            pmkid_hash = pcaptool.get_pmkid_hash(self.pcapng_file)
-            if pmkid_hash is not None:
-                break  # Got PMKID
-
-            Color.pattack('PMKID', self.target, 'CAPTURE',
-                    'Waiting for PMKID (%s)' % str(self.timer))
-            time.sleep(1)
+        essid = self.target.essid if self.target.essid_known else None
+        tracker = PmkidTracker(self.pcapng_file, bssid=self.target.bssid, essid=essid)
+        watcher = FileWatcher(os.path.dirname(self.pcapng_file),
+                              prefix=os.path.basename(self.pcapng_file),
+                              suffixes=('.pcapng',))
+        try:
+            while self.timer.remaining() > 0 and self.keep_capturing:
+                step_timer = Timer(1)
+                pmkid_hash = tracker.update()
+                if pmkid_hash is not None:
+                    break  # Got PMKID
 
-        self.keep_capturing = False
+                Color.pattack('PMKID', self.target, 'CAPTURE',
+                        'Waiting for PMKID (%s)' % str(self.timer))
+                # Sleep for at-most 1 second, parsing as soon as hcxdumptool writes to the capture
+                while step_timer.remaining() > 0 and pmkid_hash is None:
+                    if watcher.wait(step_timer.remaining()):
+                        pmkid_hash = tracker.update()
+                if pmkid_hash is not None:
+                    break  # Got PMKID
+        finally:
+            watcher.close()
+            # Also on Ctrl+C: hcxdumptool runs in its own process group, the terminal's SIGINT does not reach it
+            self.keep_capturing = False
 
         if pmkid_hash is None:
             Color.pattack('PMKID', self.target, 'CAPTURE',
@@ -160,7 +174,10 @@ class AttackPMKID(Attack):
         else:
             Color.clear_entire_line()
             Color.pattack('PMKID', self.target, 'CRACK', 'Cracking PMKID using %s ...\n' % Configuration.wordlist)
-            key = Hashcat.crack_pmkid(pmkid_file)
+            def progress(status):
+                Color.clear_entire_line()
+                Color.pattack('PMKID', self.target, 'CRACK', str(status))
+            key = Hashcat.crack_pmkid(pmkid_file, progress=progress)
 
         if key is None:
             # Failed to crack.
@@ -33,6 +33,7 @@ class AttackWEP(Attack):
 
         aircrack = None # Aircrack process, not started yet
         fakeauth_proc = None
+        aireplay = None
         replay_file = None
         airodump_target = None
 
@@ -50,13 +51,11 @@ class AttackWEP(Attack):
             attack_name = attacks_remaining.pop(0)
             # BIG try-catch to capture ctrl+c
             try:
-                # Start Airodump process
-                with Airodump(channel=self.target.channel,
-                              target_bssid=self.target.bssid,
-                              ivs_only=True, # Only capture IVs packets
-                              skip_wps=True, # Don't check for WPS-compatibility
-                              output_file_prefix='wep',
-                              delete_existing_files=not keep_ivs) as airodump:
+                # Start Airodump process (or join the shared capture of this channel)
+                with self.capture(ivs_only=True, # Only capture IVs packets
+                                  skip_wps=True, # Don't check for WPS-compatibility
+                                  output_file_prefix='wep',
+                                  delete_existing_files=not keep_ivs) as airodump:
 
                     # Color.clear_line()
                     print('\r waiting for target to appear...')
@@ -146,24 +145,24 @@ class AttackWEP(Attack):
                         if total_ivs > Configuration.wep_crack_at_ivs:
                             if not aircrack or not aircrack.is_running():
                                 # Aircrack hasn't started yet. Start it.
-                                ivs_files = airodump.find_files(endswith='.ivs')
+                                ivs_files = airodump.find_files(endswith=airodump.capture_extension)
                                 ivs_files.sort()
                                 if len(ivs_files) > 0:
                                     if not keep_ivs:
                                         ivs_files = ivs_files[-1]  # Use most-recent .ivs file
-                                    aircrack = Aircrack(ivs_files)
+                                    aircrack = Aircrack(ivs_files, bssid=self.target.bssid)
 
                             elif Configuration.wep_restart_aircrack > 0 and \
                                     aircrack.pid.running_time() > Configuration.wep_restart_aircrack:
                                 # Restart aircrack after X seconds
                                 #print('\n aircrack ran for more than %d seconds, restarting' % Configuration.wep_restart_aircrack)
                                 aircrack.stop()
-                                ivs_files = airodump.find_files(endswith='.ivs')
+                                ivs_files = airodump.find_files(endswith=airodump.capture_extension)
                                 ivs_files.sort()
                                 if len(ivs_files) > 0:
                                     if not keep_ivs:
                                         ivs_files = ivs_files[-1]  # Use most-recent .ivs file
-                                    aircrack = Aircrack(ivs_files)
+                                    aircrack = Aircrack(ivs_files, bssid=self.target.bssid)
 
 
                         if not aireplay.is_running():
@@ -229,11 +228,14 @@ class AttackWEP(Attack):
                                 time_unchanged_ivs = time.time()
                         last_ivs_count = airodump_target.ivs
 
-                        time.sleep(1)
+                        # Until airodump writes new IV counts (at most 1 second)
+                        airodump.wait_for_files(1, endswith='.csv')
                         continue
                     # End of big while loop
                 # End of with-airodump
             except KeyboardInterrupt:
+                # Tools run in their own process groups: the terminal's SIGINT only reached byteBuggy
+                if aireplay: aireplay.stop()
                 if fakeauth_proc: fakeauth_proc.stop()
                 if len(attacks_remaining) == 0:
                     if keep_ivs:
@@ -3,19 +3,17 @@
 
 from ..model.attack import Attack
 from ..tools.aircrack import Aircrack
-from ..tools.airodump import Airodump
 from ..tools.aireplay import Aireplay
 from ..config import Configuration
 from ..util.color import Color
 from ..util.process import Process
 from ..util.timer import Timer
-from ..model.handshake import Handshake
+from ..model.handshake import Handshake, HandshakeTracker
 from ..model.wpa_result import CrackResultWPA
 
 import time
 import os
 import re
-from shutil import copy
 
 class AttackWPA(Attack):
     def __init__(self, target):
@@ -83,11 +81,8 @@ class AttackWPA(Attack):
         '''Returns captured or stored handshake, otherwise None.'''
         handshake = None
 
-        # First, start Airodump process
-        with Airodump(channel=self.target.channel,
-                      target_bssid=self.target.bssid,
-                      skip_wps=True,
-                      output_file_prefix='wpa') as airodump:
+        # First, start Airodump process (or join the shared capture of this channel)
+        with self.capture(skip_wps=True, output_file_prefix='wpa') as airodump:
 
             Color.clear_entire_line()
             Color.pattack('WPA', self.target, 'Handshake capture', 'Waiting for target to appear...')
@@ -107,6 +102,7 @@ class AttackWPA(Attack):
 
             timeout_timer = Timer(Configuration.wpa_attack_timeout)
             deauth_timer = Timer(Configuration.wpa_deauth_timeout)
+            tracker = None
 
             while handshake is None and not timeout_timer.ended():
                 step_timer = Timer(1)
@@ -120,20 +116,17 @@ class AttackWPA(Attack):
                 cap_files = airodump.find_files(endswith='.cap')
                 if len(cap_files) == 0:
                     # No cap files yet
-                    time.sleep(step_timer.remaining())
+                    airodump.wait_for_files(step_timer.remaining(), endswith='.cap')
                     continue
                 cap_file = cap_files[0]
 
-                # Copy .cap file to temp for consistency
-                temp_file = Configuration.temp('handshake.cap.bak')
-                copy(cap_file, temp_file)
-
-                # Check cap file in temp for Handshake
-                bssid = airodump_target.bssid
-                essid = airodump_target.essid if airodump_target.essid_known else None
-                handshake = Handshake(temp_file, bssid=bssid, essid=essid)
-                if handshake.has_handshake():
-                    # We got a handshake
+                # Parse packets appended to the .cap file since the last check
+                if tracker is None or tracker.capfile != cap_file:
+                    essid = airodump_target.essid if airodump_target.essid_known else None
+                    tracker = HandshakeTracker(cap_file, bssid=airodump_target.bssid, essid=essid)
+                if tracker.update():
+                    # We got a handshake, copy .cap file to temp for consistency
+                    handshake = tracker.snapshot(Configuration.temp('handshake.cap.bak'))
                     Color.clear_entire_line()
                     Color.pattack('WPA',
                             airodump_target,
@@ -142,11 +135,6 @@ class AttackWPA(Attack):
                     print('')
                     break
 
-                # There is no handshake
-                handshake = None
-                # Delete copied .cap file in temp to save space
-                os.remove(temp_file)
-
                 # Look for new clients
                 airodump_target = self.wait_for_target(airodump)
                 for client in airodump_target.clients:
@@ -165,8 +153,10 @@ class AttackWPA(Attack):
                     # Restart timer
                     deauth_timer = Timer(Configuration.wpa_deauth_timeout)
 
-                # Sleep for at-most 1 second
-                time.sleep(step_timer.remaining())
+                # Sleep for at-most 1 second, parsing the capture as soon as airodump writes to it
+                while step_timer.remaining() > 0:
+                    if airodump.wait_for_files(step_timer.remaining(), endswith='.cap') and tracker.update():
+                        break  # Handshake is reported at the top of the loop
                 continue # Handshake listen+deauth loop
 
         if handshake is None:
@@ -223,7 +213,9 @@ class AttackWPA(Attack):
             print('saved')
         else:
             print(' saving copy of handshake to %s ' % cap_filename)
-            copy(handshake.capfile, cap_filename)
+            # The temp snapshot is not used after this: move it instead of copying it again
+            from shutil import move
+            move(handshake.capfile, cap_filename)
             print('saved')
 
         # Update handshake to use the stored handshake file for future operations
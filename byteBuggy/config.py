@@ -5,7 +5,6 @@ import os
 
 
 # from .util.color import Color
-from .tools.macchanger import Macchanger
 
 class Configuration(object):
     ''' Stores configuration variables and functions for byteBuggy. '''
@@ -13,6 +12,8 @@ class Configuration(object):
 
     initialized = False # Flag indicating config has been initialized
     temp_dir = None     # Temporary directory
+    temp_manager = None # TempDirectory for temp_dir (see util/tempdir.py)
+    temp_max_size = 256 # Megabytes of captures to keep in temp_dir (0 for no limit)
     interface = None
     verbose = 0
 
@@ -30,6 +31,18 @@ class Configuration(object):
             return
         cls.initialized = True
 
+        cls.load_defaults()
+
+        # Overwrite config values with arguments (if defined)
+        cls.load_from_arguments()
+
+        if load_interface:
+            cls.get_monitor_mode_interface()
+
+
+    @classmethod
+    def load_defaults(cls):
+        ''' Sets default configuration values (without reading the arguments) '''
         cls.verbose = 0 # Verbosity of output. Higher number means more debug info about running processes.
         cls.print_stack_traces = True
 
@@ -77,6 +90,8 @@ class Configuration(object):
         cls.wpa_deauth_timeout = 15 # Wait time between deauths
         cls.wpa_attack_timeout = 500 # Wait time before failing
         cls.wpa_handshake_dir = 'hs' # Dir to store handshakes
+        cls.wpa_pmk_dir = 'pmk' # Dir to store precomputed PMKs (see util/pmkdb.py)
+        cls.wpa_pmk_store = False # Store PMKs computed by the cpu cracker in wpa_pmk_dir
         cls.wpa_strip_handshake = False # Strip non-handshake packets
         cls.ignore_old_handshakes = False # Always fetch a new handshake
 
@@ -85,7 +100,7 @@ class Configuration(object):
         cls.pmkid_timeout = 30  # Time to wait for PMKID capture
 
         # Default dictionary for cracking
-        cls.cracked_file = 'cracked.txt'
+        cls.cracked_file = 'cracked.jsonl' # One JSON result per line (migrated from cracked.txt)
         cls.wordlist = None
         wordlists = [
             './wordlist-top4800-probable.txt',  # Local file (ran from cloned repo)
@@ -117,12 +132,8 @@ class Configuration(object):
         cls.show_cracked = False
         cls.check_handshake = None
         cls.crack_handshake = False
-
-        # Overwrite config values with arguments (if defined)
-        cls.load_from_arguments()
-
-        if load_interface:
-            cls.get_monitor_mode_interface()
+        cls.scan_json = None       # File (or '-' for stdout) for the headless JSON scan
+        cls.scan_json_rate = 1.0   # Seconds between JSON scan updates
 
 
     @classmethod
@@ -133,7 +144,8 @@ class Configuration(object):
                 from .tools.airmon import Airmon
                 cls.interface = Airmon.ask()
                 if cls.random_mac:
-                   Macchanger.random()
+                    from .tools.macchanger import Macchanger
+                    Macchanger.random()
         except Exception as e:
             print(f"Error selecting wireless interface: {e}")
             print(cls.interface)
@@ -158,7 +170,7 @@ class Configuration(object):
             print(' option: using eviltwin attacks against all targets')
         '''
 
-        cls.parse_wep_attacks()
+        cls.parse_wep_attacks(args)
 
         cls.validate()
 
@@ -166,6 +178,8 @@ class Configuration(object):
         if args.cracked:         cls.show_cracked = True
         if args.check_handshake: cls.check_handshake = args.check_handshake
         if args.crack_handshake: cls.crack_handshake = True
+        if args.scan_json:       cls.scan_json = args.scan_json
+        if args.scan_json_rate:  cls.scan_json_rate = args.scan_json_rate
 
 
     @classmethod
@@ -243,6 +257,10 @@ class Configuration(object):
             cls.kill_conflicting_processes = True
             print(' option: kill conflicting processes enabled')
 
+        if args.temp_max_size is not None:
+            cls.temp_max_size = args.temp_max_size
+            print(' option: keeping at most %dMB of temporary captures' % args.temp_max_size)
+
 
     @classmethod
     def parse_wep_args(cls, args):
@@ -321,6 +339,16 @@ class Configuration(object):
             print(' option: will store handshakes to ' +
                     '%s' % args.wpa_handshake_dir)
 
+        if args.wpa_pmk_dir:
+            cls.wpa_pmk_dir = args.wpa_pmk_dir
+            print(' option: will use precomputed PMKs in ' +
+                    '%s' % args.wpa_pmk_dir)
+
+        if args.wpa_pmk_store:
+            cls.wpa_pmk_store = True
+            print(' option: will store PMKs computed by the cpu cracker in ' +
+                    '%s' % cls.wpa_pmk_dir)
+
         if args.wpa_strip_handshake:
             cls.wpa_strip_handshake = True
             print(' option: will strip non-handshake packets')
@@ -417,20 +445,15 @@ class Configuration(object):
                         % '/'.join(cls.encryption_filter))
 
     @classmethod
-    def parse_wep_attacks(cls):
+    def parse_wep_attacks(cls, args):
         '''Parses and sets WEP-specific args (-chopchop, -fragment, etc)'''
         cls.wep_attacks = []
-        from sys import argv
-        seen = set()
-        for arg in argv:
-            if arg in seen: continue
-            seen.add(arg)
-            if arg == '-arpreplay':  cls.wep_attacks.append('replay')
-            if arg == '-fragment':   cls.wep_attacks.append('fragment')
-            if arg == '-chopchop':   cls.wep_attacks.append('chopchop')
-            if arg == '-caffelatte': cls.wep_attacks.append('caffelatte')
-            if arg == '-p0841':      cls.wep_attacks.append('p0841')
-            if arg == '-hirte':      cls.wep_attacks.append('hirte')
+        if args.wep_attack_replay:   cls.wep_attacks.append('replay')
+        if args.wep_attack_fragment: cls.wep_attacks.append('fragment')
+        if args.wep_attack_chopchop: cls.wep_attacks.append('chopchop')
+        if args.wep_attack_caffe:    cls.wep_attacks.append('caffelatte')
+        if args.wep_attack_p0841:    cls.wep_attacks.append('p0841')
+        if args.wep_attack_hirte:    cls.wep_attacks.append('hirte')
 
         if len(cls.wep_attacks) == 0:
             # Use all attacks
@@ -453,28 +476,65 @@ class Configuration(object):
             cls.temp_dir = cls.create_temp()
         return cls.temp_dir + subfile
 
-    @staticmethod
-    def create_temp():
-        ''' Creates and returns a temporary directory '''
-        from tempfile import mkdtemp
-        tmp = mkdtemp(prefix='byteBuggy')
-        if not tmp.endswith(os.sep):
-            tmp += os.sep
-        return tmp
+    @classmethod
+    def create_temp(cls):
+        ''' Creates and returns a temporary directory (on tmpfs if possible) '''
+        from .util.tempdir import TempDirectory
+        cls.temp_manager = TempDirectory.create(max_size=cls.temp_max_size * 1024 * 1024)
+        return cls.temp_manager.path
+
+    @classmethod
+    def check_temp(cls):
+        ''' Prunes old captures if the temporary directory grew past temp_max_size (rate-limited) '''
+        if cls.temp_manager is not None:
+            # IVs of earlier WEP attacks are still cracked with --keep-ivs
+            cls.temp_manager.keep_suffixes = ('.ivs',) if cls.wep_keep_ivs else ()
+            cls.temp_manager.check()
+
+    @classmethod
+    def temp_full(cls):
+        ''' True if the temporary directory is on tmpfs and still over temp_max_size after pruning '''
+        return cls.temp_manager is not None and cls.temp_manager.in_memory and cls.temp_manager.full
+
+    @classmethod
+    def spill_temp(cls):
+        '''
+        Replaces a full temporary directory on tmpfs (see temp_full()) with a new one on disk,
+        and deletes the old one. Tools writing to it must be stopped first.
+        Returns True if the directory was replaced.
+        '''
+        if not cls.temp_full():
+            return False
+        from .util.tempdir import TempDirectory
+        old = cls.temp_manager
+        cls.temp_manager = TempDirectory.create(max_size=old.max_size, bases=(None,))
+        cls.temp_dir = cls.temp_manager.path
+        old.delete()
+        print(' Temporary files moved from %s to %s' % (old.path, cls.temp_dir))
+        return True
 
     @classmethod
     def delete_temp(cls):
         ''' Remove temp files and folder '''
         if cls.temp_dir is None: return
-        if os.path.exists(cls.temp_dir):
-            for f in os.listdir(cls.temp_dir):
-                os.remove(cls.temp_dir + f)
-            os.rmdir(cls.temp_dir)
+        if cls.temp_manager is not None:
+            cls.temp_manager.delete()
+        else:
+            import shutil
+            shutil.rmtree(cls.temp_dir, ignore_errors=True)
+        cls.temp_dir = cls.temp_manager = None
 
 
     @classmethod
     def exit_gracefully(cls, code=0):
         ''' Deletes temp and exist with the given code '''
+        # Stop every tool that is still running, before its files are deleted
+        from .util.process import ChildManager
+        ChildManager.shutdown()
+        if cls.verbose > 0 and len(ChildManager.usage) > 0:
+            print('\n Resources used by tools:')
+            for line in ChildManager.report():
+                print('  %s' % line)
         cls.delete_temp()
         # Macchanger.reset_if_changed()
         from .tools.airmon import Airmon
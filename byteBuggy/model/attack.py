@@ -14,28 +14,48 @@ class Attack(object):
     def run(self):
         raise Exception('Unimplemented method: run')
 
+    def capture(self, **kwargs):
+        '''
+            Returns airodump for the target (use as `with self.capture(...) as airodump`):
+            a view of the shared CaptureSession while AttackAll runs one (if the session
+            captures what kwargs ask for), otherwise a new Airodump on the target's
+            channel & BSSID, started with kwargs.
+        '''
+        from ..tools.airodump import Airodump, CaptureSession
+        if CaptureSession.shared:
+            if CaptureSession.serves(**kwargs):
+                return CaptureSession.view(self.target.channel, self.target.bssid)
+            CaptureSession.stop()  # The interface listens on one channel, for the new Airodump
+        return Airodump(channel=self.target.channel, target_bssid=self.target.bssid, **kwargs)
+
     def wait_for_target(self, airodump):
         '''Waits for target to appear in airodump.'''
+        from .target import TargetIndex
+        key = TargetIndex.key(self.target.bssid)
+        appeared = []
+
+        def on_targets_changed(diff):
+            for target in diff.added:
+                if TargetIndex.key(target.bssid) == key:
+                    appeared.append(target)
+
         start_time = time.time()
-        targets = airodump.get_targets(apply_filter=False)
-        while len(targets) == 0:
-            # Wait for target to appear in airodump.
-            if int(time.time() - start_time) > Attack.target_wait:
-                raise Exception('Target did not appear after %d seconds, stopping' % Attack.target_wait)
-            time.sleep(1)
-            targets = airodump.get_targets()
-            continue
-
-        # Ensure this target was seen by airodump
-        airodump_target = None
-        for t in targets:
-            if t.bssid == self.target.bssid:
-                airodump_target = t
-                break
+        airodump.subscribe(on_targets_changed)
+        try:
+            airodump.get_targets(apply_filter=False)
+            # Seen by a previous refresh, or added by this one
+            airodump_target = airodump.target_index.get(key)
+            while airodump_target is None and len(appeared) == 0:
+                # Wait for target to appear in airodump.
+                if int(time.time() - start_time) > Attack.target_wait:
+                    raise Exception('Target (%s) did not appear after %d seconds, stopping'
+                        % (self.target.bssid, Attack.target_wait))
+                # Until airodump re-writes its CSV (at most 1 second)
+                airodump.wait_for_files(1, endswith='.csv')
+                airodump.get_targets(apply_filter=False)
+        finally:
+            airodump.unsubscribe(on_targets_changed)
 
         if airodump_target is None:
-            raise Exception(
-                'Could not find target (%s) in airodump' % self.target.bssid)
-
+            airodump_target = appeared[-1]
         return airodump_target
-
@@ -1,12 +1,20 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+from .mac import Mac
+
+
 class Client(object):
     '''
         Holds details for a 'Client' - a wireless device (e.g. computer)
         that is associated with an Access Point (e.g. router)
     '''
 
+    __slots__ = ('station_mac', 'station_str', 'power', 'packets', 'bssid_mac')
+
+    # BSSID of clients that are not associated with an AP
+    NOT_ASSOCIATED = '(not associated)'
+
     def __init__(self, fields):
         '''
             Initializes & stores client info based on fields.
@@ -21,17 +29,32 @@ class Client(object):
                     5 BSSID, (Access Point's MAC address)
                     6 Probed ESSIDs
         '''
-        self.station =     fields[0].strip()
-        self.power   = int(fields[3].strip())
-        self.packets = int(fields[4].strip())
-        self.bssid   =     fields[5].strip()
+        self.station_mac = Mac.parse(fields[0])
+        self.station_str = None  # Built from self.station_mac on first use
+        self.power       = int(fields[3].strip())
+        self.packets     = int(fields[4].strip())
+        if 'not associated' in fields[5]:
+            self.bssid_mac = None
+        else:
+            self.bssid_mac = Mac.parse(fields[5])
+
+    @property
+    def station(self):
+        if self.station_str is None:
+            self.station_str = Mac.to_str(self.station_mac)
+        return self.station_str
 
+    @property
+    def bssid(self):
+        if self.bssid_mac is None:
+            return Client.NOT_ASSOCIATED
+        return Mac.to_str(self.bssid_mac)
 
     def __str__(self):
         ''' String representation of a Client '''
         result = ''
-        for (key,value) in self.__dict__.items():
-            result += key + ': ' + str(value)
+        for key in ('station', 'power', 'packets', 'bssid'):
+            result += key + ': ' + str(getattr(self, key))
             result += ', '
         return result
 
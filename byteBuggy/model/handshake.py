@@ -2,14 +2,185 @@
 # -*- coding: utf-8 -*-
 
 from ..util.process import Process
+from ..util.pcap import PcapFile, CaptureReader, Dot11
 # from ..util.color import Color
 # from ..tools.tshark import Tshark
 # from ..tools.pyrit import Pyrit
 
-import re, os
+import re, os, struct
+
+
+class EapolKey(object):
+    '''
+        Holds the fields of a single EAPOL-Key frame (one message of the 4-way handshake).
+    '''
+
+    # Key Information flags
+    KEY_INFO_PAIRWISE = 0x0008
+    KEY_INFO_INSTALL  = 0x0040
+    KEY_INFO_ACK      = 0x0080
+    KEY_INFO_MIC      = 0x0100
+    KEY_INFO_SECURE   = 0x0200
+
+    # OUI + data type of the PMKID key data encapsulation (00-0F-AC:4)
+    PMKID_KDE = b'\x00\x0f\xac\x04'
+
+    def __init__(self, ap, station, message, key_info, replay_counter, nonce, mic, key_data, eapol):
+        self.ap = ap                         # Authenticator MAC (str, e.g. 'AA:BB:CC:DD:EE:FF')
+        self.station = station               # Supplicant MAC (str)
+        self.message = message               # Handshake message number (1-4)
+        self.key_info = key_info             # Key Information field (int)
+        self.replay_counter = replay_counter # Replay counter (int)
+        self.nonce = nonce                   # ANonce (M1/M3) or SNonce (M2) (bytes)
+        self.mic = mic                       # Key MIC (bytes)
+        self.key_data = key_data             # Key Data (bytes)
+        self.eapol = eapol                   # Entire EAPOL frame (bytes)
+
+    @staticmethod
+    def message_number(key_info, nonce):
+        '''Identifies which message (1-4) of the 4-way handshake a frame is, or None.'''
+        if not key_info & EapolKey.KEY_INFO_PAIRWISE:
+            return None  # Group key handshake
+        if key_info & EapolKey.KEY_INFO_ACK:
+            if key_info & EapolKey.KEY_INFO_MIC:
+                return 3 if key_info & EapolKey.KEY_INFO_INSTALL else None
+            return 1
+        if not key_info & EapolKey.KEY_INFO_MIC:
+            return None
+        if key_info & EapolKey.KEY_INFO_SECURE or nonce.count(0) == len(nonce):
+            return 4
+        return 2
+
+    @staticmethod
+    def from_eapol(eapol, addr1, addr2):
+        '''
+            Parses an EAPOL frame (starting at the 802.1X header).
+            Args:
+                eapol - bytes of the EAPOL frame.
+                addr1 - Receiver address of the 802.11 frame.
+                addr2 - Transmitter address of the 802.11 frame.
+            Returns: EapolKey instance, or None if this is not a 4-way handshake message.
+        '''
+        if len(eapol) < 99 or eapol[1] != 3:
+            return None  # Too short, or not an EAPOL-Key frame
+        if eapol[4] not in (2, 254):
+            return None  # Not an RSN or WPA key descriptor
+
+        eapol_len = struct.unpack('>H', eapol[2:4])[0]
+        if 4 + eapol_len < 99:
+            return None  # Declared body too short for an EAPOL-Key frame (malformed)
+        eapol = eapol[:4 + eapol_len]
+
+        key_info = struct.unpack('>H', eapol[5:7])[0]
+        nonce = bytes(eapol[17:49])
+        message = EapolKey.message_number(key_info, nonce)
+        if message is None:
+            return None
+
+        if message in (1, 3):
+            ap, station = addr2, addr1  # Sent by the AP
+        else:
+            ap, station = addr1, addr2  # Sent by the client
+
+        key_data_len = struct.unpack('>H', eapol[97:99])[0]
+        return EapolKey(ap=Dot11.mac_to_str(ap),
+                        station=Dot11.mac_to_str(station),
+                        message=message,
+                        key_info=key_info,
+                        replay_counter=struct.unpack('>Q', eapol[9:17])[0],
+                        nonce=nonce,
+                        mic=bytes(eapol[81:97]),
+                        key_data=bytes(eapol[99:99 + key_data_len]),
+                        eapol=bytes(eapol))
+
+    def pmkid(self):
+        '''Returns the PMKID (bytes) from the PMKID KDE in an unencrypted M1's key data, or None.'''
+        if self.message != 1:
+            return None
+        data = self.key_data
+        offset = 0
+        while offset + 2 <= len(data):
+            (kde_type, kde_len) = (data[offset], data[offset + 1])
+            kde = data[offset + 2:offset + 2 + kde_len]
+            if kde_type == 0xdd and kde_len == 20 and kde[:4] == EapolKey.PMKID_KDE:
+                pmkid = kde[4:]
+                if pmkid.count(0) != len(pmkid):
+                    return pmkid
+            offset += 2 + kde_len
+        return None
+
+
+class HandshakeTracker(object):
+    '''
+        Watches a growing capture file (e.g. airodump's .cap) for a handshake from one AP.
+        Only newly-appended records are parsed on each update, and only the EAPOL-Key
+        messages & ESSID for the target AP are kept in memory.
+    '''
+
+    def __init__(self, capfile, bssid, essid=None):
+        self.capfile = capfile
+        self.bssid = bssid.upper()
+        self.essid = essid
+        self.reader = CaptureReader(capfile)
+        self.keys = []   # EapolKeys for self.bssid, in capture order
+        self.pairs = []  # Crackable message pairs found so far
+
+    def update(self):
+        '''Parses records appended since the last update. Returns True if a handshake was found.'''
+        generation = self.reader.generation
+        new_keys = False
+        for (linktype, packet) in self.reader.read():
+            if self.reader.generation != generation:
+                # Capture file was re-created, previous messages are gone.
+                generation = self.reader.generation
+                self.keys, self.pairs = [], []
+
+            if self.essid is None:
+                frame = Dot11.frame(linktype, packet)
+                beacon = Dot11.beacon(frame) if frame is not None else None
+                if beacon is not None and beacon[0] == self.bssid and beacon[1]:
+                    self.essid = beacon[1]
+
+            key = Handshake.parse_eapol_key(linktype, packet)
+            if key is not None and key.ap == self.bssid:
+                self.keys.append(key)
+                new_keys = True
+
+        if self.reader.generation != generation:
+            self.keys, self.pairs = [], []
+
+        if new_keys:
+            self.pairs = Handshake.pair_messages(self.keys)
+        return self.has_handshake()
+
+    def has_handshake(self):
+        return len(self.pairs) > 0
+
+    def snapshot(self, outfile):
+        '''
+            Copies the capture file to outfile (call once a handshake is found).
+            Returns: Handshake for the copied file.
+        '''
+        from shutil import copy
+        copy(self.capfile, outfile)
+        return Handshake(outfile, bssid=self.bssid, essid=self.essid)
+
 
 class Handshake(object):
 
+    LLC_SNAP_EAPOL = b'\xaa\xaa\x03\x00\x00\x00\x88\x8e'
+
+    # Message pair identifiers used by hashcat & hcxtools
+    MESSAGE_PAIR_M12E2 = 0x00  # ANonce from M1, EAPOL & MIC from M2 (challenge)
+    MESSAGE_PAIR_M32E2 = 0x02  # ANonce from M3, EAPOL & MIC from M2 (authorized)
+
+    HCCAPX_SIGNATURE = 0x58504348  # 'HCPX'
+    HCCAPX_VERSION = 4
+    HCCAPX_FORMAT = struct.Struct('<IIBB32sB16s6s32s6s32sH256s')  # 393 bytes
+
+    # What bytes that are not UTF-8 decode to (errors='replace'): the ESSID is not the broadcast one
+    REPLACEMENT_CHARACTER = '\ufffd'
+
     def __init__(self, capfile, bssid=None, essid=None):
         self.capfile = capfile
         self.bssid = bssid
@@ -31,54 +202,271 @@ class Handshake(object):
                 self.bssid = match.group(1).replace('-', ':')
                 return self.bssid
 
-        # # Get list of bssid/essid pairs from cap file
-        # pairs = Tshark.bssid_essid_pairs(self.capfile, bssid=self.bssid)
-
-        # if len(pairs) == 0:
-        #     pairs = self.pyrit_handshakes() # Find bssid/essid pairs that have handshakes in Pyrit
-
-        # if len(pairs) == 0 and not self.bssid and not self.essid:
-        #     # Tshark and Pyrit failed us, nothing else we can do.
-        #     raise ValueError('Cannot find BSSID or ESSID in cap file %s' % self.capfile)
-
-        # if not self.essid and not self.bssid:
-        #     # We do not know the bssid nor the essid
-        #     # TODO: Display menu for user to select from list
-        #     # HACK: Just use the first one we see
-        #     self.bssid = pairs[0][0]
-        #     self.essid = pairs[0][1]
-        #     print(' Warning: Arbitrarily selected ' +
-        #             'bssid %s and essid "%s"' % (self.bssid, self.essid))
-
-        # elif not self.bssid:
-        #     # We already know essid
-        #     for (bssid, essid) in pairs:
-        #         if self.essid == essid:
-        #             print(' Discovered bssid %s' % bssid)
-        #             self.bssid = bssid
-        #             break
-
-        # elif not self.essid:
-        #     # We already know bssid
-        #     for (bssid, essid) in pairs:
-        #         if self.bssid.lower() == bssid.lower():
-        #             print(' Discovered essid "%s"' % essid)
-        #             self.essid = essid
-        #             break
+        # Get list of bssid/essid pairs from cap file
+        pairs = self.bssid_essid_pairs()
 
-
-    def has_handshake(self):
+        if len(pairs) == 0:
+            # No beacons, fall back to APs that have handshakes
+            pairs = self.eapol_handshakes()
+
+        if len(pairs) == 0 and not self.bssid and not self.essid:
+            # Nothing else we can do.
+            raise ValueError('Cannot find BSSID or ESSID in cap file %s' % self.capfile)
+
+        if not self.essid and not self.bssid:
+            # We do not know the bssid nor the essid
+            # TODO: Display menu for user to select from list
+            # HACK: Just use the first one we see
+            self.bssid = pairs[0][0]
+            self.essid = pairs[0][1]
+            print(' Warning: Arbitrarily selected ' +
+                    'bssid %s and essid "%s"' % (self.bssid, self.essid))
+
+        elif not self.bssid:
+            # We already know essid
+            for (bssid, essid) in pairs:
+                if self.essid == essid:
+                    print(' Discovered bssid %s' % bssid)
+                    self.bssid = bssid
+                    break
+
+        elif not self.essid:
+            # We already know bssid
+            for (bssid, essid) in pairs:
+                if essid and self.bssid.lower() == bssid.lower():
+                    print(' Discovered essid "%s"' % essid)
+                    self.essid = essid
+                    break
+
+
+    def has_handshake(self, cross_check=False):
+        '''
+            Returns True if self.capfile contains a crackable 4-way handshake.
+            Args:
+                cross_check - Also require aircrack-ng to agree (if it is installed).
+        '''
         if not self.bssid or not self.essid:
             self.divine_bssid_and_essid()
 
         # if len(self.tshark_handshakes()) > 0:   return True
         # if len(self.pyrit_handshakes()) > 0:    return True
 
-        # TODO: Can we trust cowpatty & aircrack?
+        # TODO: Can we trust cowpatty?
         #if len(self.cowpatty_handshakes()) > 0: return True
-        if len(self.aircrack_handshakes()) > 0: return True
+        if len(self.eapol_handshakes()) == 0:
+            return False
+
+        if cross_check and Process.exists('aircrack-ng'):
+            return len(self.aircrack_handshakes()) > 0
+
+        return True
+
+
+    def eapol_handshakes(self):
+        '''
+            Returns list[tuple] of BSSID & ESSID pairs (ESSIDs are always `None`)
+            for which self.capfile contains a crackable message pair (M1+M2 or M2+M3).
+            Parses the capture in-process; does not start any external tools.
+        '''
+        bssids = []
+        for (message_a, message_b) in self.eapol_message_pairs():
+            if message_a.ap not in bssids:
+                bssids.append(message_a.ap)
+        return [(bssid, None) for bssid in bssids]
+
+
+    def eapol_message_pairs(self):
+        '''
+            Finds crackable pairs of EAPOL-Key messages in self.capfile.
+            Returns: list[tuple(EapolKey, EapolKey)] of (M1, M2) or (M2, M3) pairs,
+                     optionally limited to self.bssid.
+        '''
+        return Handshake.pair_messages(self.eapol_keys())
+
+
+    def best_message_pair(self):
+        '''
+            Chooses the message pair most likely to crack.
+            Prefers M2+M3 (the AP accepted the client's MIC) over M1+M2.
+            Returns: tuple(message pair id, EapolKey of M2, ANonce) or None if there is no handshake.
+        '''
+        best = None
+        for (message_a, message_b) in self.eapol_message_pairs():
+            if message_a.message == 1:
+                candidate = (Handshake.MESSAGE_PAIR_M12E2, message_b, message_a.nonce)
+            else:
+                candidate = (Handshake.MESSAGE_PAIR_M32E2, message_a, message_b.nonce)
+            if best is None or candidate[0] > best[0]:
+                best = candidate
+        return best
+
+
+    def hash_essid(self):
+        '''
+            Returns the ESSID (bytes) to use in hashes & PMK salts.
+            Prefers the raw ESSID broadcast in the capture: self.essid may be filesystem-safe
+            (stripped), or decoded lossily from a non-UTF-8 ESSID.
+        '''
+        pairs = self.bssid_essid_pairs(raw=True)
+        if len(pairs) > 0:
+            return pairs[0][1]
+        if type(self.essid) is bytes:
+            return self.essid
+        if self.essid and Handshake.REPLACEMENT_CHARACTER not in self.essid:
+            return self.essid.encode('utf-8')
+        return None  # Unknown, or the original bytes are lost
+
+
+    def hashcat_hash(self):
+        '''
+            Returns the hashcat mode 22000 hash line (WPA*02*...) for the best message pair,
+            or None if self.capfile does not contain a handshake.
+        '''
+        if not self.bssid or not self.essid:
+            self.divine_bssid_and_essid()
+
+        best = self.best_message_pair()
+        essid = self.hash_essid()
+        if best is None or essid is None:
+            return None
+        (message_pair, m2, anonce) = best
+
+        return '*'.join([
+            'WPA', '02',
+            m2.mic.hex(),
+            m2.ap.replace(':', '').lower(),
+            m2.station.replace(':', '').lower(),
+            essid.hex(),
+            anonce.hex(),
+            Handshake.zero_mic(m2.eapol).hex(),
+            '%02x' % message_pair
+        ])
+
+
+    def hccapx(self):
+        '''
+            Returns the legacy hashcat .hccapx record (bytes) for the best message pair,
+            or None if self.capfile does not contain a handshake.
+        '''
+        if not self.bssid or not self.essid:
+            self.divine_bssid_and_essid()
 
-        return False
+        best = self.best_message_pair()
+        essid = self.hash_essid()
+        if best is None or essid is None:
+            return None
+        (message_pair, m2, anonce) = best
+        if len(m2.eapol) > 256 or len(essid) > 32:
+            return None  # Does not fit in a hccapx record
+
+        return Handshake.HCCAPX_FORMAT.pack(
+                Handshake.HCCAPX_SIGNATURE,
+                Handshake.HCCAPX_VERSION,
+                message_pair,
+                len(essid), essid,
+                m2.key_info & 0x7,
+                m2.mic,
+                bytes.fromhex(m2.ap.replace(':', '')),
+                anonce,
+                bytes.fromhex(m2.station.replace(':', '')),
+                m2.nonce,
+                len(m2.eapol), Handshake.zero_mic(m2.eapol))
+
+
+    @staticmethod
+    def zero_mic(eapol):
+        '''Returns the EAPOL frame with the Key MIC field zeroed (as it was when the MIC was computed).'''
+        return eapol[:81] + (b'\x00' * 16) + eapol[97:]
+
+
+    def eapol_keys(self):
+        '''Returns list[EapolKey] of all handshake messages in self.capfile (filtered by self.bssid).'''
+        bssid = self.bssid.upper() if self.bssid else None
+        keys = []
+        with PcapFile(self.capfile) as pcap:
+            for (linktype, packet) in pcap:
+                key = Handshake.parse_eapol_key(linktype, packet)
+                if key is None:
+                    continue
+                if bssid and key.ap != bssid:
+                    continue
+                keys.append(key)
+        return keys
+
+
+    def bssid_essid_pairs(self, raw=False):
+        '''
+            Finds all BSSIDs (with corresponding ESSIDs) from beacons & probe responses in self.capfile.
+            Args:
+                raw - Return ESSIDs as broadcast (bytes) instead of decoded for display.
+            Returns: list[tuple(BSSID, ESSID)], limited to self.bssid if it is set.
+        '''
+        bssid = self.bssid.upper() if self.bssid else None
+        pairs = []
+        with PcapFile(self.capfile) as pcap:
+            for frame in pcap.frames():
+                pair = Dot11.beacon(frame, raw=raw)
+                if pair is None or pair[1] is None or pair in pairs:
+                    continue
+                if bssid and pair[0] != bssid:
+                    continue
+                pairs.append(pair)
+        return pairs
+
+
+    @staticmethod
+    def pair_messages(keys):
+        '''
+            Pairs handshake messages exchanged between the same AP and station.
+            M2 is paired with the most recent M1 that has the same replay counter,
+            and M3 with the most recent M2 whose replay counter is one lower.
+            Args:
+                keys - list[EapolKey] in capture order.
+            Returns: list[tuple(EapolKey, EapolKey)]
+        '''
+        last_m1 = {}  # Map of (ap, station, replay counter) -> most recent M1
+        last_m2 = {}  # Map of (ap, station, replay counter) -> most recent M2
+        pairs = []
+        for key in keys:
+            if key.message == 1:
+                last_m1[(key.ap, key.station, key.replay_counter)] = key
+            elif key.message == 2:
+                last_m2[(key.ap, key.station, key.replay_counter)] = key
+                m1 = last_m1.get((key.ap, key.station, key.replay_counter))
+                if m1 is not None:
+                    pairs.append((m1, key))
+            elif key.message == 3:
+                m2 = last_m2.get((key.ap, key.station, key.replay_counter - 1))
+                if m2 is not None:
+                    pairs.append((m2, key))
+        return pairs
+
+
+    @staticmethod
+    def parse_eapol_key(linktype, packet):
+        '''Returns EapolKey if the packet is an (unencrypted) EAPOL-Key data frame, otherwise None.'''
+        frame = Dot11.frame(linktype, packet)
+        if frame is None or len(frame) < 24:
+            return None
+
+        frame_control, flags = frame[0], frame[1]
+        if (frame_control >> 2) & 0x3 != 2:
+            return None  # Not a data frame
+        if flags & 0x40:
+            return None  # Protected (encrypted) frame
+
+        header_len = 24
+        if flags & 0x03 == 0x03:
+            header_len += 6  # WDS frame includes a 4th address
+        if frame_control & 0x80:
+            header_len += 2  # QoS Control
+            if flags & 0x80:
+                header_len += 4  # HT Control
+
+        if bytes(frame[header_len:header_len + 8]) != Handshake.LLC_SNAP_EAPOL:
+            return None
+
+        return EapolKey.from_eapol(frame[header_len + 8:], frame[4:10], frame[10:16])
 
 
     # def tshark_handshakes(self):
@@ -141,7 +529,10 @@ class Handshake(object):
         # if Process.exists('cowpatty'):
         #     Handshake.print_pairs(self.cowpatty_handshakes(), self.capfile, 'cowpatty')
 
-        Handshake.print_pairs(self.aircrack_handshakes(), self.capfile, 'aircrack')
+        Handshake.print_pairs(self.eapol_handshakes(), self.capfile, 'eapol')
+
+        if Process.exists('aircrack-ng'):
+            Handshake.print_pairs(self.aircrack_handshakes(), self.capfile, 'aircrack')
 
 
     # def strip(self, outfile=None):
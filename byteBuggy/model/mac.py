@@ -0,0 +1,23 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+class Mac(object):
+    '''
+        MAC addresses packed into 48-bit ints, for Targets & Clients.
+        Their string form (upper-case, colon-separated, as written by airodump)
+        is only built when needed.
+    '''
+
+    @staticmethod
+    def parse(text):
+        '''Returns the address (e.g. 'AA:BB:CC:DD:EE:FF') as an int. Raises ValueError if it is not a MAC.'''
+        text = text.strip()
+        if len(text) != 17 or text[2::3] != ':::::':
+            raise ValueError('Invalid MAC address: %s' % text)
+        return int(text.replace(':', ''), 16)
+
+    @staticmethod
+    def to_str(mac):
+        text = '%012X' % mac
+        return ':'.join(text[i:i + 2] for i in range(0, 12, 2))
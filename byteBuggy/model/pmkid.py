@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from .handshake import Handshake
+from ..util.pcap import CaptureReader, Dot11
+
+
+class PmkidTracker(object):
+    '''
+        Watches hcxdumptool's growing .pcapng for a PMKID from one AP.
+        Only newly-appended records are parsed on each update; the PMKID is taken
+        from the RSN key data of EAPOL message 1 sent by the target AP.
+    '''
+
+    def __init__(self, capfile, bssid, essid=None):
+        self.capfile = capfile
+        self.bssid = bssid.upper()
+        self.essid = essid
+        self.hash_essid = None  # ESSID (bytes) as broadcast by the AP, for the hash
+        self.reader = CaptureReader(capfile)
+        self.pmkid = None    # PMKID (bytes) of the first matching M1
+        self.station = None  # Station (str) the M1 was sent to
+
+    def update(self):
+        '''
+            Parses records appended since the last update.
+            Returns:
+                The PMKID hash (pmkid*bssid*station*essid, as written by hcxpcaptool -z) if found.
+                None if not found (yet).
+        '''
+        generation = self.reader.generation
+        for (linktype, packet) in self.reader.read():
+            if self.reader.generation != generation:
+                # Capture file was re-created, start over.
+                generation = self.reader.generation
+                self.pmkid = self.station = None
+
+            if self.hash_essid is None:
+                frame = Dot11.frame(linktype, packet)
+                beacon = Dot11.beacon(frame, raw=True) if frame is not None else None
+                if beacon is not None and beacon[0] == self.bssid and beacon[1]:
+                    self.hash_essid = beacon[1]
+                    if self.essid is None:
+                        self.essid = beacon[1].decode('utf-8', errors='replace')  # For display
+
+            if self.pmkid is not None:
+                continue  # Still looking for the ESSID
+
+            # Note: hcxdumptool records *anything* it finds, ignoring the filterlist.
+            key = Handshake.parse_eapol_key(linktype, packet)
+            if key is None or key.ap != self.bssid:
+                continue
+            pmkid = key.pmkid()
+            if pmkid is not None:
+                self.pmkid = pmkid
+                self.station = key.station
+
+        return self.pmkid_hash()
+
+    def pmkid_hash(self):
+        '''Returns the PMKID hash for the captured PMKID, or None if the PMKID or ESSID is missing.'''
+        essid = self.hash_essid
+        if essid is None and self.essid is not None and Handshake.REPLACEMENT_CHARACTER not in self.essid:
+            essid = self.essid  # Given ESSID is exact (valid UTF-8); no need to wait for a beacon
+        if self.pmkid is None or essid is None:
+            return None
+        return PmkidTracker.hash_line(self.pmkid, self.bssid, self.station, essid)
+
+    @staticmethod
+    def hash_line(pmkid, bssid, station, essid):
+        '''Formats a hashcat -m 16800 line: pmkid*bssid*station*essid (hex, no separators).'''
+        if type(essid) is str:
+            essid = essid.encode('utf-8')
+        return '*'.join([
+            pmkid.hex(),
+            bssid.lower().replace(':', ''),
+            station.lower().replace(':', ''),
+            essid.hex()
+        ])
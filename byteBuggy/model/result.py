@@ -6,13 +6,13 @@ from ..config import Configuration
 
 import os
 import time
-from json import loads, dumps
+from json import loads
 
 class CrackResult(object):
     ''' Abstract class containing results from a crack session '''
 
-    # File to save cracks to, in PWD
-    cracked_file = Configuration.cracked_file
+    # File to save cracks to, in PWD. Defaults to Configuration.cracked_file
+    cracked_file = None
 
     def __init__(self):
         self.date = int(time.time())
@@ -37,45 +37,33 @@ class CrackResult(object):
         print('%s' % self.readable_date.ljust(19))
         print('  ')
 
+    @classmethod
+    def store(cls):
+        '''Returns the ResultStore holding all crack results.'''
+        from .result_store import ResultStore
+        return ResultStore.open(CrackResult.cracked_file or Configuration.cracked_file)
+
     def save(self):
-        ''' Adds this crack result to the cracked file and saves it. '''
-        name = CrackResult.cracked_file
-        saved_results = []
-        if os.path.exists(name):
-            with open(name, 'r') as fid:
-                text = fid.read()
-            try:
-                saved_results = loads(text)
-            except Exception as e:
-                print(' error while loading %s: %s' % (name, str(e)))
-
-        # Check for duplicates
-        this_dict = self.to_dict()
-        this_dict.pop('date')
-        for entry in saved_results:
-            this_dict['date'] = entry.get('date')
-            if entry == this_dict:
-                # Skip if we already saved this BSSID+ESSID+TYPE+KEY
-                print(' %s already exists in %s, skipping.' % (
-                    self.essid, Configuration.cracked_file))
-                return
-
-        saved_results.append(self.to_dict())
-        with open(name, 'w') as fid:
-            fid.write(dumps(saved_results, indent=2))
+        '''Appends this crack result to the cracked file (unless it is already there).'''
+        store = CrackResult.store()
+        if not store.add(self.to_dict()):
+            # Skip if we already saved this BSSID+ESSID+TYPE+KEY
+            print(' %s already exists in %s, skipping.' % (
+                self.essid, store.path))
+            return
         print(' saved crack result to %s (%d total)'
-            % (name, len(saved_results)))
+            % (store.path, len(store)))
 
     @classmethod
     def display(cls):
         ''' Show cracked targets from cracked file '''
-        name = cls.cracked_file
+        store = CrackResult.store()
+        name = store.path
         if not os.path.exists(name):
             print(' file %s not found' % name)
             return
 
-        with open(name, 'r') as fid:
-            cracked_targets = loads(fid.read())
+        cracked_targets = store.all()
 
         if len(cracked_targets) == 0:
             print(' no results found in %s' % name)
@@ -109,10 +97,7 @@ class CrackResult(object):
 
     @classmethod
     def load_all(cls):
-        if not os.path.exists(cls.cracked_file): return []
-        with open(cls.cracked_file, 'r') as json_file:
-            json = loads(json_file.read())
-        return json
+        return CrackResult.store().all()
 
     @staticmethod
     def load(json):
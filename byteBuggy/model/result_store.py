@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+from json import loads, dumps
+
+
+class ResultStore(object):
+    '''
+        Append-only store of crack results: one JSON object per line (JSON Lines).
+        Keeps an in-memory index so duplicate checks and "is this file cracked"
+        lookups do not re-read the file. Lines appended by other processes are
+        picked up incrementally on the next access.
+    '''
+
+    # Results were stored as a single (indented) JSON list in this file before.
+    LEGACY_FILE = 'cracked.txt'
+
+    # Open stores, by path
+    stores = {}
+
+    def __init__(self, path):
+        self.path = path
+        self.reset()
+
+    def reset(self):
+        self.results = []      # All results (dicts), in the order they were saved
+        self.entries = set()   # Results without their date, for duplicate checks
+        self.files = set()     # Basenames of handshake/PMKID files with a result
+        self.offset = 0        # Bytes of self.path already indexed
+        self.inode = None
+
+    @classmethod
+    def open(cls, path):
+        '''Returns the (shared) store for path, migrating the legacy JSON file if needed.'''
+        store = cls.stores.get(path)
+        if store is None:
+            store = ResultStore(path)
+            store.migrate()
+            cls.stores[path] = store
+        store.refresh()
+        return store
+
+    @staticmethod
+    def entry_key(result):
+        '''Identity of a result for duplicate checks: every field except the date.'''
+        return tuple(sorted((k, str(v)) for (k, v) in result.items() if k != 'date'))
+
+    def index(self, result):
+        self.results.append(result)
+        self.entries.add(ResultStore.entry_key(result))
+        for (k, v) in result.items():
+            if 'file' in k and v:
+                self.files.add(os.path.basename(v))
+
+    def refresh(self):
+        '''Indexes lines appended since the last refresh (by this or another process).'''
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            self.reset()
+            return
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            self.reset()
+            self.inode = stat.st_ino
+        if stat.st_size == self.offset:
+            return
+
+        with open(self.path, 'rb') as fid:
+            fid.seek(self.offset)
+            data = fid.read(stat.st_size - self.offset)
+
+        # Only index complete lines; a partially-written line is read next time.
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].split(b'\n'):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                result = loads(line.decode('utf-8'))
+            except ValueError as e:
+                print(' error while loading %s: %s' % (self.path, str(e)))
+                continue
+            if type(result) is dict:
+                self.index(result)
+        self.offset += end
+
+    def migrate(self):
+        '''One-time conversion of the legacy cracked.txt (JSON list) to this store.'''
+        legacy = os.path.join(os.path.dirname(self.path), ResultStore.LEGACY_FILE)
+        if os.path.exists(self.path) or not os.path.exists(legacy) or \
+                os.path.abspath(legacy) == os.path.abspath(self.path):
+            return
+        try:
+            with open(legacy, 'r') as fid:
+                results = loads(fid.read())
+        except ValueError as e:
+            print(' error while migrating %s: %s' % (legacy, str(e)))
+            return
+        if type(results) is not list:
+            return
+
+        # Write everything to a temp file first so a crash can not leave a half-migrated store.
+        temp_path = '%s.%d.tmp' % (self.path, os.getpid())
+        seen = set()
+        with open(temp_path, 'w') as fid:
+            for result in results:
+                key = ResultStore.entry_key(result)
+                if key in seen:
+                    continue
+                seen.add(key)
+                fid.write(dumps(result) + '\n')
+        os.rename(temp_path, self.path)
+        print(' migrated %d crack results from %s to %s' % (len(seen), legacy, self.path))
+
+    def add(self, result):
+        '''
+            Appends a result (dict) unless the same result (ignoring date) is already stored.
+            Returns: True if added, False if it was a duplicate.
+        '''
+        self.refresh()
+        if ResultStore.entry_key(result) in self.entries:
+            return False
+        line = (dumps(result) + '\n').encode('utf-8')
+        # O_APPEND: concurrent writers never overwrite each other's lines.
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+        self.refresh()
+        return True
+
+    def is_cracked(self, filename):
+        '''Returns True if there is a result for the handshake/PMKID file (compared by basename).'''
+        return os.path.basename(filename) in self.files
+
+    def __len__(self):
+        return len(self.results)
+
+    def all(self):
+        return list(self.results)
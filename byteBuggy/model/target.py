@@ -1,18 +1,55 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+from .mac import Mac
+
 import re
+import sys
+
+
+# Filter broadcast/multicast BSSIDs, see https://github.com/derv82/wifite2/issues/32
+BSSID_BROADCAST_RE = re.compile(r'^(ff:ff:ff:ff:ff:ff|00:00:00:00:00:00)$', re.IGNORECASE)
+BSSID_MULTICAST_RE = re.compile(r'^(01:00:5e|01:80:c2|33:33)', re.IGNORECASE)
 
 
 class WPSState:
     NONE, UNLOCKED, LOCKED, UNKNOWN = range(0, 4)
 
 
+class Encryption:
+    '''Encryption label of a Target, stored as a small int (index into Encryption.names).'''
+    OPN, WEP, WPA = range(0, 3)
+
+    # Labels by value; labels other than these are added as they are seen.
+    names = ['OPN', 'WEP', 'WPA']
+
+    @staticmethod
+    def from_label(label):
+        '''Returns the value for an airodump 'Privacy' field (e.g. 'WPA2 WPA' is WPA).'''
+        label = label.strip()
+        if 'WPA' in label:
+            return Encryption.WPA
+        elif 'WEP' in label:
+            return Encryption.WEP
+        label = label[0:4].strip()
+        try:
+            return Encryption.names.index(label)
+        except ValueError:
+            Encryption.names.append(label)
+            return len(Encryption.names) - 1
+
+
 class Target(object):
     '''
         Holds details for a 'Target' aka Access Point (e.g. router).
+        Scans can hold thousands of these, so attributes are slots, the BSSID is
+        a packed int (its string is cached on first use) and the encryption a
+        small int (see Mac & Encryption).
     '''
 
+    __slots__ = ('mac', 'bssid_str', 'channel', 'encryption_type', 'power', 'beacons', 'ivs',
+                 'essid_known', 'essid_len', 'essid', 'wps', 'decloaked', 'clients')
+
     def __init__(self, fields):
         '''
             Initializes & stores target info based on fields.
@@ -35,16 +72,13 @@ class Target(object):
                     13 ESSID          (HOME-ABCD)
                     14 Key            ()
         '''
-        self.bssid      =     fields[0].strip()
-        self.channel    =     fields[3].strip()
+        bssid           =     fields[0].strip()
+        self.channel    =     sys.intern(fields[3].strip())
+        self.validate(bssid)
+        self.mac        =     Mac.parse(bssid)
+        self.bssid_str  =     None  # Built from self.mac on first use
 
-        self.encryption =     fields[5].strip()
-        if 'WPA' in self.encryption:
-            self.encryption = 'WPA'
-        elif 'WEP' in self.encryption:
-            self.encryption = 'WEP'
-        if len(self.encryption) > 4:
-            self.encryption = self.encryption[0:4].strip()
+        self.encryption_type = Encryption.from_label(fields[5])
 
         self.power      = int(fields[8].strip())
         if self.power < 0:
@@ -69,21 +103,26 @@ class Target(object):
 
         self.clients = []
 
-        self.validate()
-
-    def validate(self):
+    def validate(self, bssid):
         ''' Checks that the target is valid. '''
         if self.channel == '-1':
             raise Exception('Ignoring target with Negative-One (-1) channel')
 
-        # Filter broadcast/multicast BSSIDs, see https://github.com/derv82/wifite2/issues/32
-        bssid_broadcast = re.compile(r'^(ff:ff:ff:ff:ff:ff|00:00:00:00:00:00)$', re.IGNORECASE)
-        if bssid_broadcast.match(self.bssid):
-            raise Exception('Ignoring target with Broadcast BSSID (%s)' % self.bssid)
+        if BSSID_BROADCAST_RE.match(bssid):
+            raise Exception('Ignoring target with Broadcast BSSID (%s)' % bssid)
 
-        bssid_multicast = re.compile(r'^(01:00:5e|01:80:c2|33:33)', re.IGNORECASE)
-        if bssid_multicast.match(self.bssid):
-            raise Exception('Ignoring target with Multicast BSSID (%s)' % self.bssid)
+        if BSSID_MULTICAST_RE.match(bssid):
+            raise Exception('Ignoring target with Multicast BSSID (%s)' % bssid)
+
+    @property
+    def bssid(self):
+        if self.bssid_str is None:
+            self.bssid_str = Mac.to_str(self.mac)
+        return self.bssid_str
+
+    @property
+    def encryption(self):
+        return Encryption.names[self.encryption_type]
 
     def to_str(self, show_bssid=True):
         '''
@@ -145,6 +184,103 @@ class Target(object):
         return result
 
 
+class TargetIndex(object):
+    '''
+        Targets keyed by normalized (upper-case) BSSID, for constant-time lookups
+        when merging one airodump refresh into the previous one.
+    '''
+
+    def __init__(self, targets=()):
+        self.targets = {}
+        for target in targets:
+            self.targets[TargetIndex.key(target.bssid)] = target
+
+    @staticmethod
+    def key(bssid):
+        return bssid.strip().upper()
+
+    def get(self, bssid):
+        return self.targets.get(TargetIndex.key(bssid))
+
+    def __contains__(self, bssid):
+        return TargetIndex.key(bssid) in self.targets
+
+    def __len__(self):
+        return len(self.targets)
+
+    def __iter__(self):
+        return iter(self.targets.values())
+
+
+class TargetDiff(object):
+    '''
+        What changed between two airodump refreshes: BSSIDs that appeared,
+        BSSIDs that disappeared, and per-field changes (old & new value) of the rest.
+        Computed from snapshots (see TargetDiff.snapshot) since Target objects are
+        re-used & updated in place between refreshes.
+    '''
+
+    # Target attributes compared between refreshes
+    FIELDS = ('essid', 'channel', 'encryption', 'power', 'ivs', 'wps', 'decloaked', 'clients')
+
+    def __init__(self, added, removed, changed, snapshots):
+        self.added = added          # list[Target] not in the previous refresh
+        self.removed = removed      # list[str] BSSIDs no longer seen
+        self.changed = changed      # list[tuple(Target, dict of field -> tuple(old, new))]
+        self.snapshots = snapshots  # BSSID key -> snapshot of every current Target, for the next diff
+
+    @staticmethod
+    def snapshot(target):
+        '''Returns tuple of the target's FIELDS values; clients are compared by station MAC.'''
+        values = []
+        for field in TargetDiff.FIELDS:
+            if field == 'clients':
+                values.append(tuple(sorted(client.station for client in target.clients)))
+            else:
+                values.append(getattr(target, field))
+        return tuple(values)
+
+    @staticmethod
+    def between(old_snapshots, targets):
+        '''
+            Compares targets (list[Target]) against the snapshots of the previous refresh.
+            Args:
+                old_snapshots - TargetDiff.snapshots of the previous diff (dict), or {} for the first refresh.
+        '''
+        added = []
+        changed = []
+        snapshots = {}
+        for target in targets:
+            key = TargetIndex.key(target.bssid)
+            new = TargetDiff.snapshot(target)
+            snapshots[key] = new
+            old = old_snapshots.get(key)
+            if old is None:
+                added.append(target)
+            elif old != new:
+                fields = {}
+                for (field, old_value, new_value) in zip(TargetDiff.FIELDS, old, new):
+                    if old_value != new_value:
+                        fields[field] = (old_value, new_value)
+                changed.append((target, fields))
+        removed = [key for key in old_snapshots if key not in snapshots]
+        return TargetDiff(added, removed, changed, snapshots)
+
+    def __bool__(self):
+        return len(self.added) > 0 or len(self.removed) > 0 or len(self.changed) > 0
+
+    def __str__(self):
+        lines = []
+        for target in self.added:
+            lines.append('+ %s' % target.bssid)
+        for bssid in self.removed:
+            lines.append('- %s' % bssid)
+        for (target, fields) in self.changed:
+            lines.append('~ %s %s' % (target.bssid, ', '.join(
+                '%s: %s -> %s' % (field, old, new) for (field, (old, new)) in sorted(fields.items()))))
+        return '\n'.join(lines)
+
+
 if __name__ == '__main__':
     fields = 'AA:BB:CC:DD:EE:FF,2015-05-27 19:28:44,2015-05-27 19:28:46,1,54,WPA2,CCMP TKIP,PSK,-58,2,0,0.0.0.0,9,HOME-ABCD,'.split(',')
     t = Target(fields)
@@ -13,7 +13,11 @@ class Aircrack(Dependency):
     dependency_name = 'aircrack-ng'
     dependency_url = 'https://www.aircrack-ng.org/install.html'
 
-    def __init__(self, ivs_file=None):
+    def __init__(self, ivs_file=None, bssid=None):
+        '''
+            Cracks WEP from ivs_file (path or list of paths).
+            bssid selects the network when the capture has several (e.g. a shared capture).
+        '''
 
         self.cracked_file = os.path.abspath(
                 os.path.join(
@@ -28,6 +32,8 @@ class Aircrack(Dependency):
             '-a', '1',
             '-l', self.cracked_file,
         ]
+        if bssid is not None:
+            command.extend(['-b', bssid])
         if type(ivs_file) is str:
             ivs_file = [ivs_file]
 
@@ -80,9 +86,10 @@ class Aircrack(Dependency):
 
     @staticmethod
     def crack_handshake(handshake, show_command=False):
+        '''Tries to crack a handshake. Returns WPA key if found, otherwise None.'''
         from ..util.color import Color
+        from ..util.stream import LineStream, Throttle
         from ..util.timer import Timer
-        '''Tries to crack a handshake. Returns WPA key if found, otherwise None.'''
 
         key_file = Configuration.temp('wpakey.txt')
         command = [
@@ -97,29 +104,33 @@ class Aircrack(Dependency):
             print(' Running: %s' % ' '.join(command))
         crack_proc = Process(command)
 
-        # Report progress of cracking
-        aircrack_nums_re = re.compile(r'(\d+)/(\d+) keys tested.*\(([\d.]+)\s+k/s')
-        aircrack_key_re  = re.compile(r'Current passphrase:\s*([^\s].*[^\s])\s*$')
+        # Report progress of cracking. aircrack redraws its screen many times a second:
+        # lines are matched as bytes, and the status line is printed at most 4 times a second.
+        aircrack_nums_re = re.compile(rb'(\d+)/(\d+) keys tested.*\(([\d.]+)\s+k/s')
+        aircrack_key_re  = re.compile(rb'Current passphrase:\s*([^\s].*[^\s])\s*$')
         num_tried = num_total = 0
         percent = num_kps = 0.0
         eta_str = 'unknown'
         current_key = ''
-        while crack_proc.poll() is None:
-            line = crack_proc.pid.stdout.readline()
-            match_nums = aircrack_nums_re.search(line.decode('utf-8'))
-            match_keys = aircrack_key_re.search(line.decode('utf-8'))
+        throttle = Throttle(0.25)
+        for line in LineStream(crack_proc):
+            match_nums = aircrack_nums_re.search(line)
             if match_nums:
                 num_tried = int(match_nums.group(1))
                 num_total = int(match_nums.group(2))
                 num_kps = float(match_nums.group(3))
-                eta_seconds = (num_total - num_tried) / num_kps
-                eta_str = Timer.secs_to_str(eta_seconds)
-                percent = 100.0 * float(num_tried) / float(num_total)
-            elif match_keys:
-                current_key = match_keys.group(1)
+                if num_kps > 0:
+                    eta_str = Timer.secs_to_str((num_total - num_tried) / num_kps)
+                if num_total > 0:
+                    percent = 100.0 * float(num_tried) / float(num_total)
             else:
-                continue
+                match_keys = aircrack_key_re.search(line)
+                if not match_keys:
+                    continue
+                current_key = match_keys.group(1).decode('utf-8', errors='replace')
 
+            if not throttle.ready():
+                continue
             status = '\r Cracking WPA Handshake: %0.2f%%' % percent
             status += ' ETA: %s' % eta_str
             status += ' @ %0.1fkps' % num_kps
@@ -127,6 +138,7 @@ class Aircrack(Dependency):
             status += ' (current key: %s)' % current_key
             Color.clear_entire_line()
             print(status)
+        crack_proc.wait()
 
         print('')
 
@@ -4,9 +4,9 @@
 from .dependency import Dependency
 from ..config import Configuration
 from ..util.process import Process
-from ..util.timer import Timer
+from ..util.stream import LineStream
 
-import os, time, re
+import os, re
 from threading import Thread
 
 class WEPAttackType(object):
@@ -71,7 +71,6 @@ class Aireplay(Thread, Dependency):
         super(Aireplay, self).__init__() # Init the parent Thread
 
         self.target = target
-        self.output_file = Configuration.temp('aireplay_%s.output' % attack_type)
         self.attack_type = WEPAttackType(attack_type).value
         self.error = None
         self.status = None
@@ -79,10 +78,9 @@ class Aireplay(Thread, Dependency):
                                             attack_type,
                                             client_mac=client_mac,
                                             replay_file=replay_file)
-        self.pid = Process(self.cmd,
-                stdout=open(self.output_file, 'a'),
-                stderr=Process.devnull(),
-                cwd=Configuration.temp())
+        self.pid = Process(self.cmd, cwd=Configuration.temp())
+        # Output is read from the pipes by run(); only the last 64KB is kept (see get_output())
+        self.stream = LineStream(self.pid)
         self.start()
 
     def is_running(self):
@@ -94,141 +92,131 @@ class Aireplay(Thread, Dependency):
             self.pid.interrupt()
 
     def get_output(self):
-        ''' Returns stdout from aireplay process '''
-        return self.stdout
+        ''' Returns the last output (stdout & stderr) from aireplay process '''
+        return self.stream.tail()
 
     def run(self):
-        self.stdout = ''
         self.xor_percent = '0%'
-        while self.pid.poll() is None:
-            time.sleep(0.1)
-            if not os.path.exists(self.output_file): continue
-            # Read output file & clear output file
-            with open(self.output_file, 'r+') as fid:
-                lines = fid.read()
-                self.stdout += lines
-                fid.seek(0)
-                fid.truncate()
-
-            if Configuration.verbose > 1 and lines.strip() != '':
-                from ..util.color import Color
-                print('\n{P} [?] aireplay output:\n     %s' % lines.strip().replace('\n', '\n     '))
-
-            for line in lines.split('\n'):
-                line = line.replace('\r', '').strip()
-                if line == '': continue
-                if 'Notice: got a deauth/disassoc packet' in line:
-                    self.error = 'Not associated (needs fakeauth)'
-
-                if self.attack_type == WEPAttackType.fakeauth:
-                    # Look for fakeauth status. Potential Output lines:
-                    # (START): 00:54:58  Sending Authentication Request (Open System)
-                    if 'Sending Authentication Request ' in line:
-                        self.status = None # Reset
-                    # (????):  Please specify an ESSID (-e).
-                    elif 'Please specify an ESSID' in line:
-                        self.status = None
-                    # (FAIL):  00:57:43  Got a deauthentication packet! (Waiting 3 seconds)
-                    elif 'Got a deauthentication packet!' in line:
-                        self.status = False
-                    # (PASS):  20:17:25  Association successful :-) (AID: 1)
-                    # (PASS):  20:18:55  Reassociation successful :-) (AID: 1)
-                    elif 'association successful :-)' in line.lower():
-                        self.status = True
-                elif self.attack_type == WEPAttackType.chopchop:
-                    # Look for chopchop status. Potential output lines:
-
-                    # (START)  Read 178 packets...
-                    read_re = re.compile(r'Read (\d+) packets')
-                    matches = read_re.match(line)
-                    if matches:
-                        self.status = 'Waiting for packet (read %s)...' % matches.group(1)
-
-                    # Sent 1912 packets, current guess: 70...
-                    sent_re = re.compile(r'Sent (\d+) packets, current guess: (\w+)...')
-                    matches = sent_re.match(line)
-                    if matches:
-                        self.status = 'Generating .xor (%s)... current guess: %s' % (self.xor_percent, matches.group(2))
-
-                    # (DURING) Offset   52 (54% done) | xor = DE | pt = E0 |  152 frames written in  2782ms
-                    offset_re = re.compile(r'Offset.*\(\s*(\d+%) done\)')
-                    matches = offset_re.match(line)
-                    if matches:
-                        self.xor_percent = matches.group(1)
-                        self.status = 'Generating .xor (%s)...' % self.xor_percent
-
-                    # (DONE)   Saving keystream in replay_dec-0516-202246.xor
-                    saving_re = re.compile(r'Saving keystream in (.*\.xor)')
-                    matches = saving_re.match(line)
-                    if matches:
-                        self.status = matches.group(1)
-
-                    # (ERROR) fakeauth required
-                    if 'try running aireplay-ng in authenticated mode' in line:
-                        self.status = 'fakeauth is required and you are not authenticated'
-
-                elif self.attack_type == WEPAttackType.fragment:
-                    # Parse fragment output, update self.status
-
-                    # (START)  Read 178 packets...
-                    read_re = re.compile(r'Read (\d+) packets')
-                    matches = read_re.match(line)
-                    if matches:
-                        self.status = 'Waiting for packet (read %s)...' % matches.group(1)
-
-                    # 01:08:15  Waiting for a data packet...
-                    if 'Waiting for a data packet' in line:
-                        self.status = 'waiting for packet'
-
-                    # Read 207 packets...
-                    trying_re = re.compile(r'Trying to get (\d+) bytes of a keystream')
-                    matches = trying_re.match(line)
-                    if matches:
-                        self.status = 'trying to get %sb of a keystream' % matches.group(1)
-
-                    # 01:08:17  Sending fragmented packet
-                    if 'Sending fragmented packet' in line:
-                        self.status = 'sending packet'
-
-                    # 01:08:37  Still nothing, trying another packet...
-                    if 'Still nothing, trying another packet' in line:
-                        self.status = 'sending another packet'
-
-                    # XX:XX:XX  Trying to get 1500 bytes of a keystream
-                    trying_re = re.compile(r'Trying to get (\d+) bytes of a keystream')
-                    matches = trying_re.match(line)
-                    if matches:
-                        self.status = 'trying to get %sb of a keystream' % matches.group(1)
-
-                    # XX:XX:XX  Got RELAYED packet!!
-                    if 'Got RELAYED packet' in line:
-                        self.status = 'got relayed packet'
-
-                    # XX:XX:XX  That's our ARP packet!
-                    if 'Thats our ARP packet' in line:
-                        self.status = 'relayed packet was our'
-
-                    # XX:XX:XX  Saving keystream in fragment-0124-161129.xor
-                    saving_re = re.compile(r'Saving keystream in (.*\.xor)')
-                    matches = saving_re.match(line)
-                    if matches:
-                        self.status = 'saving keystream to %s' % matches.group(1)
-
-                    # XX:XX:XX  Now you can build a packet with packetforge-ng out of that 1500 bytes keystream
-
-                else: # Replay, forged replay, etc.
-                    # Parse Packets Sent & PacketsPerSecond. Possible output lines:
-                    # Read 55 packets (got 0 ARP requests and 0 ACKs), sent 0 packets...(0 pps)
-                    # Read 4467 packets (got 1425 ARP requests and 1417 ACKs), sent 1553 packets...(100 pps)
-                    read_re = re.compile(r'Read (\d+) packets \(got (\d+) ARP requests and (\d+) ACKs\), sent (\d+) packets...\((\d+) pps\)')
-                    matches = read_re.match(line)
-                    if matches:
-                        pps = matches.group(5)
-                        if pps == '0':
-                            self.status = 'Waiting for packet...'
-                        else:
-                            self.status = 'Replaying @ %s/sec' % pps
-                    pass
+        # Parses each line as soon as aireplay writes it, until aireplay exits
+        for line in self.stream:
+            line = line.decode('utf-8', errors='replace').strip()
+            if line == '': continue
+
+            if Configuration.verbose > 1:
+                print('\n [?] aireplay output: %s' % line)
+
+            if 'Notice: got a deauth/disassoc packet' in line:
+                self.error = 'Not associated (needs fakeauth)'
+
+            if self.attack_type == WEPAttackType.fakeauth:
+                # Look for fakeauth status. Potential Output lines:
+                # (START): 00:54:58  Sending Authentication Request (Open System)
+                if 'Sending Authentication Request ' in line:
+                    self.status = None # Reset
+                # (????):  Please specify an ESSID (-e).
+                elif 'Please specify an ESSID' in line:
+                    self.status = None
+                # (FAIL):  00:57:43  Got a deauthentication packet! (Waiting 3 seconds)
+                elif 'Got a deauthentication packet!' in line:
+                    self.status = False
+                # (PASS):  20:17:25  Association successful :-) (AID: 1)
+                # (PASS):  20:18:55  Reassociation successful :-) (AID: 1)
+                elif 'association successful :-)' in line.lower():
+                    self.status = True
+            elif self.attack_type == WEPAttackType.chopchop:
+                # Look for chopchop status. Potential output lines:
+
+                # (START)  Read 178 packets...
+                read_re = re.compile(r'Read (\d+) packets')
+                matches = read_re.match(line)
+                if matches:
+                    self.status = 'Waiting for packet (read %s)...' % matches.group(1)
+
+                # Sent 1912 packets, current guess: 70...
+                sent_re = re.compile(r'Sent (\d+) packets, current guess: (\w+)...')
+                matches = sent_re.match(line)
+                if matches:
+                    self.status = 'Generating .xor (%s)... current guess: %s' % (self.xor_percent, matches.group(2))
+
+                # (DURING) Offset   52 (54% done) | xor = DE | pt = E0 |  152 frames written in  2782ms
+                offset_re = re.compile(r'Offset.*\(\s*(\d+%) done\)')
+                matches = offset_re.match(line)
+                if matches:
+                    self.xor_percent = matches.group(1)
+                    self.status = 'Generating .xor (%s)...' % self.xor_percent
+
+                # (DONE)   Saving keystream in replay_dec-0516-202246.xor
+                saving_re = re.compile(r'Saving keystream in (.*\.xor)')
+                matches = saving_re.match(line)
+                if matches:
+                    self.status = matches.group(1)
+
+                # (ERROR) fakeauth required
+                if 'try running aireplay-ng in authenticated mode' in line:
+                    self.status = 'fakeauth is required and you are not authenticated'
+
+            elif self.attack_type == WEPAttackType.fragment:
+                # Parse fragment output, update self.status
+
+                # (START)  Read 178 packets...
+                read_re = re.compile(r'Read (\d+) packets')
+                matches = read_re.match(line)
+                if matches:
+                    self.status = 'Waiting for packet (read %s)...' % matches.group(1)
+
+                # 01:08:15  Waiting for a data packet...
+                if 'Waiting for a data packet' in line:
+                    self.status = 'waiting for packet'
+
+                # Read 207 packets...
+                trying_re = re.compile(r'Trying to get (\d+) bytes of a keystream')
+                matches = trying_re.match(line)
+                if matches:
+                    self.status = 'trying to get %sb of a keystream' % matches.group(1)
+
+                # 01:08:17  Sending fragmented packet
+                if 'Sending fragmented packet' in line:
+                    self.status = 'sending packet'
+
+                # 01:08:37  Still nothing, trying another packet...
+                if 'Still nothing, trying another packet' in line:
+                    self.status = 'sending another packet'
+
+                # XX:XX:XX  Trying to get 1500 bytes of a keystream
+                trying_re = re.compile(r'Trying to get (\d+) bytes of a keystream')
+                matches = trying_re.match(line)
+                if matches:
+                    self.status = 'trying to get %sb of a keystream' % matches.group(1)
+
+                # XX:XX:XX  Got RELAYED packet!!
+                if 'Got RELAYED packet' in line:
+                    self.status = 'got relayed packet'
+
+                # XX:XX:XX  That's our ARP packet!
+                if 'Thats our ARP packet' in line:
+                    self.status = 'relayed packet was our'
+
+                # XX:XX:XX  Saving keystream in fragment-0124-161129.xor
+                saving_re = re.compile(r'Saving keystream in (.*\.xor)')
+                matches = saving_re.match(line)
+                if matches:
+                    self.status = 'saving keystream to %s' % matches.group(1)
+
+                # XX:XX:XX  Now you can build a packet with packetforge-ng out of that 1500 bytes keystream
+
+            else: # Replay, forged replay, etc.
+                # Parse Packets Sent & PacketsPerSecond. Possible output lines:
+                # Read 55 packets (got 0 ARP requests and 0 ACKs), sent 0 packets...(0 pps)
+                # Read 4467 packets (got 1425 ARP requests and 1417 ACKs), sent 1553 packets...(100 pps)
+                read_re = re.compile(r'Read (\d+) packets \(got (\d+) ARP requests and (\d+) ACKs\), sent (\d+) packets...\((\d+) pps\)')
+                matches = read_re.match(line)
+                if matches:
+                    pps = matches.group(5)
+                    if pps == '0':
+                        self.status = 'Waiting for packet...'
+                    else:
+                        self.status = 'Replaying @ %s/sec' % pps
+                pass
 
     def __del__(self):
         self.stop()
@@ -402,10 +390,8 @@ class Aireplay(Thread, Dependency):
             deauth_cmd.extend(['-e', essid])
         deauth_cmd.append(Configuration.interface)
         proc = Process(deauth_cmd)
-        while proc.poll() is None:
-            if proc.running_time() >= timeout:
-                proc.interrupt()
-            time.sleep(0.2)
+        if proc.wait(timeout) is None:
+            proc.interrupt()
 
     @staticmethod
     def fakeauth(target, timeout=5, num_attempts=3):
@@ -432,10 +418,7 @@ class Aireplay(Thread, Dependency):
                 devnull=False,
                 cwd=Configuration.temp())
 
-        timer = Timer(timeout)
-        while fakeauth_proc.poll() is None and not timer.ended():
-            time.sleep(0.1)
-        if fakeauth_proc.poll() is None or timer.ended():
+        if fakeauth_proc.wait(timeout) is None:
             fakeauth_proc.interrupt()
             return False
         output = fakeauth_proc.stdout()
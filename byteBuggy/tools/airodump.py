@@ -5,11 +5,12 @@ from .dependency import Dependency
 # from .tshark import Tshark
 # from .wash import Wash
 from ..util.process import Process
+from ..util.watcher import FileWatcher
 from ..config import Configuration
-from ..model.target import Target, WPSState
+from ..model.target import Target, TargetDiff, TargetIndex, WPSState
 from ..model.client import Client
 
-import os, time
+import operator, os, time
 
 class Airodump(Dependency):
     ''' Wrapper around airodump-ng program '''
@@ -32,6 +33,12 @@ class Airodump(Dependency):
         self.interface = interface
 
         self.targets = []
+        self.target_index = TargetIndex()  # self.targets by BSSID
+        self.csv = None                    # AirodumpCsv, re-reads the CSV only when it changes
+        self.watcher = None                # FileWatcher for airodump's output files, while running
+        self.targets_filtered = None       # apply_filter used for self.targets
+        self.snapshots = {}                # TargetDiff snapshots of self.targets
+        self.subscribers = []              # Callbacks for each TargetDiff, see subscribe()
 
         if channel is None:
             channel = Configuration.target_channel
@@ -50,6 +57,8 @@ class Airodump(Dependency):
         self.decloaking = False
         self.decloaked_bssids = set()
         self.decloaked_times = {} # Map of BSSID(str) -> epoch(int) of last deauth
+        self.decloak_bssids = None # BSSID keys that may be deauthed to decloak them (None: any)
+        self.deauth_procs = []     # Running decloaking deauths, kept until they exit
 
         self.delete_existing_files = delete_existing_files
 
@@ -64,6 +73,7 @@ class Airodump(Dependency):
             self.delete_airodump_temp_files(self.output_file_prefix)
 
         self.csv_file_prefix = Configuration.temp() + self.output_file_prefix
+        self.watcher = FileWatcher(Configuration.temp(), prefix=self.output_file_prefix)
 
         # Build the command
         command = [
@@ -93,16 +103,54 @@ class Airodump(Dependency):
         Tearing things down since the context is being exited.
         Called after 'with Airodump(...)' goes out of scope.
         '''
-        # Kill the process
+        # Kill the process (and any decloaking deauths still running)
         self.pid.interrupt()
+        for proc in self.deauth_procs:
+            proc.interrupt()
+        self.deauth_procs = []
+
+        if self.watcher is not None:
+            self.watcher.close()
+            self.watcher = None
 
         if self.delete_existing_files:
             self.delete_airodump_temp_files(self.output_file_prefix)
 
 
+    def spill(self):
+        '''
+        Restarts airodump in a new temporary directory on disk if the one on tmpfs is
+        full (see Configuration.spill_temp()). Targets seen so far are kept.
+        Returns True if airodump was restarted.
+        '''
+        if not Configuration.temp_full():
+            return False
+        self.__exit__(None, None, None)
+        Configuration.spill_temp()
+        self.csv = None
+        self.__enter__()
+        return True
+
+    @property
+    def capture_extension(self):
+        '''Extension of the capture file airodump writes (besides the CSV).'''
+        return '.ivs' if self.ivs_only else '.cap'
+
     def find_files(self, endswith=None):
+        if self.watcher is not None:
+            return self.watcher.files(endswith=endswith)  # Tracked without listing the directory
         return self.find_files_by_output_prefix(self.output_file_prefix, endswith=endswith)
 
+    def wait_for_files(self, timeout, endswith=None):
+        '''
+            Sleeps until airodump creates/modifies an output file (ending with `endswith`)
+            or timeout (seconds) passes. Returns set of the changed files.
+        '''
+        if self.watcher is None:
+            time.sleep(timeout)
+            return set()
+        return self.watcher.wait(timeout, endswith=endswith)
+
     @classmethod
     def find_files_by_output_prefix(cls, output_file_prefix, endswith=None):
         ''' Finds all files in the temp directory that start with the output_file_prefix '''
@@ -138,23 +186,46 @@ class Airodump(Dependency):
             if fil.startswith('replay_') and fil.endswith('.cap') or fil.endswith('.xor'):
                 os.remove(os.path.join(temp_dir, fil))
 
+    def subscribe(self, callback):
+        '''
+            Calls callback(TargetDiff) whenever a get_targets() refresh adds, removes or
+            changes targets. Refreshes without changes are not reported.
+        '''
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
     def get_targets(self, old_targets=[], apply_filter=True):
         ''' Parses airodump's CSV file, returns list of Targets '''
+        Configuration.check_temp()
 
-        # Find the .CSV file
-        csv_filename = None
-        for fil in self.find_files(endswith='.csv'):
-            csv_filename = fil  # Found the file
-            break
+        # Find the .CSV file (once; its name does not change while airodump runs)
+        if self.csv is None or not os.path.exists(self.csv.csv_filename):
+            self.csv = None
+            for fil in self.find_files(endswith='.csv'):
+                self.csv = AirodumpCsv(fil)  # Found the file
+                break
 
-        if csv_filename is None or not os.path.exists(csv_filename):
+        if self.csv is None:
             return self.targets  # No file found
 
-        targets = Airodump.get_targets_from_csv(csv_filename)
-        for old_target in old_targets:
-            for target in targets:
-                if old_target.bssid == target.bssid:
-                    target.wps = old_target.wps
+        (targets, changed) = self.csv.load()
+        if not changed and self.targets_filtered == apply_filter:
+            # Nothing new since the last refresh
+            self.deauth_hidden_targets()
+            return self.targets
+        targets = list(targets)
+
+        if old_targets is self.targets:
+            old_index = self.target_index
+        else:
+            old_index = TargetIndex(old_targets)
+        for target in targets:
+            old_target = old_index.get(target.bssid)
+            if old_target is not None:
+                target.wps = old_target.wps
 
         # # Check targets for WPS
         # if not self.skip_wps:
@@ -170,115 +241,70 @@ class Airodump(Dependency):
             targets = Airodump.filter_targets(targets, skip_wps=self.skip_wps)
 
         # Sort by power
-        targets.sort(key=lambda x: x.power, reverse=True)
+        targets.sort(key=operator.attrgetter('power'), reverse=True)
 
         # Identify decloaked targets
-        for old_target in self.targets:
-            for new_target in targets:
-                if old_target.bssid != new_target.bssid:
-                    continue
+        for new_target in targets:
+            old_target = self.target_index.get(new_target.bssid)
+            if old_target is None:
+                continue
 
-                if new_target.essid_known and not old_target.essid_known:
-                    # We decloaked a target!
-                    new_target.decloaked = True
-                    self.decloaked_bssids.add(new_target.bssid)
+            if new_target.essid_known and not old_target.essid_known:
+                # We decloaked a target!
+                new_target.decloaked = True
+                self.decloaked_bssids.add(new_target.bssid)
 
         self.targets = targets
+        self.target_index = TargetIndex(targets)
+        self.targets_filtered = apply_filter
         self.deauth_hidden_targets()
 
+        diff = TargetDiff.between(self.snapshots, targets)
+        self.snapshots = diff.snapshots
+        if diff:
+            for callback in list(self.subscribers):
+                callback(diff)
+
         return self.targets
 
 
     @staticmethod
     def get_targets_from_csv(csv_filename):
         '''Returns list of Target objects parsed from CSV file.'''
-        targets = []
-        import csv
-        with open(csv_filename, 'r') as csvopen:
-            lines = []
-            for line in csvopen:
-                line = line.replace('\0', '')
-                lines.append(line)
-            csv_reader = csv.reader(lines,
-                    delimiter=',',
-                    quoting=csv.QUOTE_ALL,
-                    skipinitialspace=True,
-                    escapechar='\\')
-
-            hit_clients = False
-            for row in csv_reader:
-                # Each 'row' is a list of fields for a target/client
-
-                if len(row) == 0: continue
-
-                if row[0].strip() == 'BSSID':
-                    # This is the 'header' for the list of Targets
-                    hit_clients = False
-                    continue
-
-                elif row[0].strip() == 'Station MAC':
-                    # This is the 'header' for the list of Clients
-                    hit_clients = True
-                    continue
-
-                if hit_clients:
-                    # The current row corresponds to a 'Client' (computer)
-                    try:
-                        client = Client(row)
-                    except (IndexError, ValueError) as e:
-                        # Skip if we can't parse the client row
-                        continue
-
-                    if 'not associated' in client.bssid:
-                        # Ignore unassociated clients
-                        continue
-
-                    # Add this client to the appropriate Target
-                    for t in targets:
-                        if t.bssid == client.bssid:
-                            t.clients.append(client)
-                            break
-
-                else:
-                    # The current row corresponds to a 'Target' (router)
-                    try:
-                        target = Target(row)
-                        targets.append(target)
-                    except Exception:
-                        continue
-
+        (targets, changed) = AirodumpCsv(csv_filename).load()
         return targets
 
     @staticmethod
     def filter_targets(targets, skip_wps=False):
         ''' Filters targets based on Configuration '''
+        # Lower-case the filters once, not once per target
+        bssid = Configuration.target_bssid.lower() if Configuration.target_bssid else None
+        essid = Configuration.target_essid.lower() if Configuration.target_essid else None
+        ignore_essid = Configuration.ignore_essid.lower() if Configuration.ignore_essid is not None else None
+        wep = 'WEP' in Configuration.encryption_filter
+        wpa = 'WPA' in Configuration.encryption_filter
+        wps = 'WPS' in Configuration.encryption_filter
+
         result = []
-        # Filter based on Encryption
         for target in targets:
+            # Filter based on Encryption
             if Configuration.clients_only and len(target.clients) == 0:
                 continue
-            if 'WEP' in Configuration.encryption_filter and 'WEP' in target.encryption:
-                result.append(target)
-            elif 'WPA' in Configuration.encryption_filter and 'WPA' in target.encryption:
-                    result.append(target)
-            elif 'WPS' in Configuration.encryption_filter and target.wps in [WPSState.UNLOCKED, WPSState.LOCKED]:
-                result.append(target)
-            elif skip_wps:
-                result.append(target)
-
-        # Filter based on BSSID/ESSID
-        bssid = Configuration.target_bssid
-        essid = Configuration.target_essid
-        i = 0
-        while i < len(result):
-            if result[i].essid is not None and Configuration.ignore_essid is not None and Configuration.ignore_essid.lower() in result[i].essid.lower():
-                result.pop(i)
-            elif bssid and result[i].bssid.lower() != bssid.lower():
-                result.pop(i)
-            elif essid and result[i].essid and result[i].essid.lower() != essid.lower():
-                result.pop(i)
-            else:
-                i += 1
+            if not ((wep and 'WEP' in target.encryption) or
+                    (wpa and 'WPA' in target.encryption) or
+                    (wps and target.wps in [WPSState.UNLOCKED, WPSState.LOCKED]) or
+                    skip_wps):
+                continue
+
+            # Filter based on BSSID/ESSID
+            target_essid = target.essid.lower() if target.essid is not None else None
+            if target_essid is not None and ignore_essid is not None and ignore_essid in target_essid:
+                continue
+            if bssid and target.bssid.lower() != bssid:
+                continue
+            if essid and target_essid and target_essid != essid:
+                continue
+            result.append(target)
         return result
 
     def deauth_hidden_targets(self):
@@ -288,6 +314,9 @@ class Airodump(Dependency):
         '''
         self.decloaking = False
 
+        # Previous deauths exit on their own (after num_deauths packets); drop (and reap) those that did
+        self.deauth_procs = [proc for proc in self.deauth_procs if proc.poll() is None]
+
         if Configuration.no_deauth:
             return  # Do not deauth if requested
 
@@ -305,6 +334,8 @@ class Airodump(Dependency):
         for target in self.targets:
             if target.essid_known:
                 continue
+            if self.decloak_bssids is not None and TargetIndex.key(target.bssid) not in self.decloak_bssids:
+                continue  # Shared capture: only decloak targets that are being attacked
 
             now = int(time.time())
             secs_since_decloak = now - self.decloaked_times.get(target.bssid, 0)
@@ -320,13 +351,378 @@ class Airodump(Dependency):
 
             # Deauth broadcast
             iface = Configuration.interface
-            Process(deauth_cmd + ['-a', target.bssid, iface])
+            self.deauth_procs.append(Process(deauth_cmd + ['-a', target.bssid, iface], devnull=True))
 
             # Deauth clients
             for client in target.clients:
-                Process(deauth_cmd + ['-a', target.bssid, '-c', client.bssid, iface])
+                self.deauth_procs.append(
+                    Process(deauth_cmd + ['-a', target.bssid, '-c', client.station, iface], devnull=True))
+
+class AirodumpCsv(object):
+    '''
+        Loads Targets & Clients from airodump's CSV file, which airodump rewrites every second.
+        The file is only read when its inode/size/mtime changed, and only parsed when its
+        contents (CRC-32) changed. Rows that are byte-for-byte the same as in the previous
+        load re-use the Target/Client objects parsed from them.
+    '''
+
+    def __init__(self, csv_filename):
+        self.csv_filename = csv_filename
+        self.stat_key = None  # tuple(inode, size, mtime) of the last read
+        self.checksum = None  # CRC-32 of the last contents parsed
+        self.targets = []
+        self.rows = {}        # tuple(is_client, row text) -> Target/Client from the last load
+
+    def load(self):
+        '''
+            Returns tuple(list of Targets, True if they changed since the previous load).
+        '''
+        import zlib
+        try:
+            stat = os.stat(self.csv_filename)
+        except OSError:
+            return (self.targets, False)
+        stat_key = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        if stat_key == self.stat_key:
+            return (self.targets, False)
+
+        with open(self.csv_filename, 'rb') as fid:
+            data = fid.read()
+        self.stat_key = stat_key
+        checksum = zlib.crc32(data)
+        if checksum == self.checksum:
+            return (self.targets, False)  # Re-written, but with the same contents
+        self.checksum = checksum
+
+        self.targets = self.parse(data.replace(b'\0', b'').decode('utf-8', errors='replace'))
+        return (self.targets, True)
+
+    def parse(self, text):
+        '''Parses the CSV contents row by row, returns list of Targets.'''
+        import csv
+        from io import StringIO
+        targets = []
+        clients = {}  # BSSID (packed int) -> list of Clients associated with it
+        rows = {}
+
+        hit_clients = False
+        for line in StringIO(text, newline=None):
+            # Each line is a target/client
+            key = (hit_clients, line)
+            parsed = self.rows.get(key)
+            if parsed is None and key not in self.rows:
+                row = next(csv.reader([line],
+                        delimiter=',',
+                        quoting=csv.QUOTE_ALL,
+                        skipinitialspace=True,
+                        escapechar='\\'), [])
+
+                if len(row) == 0: continue
+
+                if row[0].strip() == 'BSSID':
+                    # This is the 'header' for the list of Targets
+                    hit_clients = False
+                    continue
+
+                elif row[0].strip() == 'Station MAC':
+                    # This is the 'header' for the list of Clients
+                    hit_clients = True
+                    continue
+
+                if hit_clients:
+                    # The current row corresponds to a 'Client' (computer)
+                    try:
+                        parsed = Client(row)
+                    except (IndexError, ValueError) as e:
+                        # Skip if we can't parse the client row
+                        parsed = None
+                else:
+                    # The current row corresponds to a 'Target' (router)
+                    try:
+                        parsed = Target(row)
+                    except Exception:
+                        parsed = None
+            elif parsed is not None and not hit_clients:
+                # Same row as last time; re-use the Target, but not last time's state
+                parsed.clients = []
+                parsed.decloaked = False
+
+            rows[key] = parsed  # Also remember rows that could not be parsed
+            if parsed is None:
+                continue
+
+            if hit_clients:
+                if parsed.bssid_mac is None:
+                    # Ignore unassociated clients
+                    continue
+                # Bucket the client by the BSSID it is associated with
+                clients.setdefault(parsed.bssid_mac, []).append(parsed)
+            else:
+                targets.append(parsed)
+
+        # Add clients to the appropriate Target
+        for target in targets:
+            target.clients = clients.pop(target.mac, [])
+            for client in target.clients:
+                client.bssid_mac = target.mac  # Share one int instead of an equal copy
+
+        self.rows = rows
+        return targets
+
+
+class CaptureSession(object):
+    '''
+        One long-lived airodump per interface & channel, shared by the attacks against
+        every target on that channel (see AttackAll). Attacks get a CaptureView of their
+        target instead of starting (and waiting on) an airodump of their own, so moving
+        on to the next target on the same channel needs no process restart. Attacks
+        that need other airodump options (e.g. WEP's ivs_only) still get their own.
+    '''
+
+    # Set while attacks should use views of the shared session (see Attack.capture())
+    shared = False
+
+    # The running session. One at a time: the interface can only listen on one channel.
+    active = None
+
+    output_file_prefix = 'capture'
+
+    # Airodump options the session is started with. Attacks that need other values get an
+    # Airodump of their own (see serves()); output_file_prefix only names the files.
+    options = {'ivs_only': False, 'skip_wps': True, 'delete_existing_files': True}
+
+    def __init__(self, interface, channel):
+        self.interface = interface
+        self.channel = str(channel)
+        self.airodump = Airodump(interface=interface,
+                                 channel=self.channel,
+                                 output_file_prefix=CaptureSession.output_file_prefix,
+                                 **CaptureSession.options)
+        # Only decloak targets that are being attacked, not every hidden AP on the channel
+        self.airodump.decloak_bssids = set()
+        self.started = False
+
+    @classmethod
+    def acquire(cls, channel, interface=None):
+        '''Returns the running session for the channel, (re)starting airodump if needed.'''
+        if interface is None:
+            interface = Configuration.interface
+        session = cls.active
+        if session is not None and session.interface == interface and \
+                session.channel == str(channel) and session.is_running():
+            return session
+        cls.stop()
+        session = CaptureSession(interface, channel)
+        session.start()
+        cls.active = session
+        return session
+
+    @classmethod
+    def stop(cls):
+        '''Stops the running session (if any), e.g. before another tool needs the interface.'''
+        if cls.active is not None:
+            cls.active.close()
+            cls.active = None
+
+    @classmethod
+    def serves(cls, **kwargs):
+        '''True if a view of the session can stand in for Airodump(**kwargs), e.g. not for ivs_only.'''
+        for (name, value) in kwargs.items():
+            if name == 'output_file_prefix':
+                continue
+            if name not in cls.options or cls.options[name] != value:
+                return False
+        return True
+
+    @staticmethod
+    def view(channel, bssid):
+        '''Returns CaptureView of a target; the session is acquired when the view is entered.'''
+        return CaptureView(channel, bssid)
+
+    def start(self):
+        self.airodump.__enter__()
+        self.started = True
+
+    def close(self):
+        if self.started:
+            self.airodump.__exit__(None, None, None)
+            self.started = False
+
+    def is_running(self):
+        return self.started and self.airodump.pid.poll() is None
+
+    def refresh(self):
+        '''Re-reads airodump's CSV (if it changed), returns TargetIndex of every target on the channel.'''
+        self.airodump.get_targets(old_targets=self.airodump.targets, apply_filter=False)
+        return self.airodump.target_index
+
+
+class CaptureView(object):
+    '''
+        One target's view of a CaptureSession. Used by attacks in place of an Airodump
+        started with target_bssid: get_targets(), target_index and subscribe() only see
+        the target's CSV row; the capture file is the session's (HandshakeTracker,
+        aircrack --bssid, etc. pick the target's packets out of it).
+    '''
+
+    def __init__(self, channel, bssid, session=None):
+        self.channel = str(channel)
+        self.bssid = bssid
+        self.key = TargetIndex.key(bssid)
+        self.session = session
+        self.targets = []
+        self.target_index = TargetIndex()
+        self.subscribers = {}  # callback -> wrapper subscribed to the session's Airodump
+
+    def __enter__(self):
+        if self.session is None or not self.session.is_running():
+            self.session = CaptureSession.acquire(self.channel)
+        if self.session.airodump.decloak_bssids is not None:
+            self.session.airodump.decloak_bssids.add(self.key)
+        return self
+
+    def __exit__(self, type, value, traceback):
+        # The session keeps running for the next target
+        for callback in list(self.subscribers):
+            self.unsubscribe(callback)
+        if self.session.airodump.decloak_bssids is not None:
+            self.session.airodump.decloak_bssids.discard(self.key)
+
+    @property
+    def pid(self):
+        return self.session.airodump.pid
+
+    @property
+    def capture_extension(self):
+        return self.session.airodump.capture_extension
+
+    def find_files(self, endswith=None):
+        return self.session.airodump.find_files(endswith=endswith)
+
+    def wait_for_files(self, timeout, endswith=None):
+        return self.session.airodump.wait_for_files(timeout, endswith=endswith)
+
+    def get_targets(self, old_targets=[], apply_filter=True):
+        '''Returns list containing the target, if airodump has seen it. The view is never filtered further.'''
+        target = self.session.refresh().get(self.key)
+        self.targets = [target] if target is not None else []
+        self.target_index = TargetIndex(self.targets)
+        return self.targets
+
+    def filter_diff(self, diff):
+        '''Returns the part of a session TargetDiff about this view's target (empty TargetDiff if none).'''
+        added = [target for target in diff.added if TargetIndex.key(target.bssid) == self.key]
+        removed = [bssid for bssid in diff.removed if TargetIndex.key(bssid) == self.key]
+        changed = [(target, fields) for (target, fields) in diff.changed
+                   if TargetIndex.key(target.bssid) == self.key]
+        snapshots = {}
+        if self.key in diff.snapshots:
+            snapshots[self.key] = diff.snapshots[self.key]
+        return TargetDiff(added, removed, changed, snapshots)
+
+    def subscribe(self, callback):
+        '''Calls callback(TargetDiff) when the target appears, disappears or changes.'''
+        def on_session_diff(diff):
+            diff = self.filter_diff(diff)
+            if diff:
+                callback(diff)
+        self.subscribers[callback] = on_session_diff
+        self.session.airodump.subscribe(on_session_diff)
+
+    def unsubscribe(self, callback):
+        wrapper = self.subscribers.pop(callback, None)
+        if wrapper is not None:
+            self.session.airodump.unsubscribe(wrapper)
+
 
 if __name__ == '__main__':
+    import sys
+    if sys.argv[1:] == ['benchmark']:
+        # python -m byteBuggy.tools.airodump benchmark
+        # Parses & merges a synthetic airodump CSV of 5,000 APs and 20,000 clients.
+        import random, tempfile
+        rnd = random.Random(1)
+        def random_mac(first_byte):
+            return ':'.join(['%02X' % first_byte] + ['%02X' % rnd.randrange(256) for i in range(5)])
+        bssids = [random_mac(0x02) for i in range(5000)]
+        (fd, csv_filename) = tempfile.mkstemp(suffix='.csv')
+        with open(fd, 'w') as fid:
+            fid.write('\r\nBSSID, First time seen, Last time seen, channel, Speed, Privacy, Cipher, ' +
+                      'Authentication, Power, # beacons, # IV, LAN IP, ID-length, ESSID, Key\r\n')
+            for (index, bssid) in enumerate(bssids):
+                essid = 'Network-%d' % index if index % 10 else ''  # Every 10th AP is hidden
+                fid.write('%s, 2015-05-30 11:28:44, 2015-05-30 11:28:50, %2d,  54, WPA2, CCMP,PSK, %d, %8d, ' % (
+                    bssid, 1 + index % 11, -40 - index % 50, index) +
+                    '       0,   0.  0.  0.  0, %3d, %s, \r\n' % (len(essid), essid))
+            fid.write('\r\nStation MAC, First time seen, Last time seen, Power, # packets, BSSID, Probed ESSIDs\r\n')
+            for index in range(20000):
+                bssid = bssids[rnd.randrange(len(bssids))] if index % 5 else '(not associated) '
+                fid.write('%s, 2015-05-30 11:28:44, 2015-05-30 11:28:48, -52,        4, %s,\r\n' % (
+                    random_mac(0x06), bssid))
+
+        start = time.time()
+        targets = Airodump.get_targets_from_csv(csv_filename)
+        parse_time = time.time() - start
+
+        # Memory held by the parsed Targets & Clients (not the parser's row cache)
+        import gc, tracemalloc
+        gc.collect()
+        tracemalloc.start()
+        models = Airodump.get_targets_from_csv(csv_filename)
+        gc.collect()
+        model_memory = tracemalloc.get_traced_memory()[0]
+        for target in models:
+            # Including the cached MAC strings
+            target.bssid
+            for client in target.clients:
+                client.station
+        strings_memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        num_clients = sum([len(target.clients) for target in models])
+        del models
+
+        old_targets = Airodump.get_targets_from_csv(csv_filename)
+        start = time.time()
+        old_index = TargetIndex(old_targets)
+        for target in targets:
+            old_target = old_index.get(target.bssid)
+            if old_target is not None:
+                target.wps = old_target.wps
+                target.decloaked = target.essid_known and not old_target.essid_known
+        merge_time = time.time() - start
+
+        # Filter & sort, as done on every refresh
+        Configuration.target_bssid = Configuration.target_essid = None
+        Configuration.ignore_essid = 'network-1'
+        Configuration.clients_only = False
+        Configuration.encryption_filter = ['WEP', 'WPA', 'WPS']
+        start = time.time()
+        filtered = Airodump.filter_targets(targets)
+        filtered.sort(key=operator.attrgetter('power'), reverse=True)
+        filter_time = time.time() - start
+
+        # Change-aware reloads: untouched file, then one AP's row updated
+        csv = AirodumpCsv(csv_filename)
+        csv.load()
+        start = time.time()
+        csv.load()
+        unchanged_time = time.time() - start
+        with open(csv_filename, 'r') as fid:
+            data = fid.read()
+        with open(csv_filename, 'w') as fid:
+            fid.write(data.replace('Network-1,', 'Network-X,', 1))
+        start = time.time()
+        csv.load()
+        changed_time = time.time() - start
+        os.remove(csv_filename)
+
+        print('%d targets, %d clients: parse %0.3fs, merge %0.3fs, filter & sort %0.4fs' % (
+            len(targets), sum([len(target.clients) for target in targets]), parse_time, merge_time, filter_time))
+        print('reload: unchanged %0.4fs, one row changed %0.3fs' % (unchanged_time, changed_time))
+        print('memory: %d bytes per target (incl. its clients), %0.1f MB total; %d bytes with MAC strings' % (
+            model_memory / len(targets), model_memory / 1048576.0, strings_memory / len(targets)))
+        sys.exit(0)
+
     ''' Example usage. wlan0mon should be in Monitor Mode '''
     with Airodump() as airodump:
 
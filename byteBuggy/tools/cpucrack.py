@@ -0,0 +1,304 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from ..config import Configuration
+
+import hashlib
+import hmac
+import os
+import time
+
+
+class HandshakeHash(object):
+    '''
+        Everything needed to test a PMK against one 4-way handshake (M2 MIC), picklable for worker processes.
+    '''
+
+    def __init__(self, essid, ap, station, anonce, snonce, eapol, mic, key_version):
+        self.essid = essid              # ESSID (bytes), the PBKDF2 salt
+        self.ap = ap                    # Authenticator MAC (6 bytes)
+        self.station = station          # Supplicant MAC (6 bytes)
+        self.anonce = anonce            # ANonce (32 bytes)
+        self.snonce = snonce            # SNonce (32 bytes)
+        self.eapol = eapol              # M2 EAPOL frame with the MIC zeroed (bytes)
+        self.mic = mic                  # MIC of M2 (16 bytes)
+        self.key_version = key_version  # 1 = HMAC-MD5 (WPA), 2 = HMAC-SHA1 (WPA2)
+
+        self.ptk_data = b'Pairwise key expansion\x00' + \
+                min(ap, station) + max(ap, station) + \
+                min(anonce, snonce) + max(anonce, snonce) + b'\x00'
+
+    @staticmethod
+    def from_handshake(handshake):
+        '''Builds a HandshakeHash from a Handshake, or raises ValueError if it cannot be cracked in-process.'''
+        from ..model.handshake import Handshake
+        best = handshake.best_message_pair()
+        if best is None:
+            raise ValueError('No crackable handshake in %s' % handshake.capfile)
+        (message_pair, m2, anonce) = best
+
+        key_version = m2.key_info & 0x7
+        if key_version not in (1, 2):
+            raise ValueError('Key descriptor version %d (802.11w / AES-CMAC) is not supported' % key_version)
+
+        return HandshakeHash(essid=handshake.hash_essid(),
+                             ap=bytes.fromhex(m2.ap.replace(':', '')),
+                             station=bytes.fromhex(m2.station.replace(':', '')),
+                             anonce=anonce,
+                             snonce=m2.nonce,
+                             eapol=Handshake.zero_mic(m2.eapol),
+                             mic=m2.mic,
+                             key_version=key_version)
+
+    def verify(self, pmk):
+        '''Returns True if the PMK produces the handshake's MIC.'''
+        # Only the KCK (first 16 bytes of the PTK) is needed, which is the first PRF block.
+        kck = hmac.new(pmk, self.ptk_data, hashlib.sha1).digest()[:16]
+        if self.key_version == 1:
+            mic = hmac.new(kck, self.eapol, hashlib.md5).digest()
+        else:
+            mic = hmac.new(kck, self.eapol, hashlib.sha1).digest()[:16]
+        return hmac.compare_digest(mic, self.mic)
+
+
+class PmkidHash(object):
+    '''
+        Everything needed to test a PMK against one PMKID, picklable for worker processes.
+    '''
+
+    def __init__(self, essid, ap, station, pmkid):
+        self.essid = essid      # ESSID (bytes), the PBKDF2 salt
+        self.ap = ap            # Authenticator MAC (6 bytes)
+        self.station = station  # Supplicant MAC (6 bytes)
+        self.pmkid = pmkid      # PMKID (16 bytes)
+
+        self.data = b'PMK Name' + ap + station
+
+    @staticmethod
+    def from_line(line):
+        '''Parses a hashcat -m 16800 line (pmkid*bssid*station*essid), or raises ValueError.'''
+        fields = line.strip().split('*')
+        if len(fields) < 4:
+            raise ValueError('Invalid PMKID hash: %s' % line.strip())
+        (pmkid, ap, station, essid) = [bytes.fromhex(field) for field in fields[:4]]
+        return PmkidHash(essid=essid, ap=ap, station=station, pmkid=pmkid)
+
+    @staticmethod
+    def from_file(pmkid_file):
+        with open(pmkid_file, 'r') as fid:
+            return PmkidHash.from_line(fid.readline())
+
+    def verify(self, pmk):
+        '''Returns True if the PMK produces the PMKID.'''
+        pmkid = hmac.new(pmk, self.data, hashlib.sha1).digest()[:16]
+        return hmac.compare_digest(pmkid, self.pmkid)
+
+
+class PmkOnly(object):
+    '''Target that never matches; used to only compute (and store) PMKs for an ESSID.'''
+
+    def __init__(self, essid):
+        self.essid = essid
+
+    def verify(self, pmk):
+        return False
+
+
+# Hash being cracked by the current worker process, see CpuCrack._init_worker.
+_worker_hash = None
+
+
+class CpuCrack(object):
+    '''
+        Built-in WPA cracker for machines without a usable GPU.
+        Candidate passphrases are split into chunks; a pool of worker processes
+        (one per core) derives each PMK with PBKDF2-HMAC-SHA1 and checks it against
+        the handshake MIC or PMKID in-process.
+    '''
+
+    # Passphrases sent to a worker at a time. Small enough to report progress often.
+    CHUNK_SIZE = 64
+
+    @staticmethod
+    def pmk(passphrase, essid):
+        '''Derives the WPA PMK (32 bytes) for a passphrase & ESSID (bytes).'''
+        return hashlib.pbkdf2_hmac('sha1', passphrase, essid, 4096, 32)
+
+    @staticmethod
+    def passphrases(wordlist):
+        '''Yields candidate passphrases (bytes) from a wordlist, skipping words WPA does not allow.'''
+        with open(wordlist, 'rb') as fid:
+            for line in fid:
+                word = line.rstrip(b'\r\n')
+                if 8 <= len(word) <= 63:
+                    yield word
+
+    @staticmethod
+    def chunks(passphrases, size):
+        chunk = []
+        for passphrase in passphrases:
+            chunk.append(passphrase)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+        if len(chunk) > 0:
+            yield chunk
+
+    @staticmethod
+    def _init_worker(target):
+        global _worker_hash
+        _worker_hash = target
+
+    @staticmethod
+    def _crack_chunk(chunk):
+        '''
+            Runs in a worker process.
+            Returns tuple(key or None, list of PMKs computed up to & including the key).
+        '''
+        pmks = []
+        for passphrase in chunk:
+            pmk = CpuCrack.pmk(passphrase, _worker_hash.essid)
+            pmks.append(pmk)
+            if _worker_hash.verify(pmk):
+                return (passphrase, pmks)
+        return (None, pmks)
+
+    @staticmethod
+    def crack(target, wordlist, processes=None, progress=None, pmk_db=None):
+        '''
+            Tries every passphrase in the wordlist against a HandshakeHash or PmkidHash.
+            Args:
+                target    - HandshakeHash or PmkidHash.
+                wordlist  - Path to the wordlist.
+                processes - Number of worker processes (defaults to the number of cores).
+                progress  - Optional callback(num_tried, keys_per_second), called after each chunk.
+                pmk_db    - Optional PmkDatabase for target.essid & this wordlist. Stored PMKs are
+                            checked first; PMKs computed for the remaining words are appended to it.
+            Returns:
+                Key (str) if found; `None` if not found.
+        '''
+        from multiprocessing import Pool
+        from itertools import islice
+
+        if processes is None:
+            processes = os.cpu_count() or 1
+
+        num_tried = 0
+        start_time = time.time()
+
+        if pmk_db is not None:
+            index = pmk_db.lookup(target)
+            num_tried = len(pmk_db)
+            if index is not None:
+                passphrase = next(islice(CpuCrack.passphrases(wordlist), index, None), None)
+                # Guard against a store that does not match the wordlist
+                if passphrase is not None and target.verify(CpuCrack.pmk(passphrase, target.essid)):
+                    return passphrase.decode('utf-8', errors='replace')
+            if progress is not None and num_tried > 0:
+                progress(num_tried, num_tried / max(time.time() - start_time, 0.001))
+
+        passphrases = islice(CpuCrack.passphrases(wordlist), num_tried, None)
+        chunks = CpuCrack.chunks(passphrases, CpuCrack.CHUNK_SIZE)
+        key = None
+
+        pool = Pool(processes, initializer=CpuCrack._init_worker, initargs=(target,))
+        try:
+            # Results arrive in wordlist order, so PMKs can be appended to the store as they come in.
+            for (found, pmks) in pool.imap(CpuCrack._crack_chunk, chunks):
+                num_tried += len(pmks)
+                if pmk_db is not None:
+                    pmk_db.append(pmks)
+                if progress is not None:
+                    progress(num_tried, num_tried / max(time.time() - start_time, 0.001))
+                if found is not None:
+                    key = found.decode('utf-8', errors='replace')
+                    break
+        finally:
+            pool.terminate()
+            pool.join()
+
+        return key
+
+    @staticmethod
+    def crack_handshake(handshake, show_command=False):
+        '''Tries to crack a handshake. Returns WPA key if found, otherwise None.'''
+        try:
+            target = HandshakeHash.from_handshake(handshake)
+        except ValueError as e:
+            print(' Error: %s' % e)
+            return None
+        return CpuCrack.crack_with_status(target, 'WPA Handshake', show_command)
+
+    @staticmethod
+    def crack_pmkid(pmkid_file, verbose=False):
+        '''Tries to crack a PMKID hash file (*.16800). Returns key if found, otherwise None.'''
+        try:
+            target = PmkidHash.from_file(pmkid_file)
+        except ValueError as e:
+            print(' Error: %s' % e)
+            return None
+        return CpuCrack.crack_with_status(target, 'PMKID', verbose)
+
+    @staticmethod
+    def crack_with_status(target, name, show_command=False):
+        '''
+            Runs crack() on Configuration.wordlist, showing the number of keys tested & keys/sec on one line.
+            PMKs already precomputed for the ESSID & wordlist are re-used; new PMKs are only stored
+            with --pmk-store (a store takes 32 bytes per word, on disk).
+        '''
+        from ..util.stream import Throttle
+        import sys
+        processes = os.cpu_count() or 1
+        if show_command:
+            print(' Running: built-in CPU cracker (%d processes) with %s' % (processes, Configuration.wordlist))
+
+        throttle = Throttle(0.25)
+        def progress(num_tried, keys_per_second):
+            if throttle.ready():
+                sys.stdout.write('\r Cracking %s: %d keys tested @ %0.1f keys/s ' % (name, num_tried, keys_per_second))
+                sys.stdout.flush()
+
+        from ..util.pmkdb import PmkDatabase
+        pmk_db = PmkDatabase.open(Configuration.wpa_pmk_dir, target.essid, Configuration.wordlist,
+                                  create=Configuration.wpa_pmk_store)
+        try:
+            if pmk_db is not None and len(pmk_db) > 0:
+                print(' Checking %d precomputed PMKs from %s' % (len(pmk_db), pmk_db.path))
+            key = CpuCrack.crack(target, Configuration.wordlist, processes=processes,
+                                 progress=progress, pmk_db=pmk_db)
+        finally:
+            if pmk_db is not None:
+                pmk_db.close()
+        print('')
+        return key
+
+if __name__ == '__main__':
+    # Benchmark: keys/sec of the built-in cracker vs aircrack-ng on the same handshake & wordlist.
+    from ..model.handshake import Handshake
+    from ..util.process import Process
+    import re
+
+    capfile = 'tests/files/handshake_has_1234.cap'
+    wordlist = 'wordlist-top4800-probable.txt'
+    handshake = Handshake(capfile, bssid='18:D6:C7:6D:6B:18')
+    target = HandshakeHash.from_handshake(handshake)
+
+    start_time = time.time()
+    tried = [0]
+    def progress(num_tried, keys_per_second):
+        tried[0] = num_tried
+    key = CpuCrack.crack(target, wordlist, progress=progress)
+    elapsed = time.time() - start_time
+    print('built-in: %d keys in %0.2fs (%0.1f keys/sec, %d processes), key: %s' % (
+        tried[0], elapsed, tried[0] / elapsed, os.cpu_count() or 1, key))
+
+    if Process.exists('aircrack-ng'):
+        command = ['aircrack-ng', '-a', '2', '-w', wordlist, '--bssid', handshake.bssid, capfile]
+        start_time = time.time()
+        stdout = Process(command).stdout()
+        elapsed = time.time() - start_time
+        match = re.findall(r'(\d+)/(\d+) keys tested', stdout)
+        num_tried = int(match[-1][0]) if match else 0
+        print('aircrack-ng: %d keys in %0.2fs (%0.1f keys/sec)' % (num_tried, elapsed, num_tried / elapsed))
+    else:
+        print('aircrack-ng: not installed')
@@ -16,18 +16,14 @@ class Dependency(object):
 
     @classmethod
     def exists(cls):
-        from ..util.process import Process
-        return Process.exists(cls.dependency_name)
+        from .registry import ToolRegistry
+        return ToolRegistry.exists(cls.dependency_name)
 
 
     @classmethod
-    def run_dependency_check(cls):
-
-
-        from .airmon import Airmon
-        from .airodump import Airodump
+    def dependency_apps(cls):
+        '''Returns list of the Dependency classes checked at startup (importing only their modules).'''
         from .aircrack import Aircrack
-        from .aireplay import Aireplay
         from .ifconfig import Ifconfig
         from .iwconfig import Iwconfig
         # from .bully import Bully
@@ -38,9 +34,9 @@ class Dependency(object):
         from .macchanger import Macchanger
         from .hashcat import Hashcat, HcxDumpTool, HcxPcapTool
 
-        apps = [
+        return [
                 # Aircrack
-                Aircrack, #Airodump, Airmon, Aireplay,
+                Aircrack,
                 # wireless/net tools
                 Iwconfig, Ifconfig,
                 # WPS
@@ -53,6 +49,11 @@ class Dependency(object):
                 Macchanger
             ]
 
+
+    @classmethod
+    def run_dependency_check(cls):
+        apps = cls.dependency_apps()
+
         missing_required = any([app.fails_dependency_check() for app in apps])
 
         if missing_required:
@@ -60,13 +61,16 @@ class Dependency(object):
             import sys
             sys.exit(-1)
 
+        # Versions & capabilities (e.g. hashcat's devices) are ready by the time attacks need them
+        from .registry import ToolRegistry
+        ToolRegistry.probe_in_background()
+
 
     @classmethod
     def fails_dependency_check(cls):
-        from ..util.color import Color
-        from ..util.process import Process
+        from .registry import ToolRegistry
 
-        if Process.exists(cls.dependency_name):
+        if ToolRegistry.exists(cls.dependency_name):
             return False
 
         if cls.dependency_required:
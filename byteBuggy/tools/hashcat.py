@@ -14,85 +14,289 @@ class Hashcat(Dependency):
     dependency_name = 'hashcat'
     dependency_url = 'https://hashcat.net/hashcat/'
 
+    STATUS_TIMER = 2  # Seconds between status updates
+
     @staticmethod
     def should_use_force():
-        command = ['hashcat', '-I']
-        stderr = Process(command).stderr()
-        return 'No devices found/left' in stderr
+        '''True if hashcat found no devices (`hashcat -I`, probed once & cached by ToolRegistry).'''
+        from .registry import ToolRegistry
+        return ToolRegistry.capability('hashcat', 'use_force', False)
+
+    @staticmethod
+    def crack_handshake(handshake, show_command=False, progress=None):
+        '''
+            Cracks a handshake with hashcat -m 22000.
+            Args:
+                progress - Optional callback(HashcatStatus), called with each status update.
+            Returns:
+                Key (str) if found; `None` if not found.
+        '''
+        hash_line = handshake.hashcat_hash()
+        if hash_line is None:
+            return None
+        keys = Hashcat.crack_hashes([hash_line], show_command=show_command, progress=progress)
+        return keys.get(hash_line.split('*')[2].lower())
+
 
     @staticmethod
-    def crack_handshake(handshake, show_command=False):
-        # Generate hccapx
-        hccapx_file = HcxPcapTool.generate_hccapx_file(
-                handshake, show_command=show_command)
-
-        key = None
-        # Crack hccapx
-        for additional_arg in ([], ['--show']):
+    def generate_hash_file(handshakes, hash_file=None):
+        '''
+            Writes the hashcat mode 22000 hash (WPA*02*...) of every handshake to one file.
+            Args:
+                handshakes - list of Handshake objects.
+                hash_file  - Output file. Defaults to a new, unique file in the temp directory.
+            Returns:
+                Path to the hash file.
+        '''
+        if hash_file is None:
+            hash_file = Hashcat.unique_temp_file('.22000')
+
+        lines = []
+        for handshake in handshakes:
+            line = handshake.hashcat_hash()
+            if line is None:
+                raise ValueError('No crackable handshake in %s' % handshake.capfile)
+            lines.append(line)
+
+        with open(hash_file, 'w') as fid:
+            fid.write('\n'.join(lines) + '\n')
+
+        return hash_file
+
+
+    @staticmethod
+    def pmkid_hash_line(pmkid_hash):
+        '''Converts a -m 16800 PMKID hash (pmkid*bssid*station*essid) to a -m 22000 line (WPA*01*...).'''
+        fields = pmkid_hash.strip().split('*')
+        if len(fields) < 4:
+            raise ValueError('Invalid PMKID hash: %s' % pmkid_hash.strip())
+        return 'WPA*01*%s*%s*%s*%s***' % tuple(fields[:4])
+
+
+    @staticmethod
+    def crack_hashes(hash_lines, show_command=False, progress=None):
+        '''
+            Cracks many -m 22000 hashes (handshakes & PMKIDs) with a single hashcat session.
+            Args:
+                hash_lines - list of hash lines (WPA*01*... or WPA*02*...)
+                progress   - Optional callback(HashcatStatus), called with each status update.
+            Returns:
+                dict of MIC/PMKID (lowercase hex, field 3 of the hash line) -> key, for every cracked hash.
+        '''
+        hash_file = Hashcat.unique_temp_file('.22000')
+        with open(hash_file, 'w') as fid:
+            fid.write('\n'.join(hash_lines) + '\n')
+
+        try:
+            # Run once over the wordlist (reporting status), then --show to list
+            # everything cracked, including hashes that were already in the pot file.
             command = [
                 'hashcat',
-                '--quiet',
-                '-m', '2500',
-                hccapx_file,
+                '-m', '22000',  # WPA-PBKDF2-PMKID+EAPOL
+                '-a', '0',      # Wordlist attack-mode
+                '--status',
+                '--status-json',
+                '--status-timer', str(Hashcat.STATUS_TIMER),
+                hash_file,
                 Configuration.wordlist
             ]
             if Hashcat.should_use_force():
                 command.append('--force')
-            command.extend(additional_arg)
             if show_command:
                 print(' Running: %s' % ' '.join(command))
-            process = Process(command)
-            stdout, stderr = process.get_output()
-            if ':' not in stdout:
+            Hashcat.run_with_status(command, progress=progress)
+
+            command = ['hashcat', '--quiet', '-m', '22000', '--show', hash_file]
+            if Hashcat.should_use_force():
+                command.append('--force')
+            stdout, stderr = Process(command).get_output()
+
+            keys = Hashcat.parse_cracked(stdout, hash_lines)
+        finally:
+            if os.path.exists(hash_file):
+                os.remove(hash_file)
+
+        return keys
+
+
+    @staticmethod
+    def run_with_status(command, progress=None):
+        '''
+            Runs hashcat (with --status-json) until it exits, reading its output without blocking.
+            Every JSON status line is parsed into a HashcatStatus and passed to progress().
+            Returns:
+                tuple(last HashcatStatus or None, list of other stdout lines)
+        '''
+        from ..util.stream import LineStream
+        proc = Process(command)
+        status = None
+        lines = []
+        try:
+            # stderr is drained into the stream's ring buffer so hashcat never blocks on it
+            for line in LineStream(proc):
+                line = line.decode('utf-8', errors='replace').strip()
+                new_status = HashcatStatus.from_json(line)
+                if new_status is None:
+                    lines.append(line)
+                    continue
+                status = new_status
+                if progress is not None:
+                    progress(status)
+            proc.wait()
+        finally:
+            if proc.poll() is None:
+                proc.interrupt()
+        return (status, lines)
+
+
+    @staticmethod
+    def parse_cracked(stdout, hash_lines):
+        '''
+            Parses the output of `hashcat -m 22000 --show` for the given hash lines.
+            Returns: dict of MIC/PMKID (lowercase hex) -> key.
+        '''
+        # The ESSID may contain ':' itself, so strip the ESSID we know for each hash.
+        essids = {}
+        for hash_line in hash_lines:
+            fields = hash_line.split('*')
+            essids[fields[2].lower()] = bytes.fromhex(fields[5])
+
+        keys = {}
+        # Output looks like: mic_or_pmkid:mac_ap:mac_sta:essid:key
+        for line in stdout.split('\n'):
+            fields = line.rstrip('\r\n').split(':', 3)
+            if len(fields) < 4 or fields[0].lower() not in essids:
                 continue
+            essid = essids[fields[0].lower()]
+            try:
+                essid_text = essid.decode('utf-8')
+            except UnicodeDecodeError:
+                essid_text = '$HEX[%s]' % essid.hex()
+            if fields[3].startswith(essid_text + ':'):
+                keys[fields[0].lower()] = fields[3][len(essid_text) + 1:]
             else:
-                key = stdout.split(':', 5)[-1].strip()
-                break
+                keys[fields[0].lower()] = fields[3].split(':', 1)[-1]
+        return keys
 
-        if os.path.exists(hccapx_file):
-            os.remove(hccapx_file)
 
-        return key
+    @staticmethod
+    def unique_temp_file(suffix):
+        '''Creates an empty file with a unique name in the temp directory, so concurrent jobs do not collide.'''
+        from tempfile import mkstemp
+        (fd, filename) = mkstemp(prefix='hashcat-', suffix=suffix, dir=Configuration.temp())
+        os.close(fd)
+        return filename
 
 
     @staticmethod
-    def crack_pmkid(pmkid_file, verbose=False):
+    def crack_pmkid(pmkid_file, verbose=False, progress=None):
         '''
-        Cracks a given pmkid_file using the PMKID/WPA2 attack (-m 16800)
+        Cracks a given pmkid_file (*.16800) with hashcat -m 22000.
+        Args:
+            progress - Optional callback(HashcatStatus), called with each status update.
         Returns:
             Key (str) if found; `None` if not found.
         '''
+        with open(pmkid_file, 'r') as fid:
+            hash_line = Hashcat.pmkid_hash_line(fid.readline())
+        keys = Hashcat.crack_hashes([hash_line], show_command=verbose, progress=progress)
+        return keys.get(hash_line.split('*')[2].lower())
+
+
+class HashcatStatus(object):
+    '''
+        One status update from `hashcat --status --status-json`.
+        hashcat prints a JSON object per line, e.g.
+            { "session": "hashcat", "status": 3, "progress": [2048, 4800], "rejected": 0,
+              "recovered_hashes": [0, 1], "devices": [ { "device_id": 1, "speed": 1873, ... } ],
+              "time_start": 1697000000, "estimated_stop": 1697000003, ... }
+    '''
+
+    STATUS_NAMES = {
+        0: 'Initializing',
+        1: 'Autotuning',
+        2: 'Selftest',
+        3: 'Running',
+        4: 'Paused',
+        5: 'Exhausted',
+        6: 'Cracked',
+        7: 'Aborted',
+        8: 'Quit',
+        9: 'Bypass',
+        10: 'Aborted (Checkpoint)',
+        11: 'Aborted (Runtime)',
+        12: 'Running (Checkpoint Quit requested)',
+        13: 'Error',
+        14: 'Aborted (Finish)',
+        15: 'Running (Quit after attack requested)',
+        16: 'Autodetect'
+    }
+
+    def __init__(self, json):
+        self.json = json
+        self.status = json.get('status')
+        self.status_name = HashcatStatus.STATUS_NAMES.get(self.status, 'Unknown')
+        (self.progress, self.progress_total) = (json.get('progress') or [0, 0])[:2]
+        (self.recovered, self.recovered_total) = (json.get('recovered_hashes') or [0, 0])[:2]
+        self.rejected = json.get('rejected', 0)
+        self.time_start = json.get('time_start')
+        self.estimated_stop = json.get('estimated_stop')
+        # list[tuple(device id, device name, hashes/sec)]
+        self.devices = [(device.get('device_id'), device.get('device_name'), device.get('speed', 0))
+                        for device in json.get('devices', [])]
 
-        # Run hashcat once normally, then with --show if it failed
-        # To catch cases where the password is already in the pot file.
-        for additional_arg in ([], ['--show']):
-            command = [
-                'hashcat',
-                '--quiet',      # Only output the password if found.
-                '-m', '16800',  # WPA-PMKID-PBKDF2
-                '-a', '0',      # Wordlist attack-mode
-                pmkid_file,
-                Configuration.wordlist
-            ]
-            if Hashcat.should_use_force():
-                command.append('--force')
-            command.extend(additional_arg)
-            if verbose and additional_arg == []:
-                print(' Running: %s' % ' '.join(command))
+    @staticmethod
+    def from_json(line):
+        '''Parses one line of hashcat output. Returns HashcatStatus, or None if it is not a status line.'''
+        from json import loads
+        line = line.strip()
+        if not line.startswith('{'):
+            return None
+        try:
+            json = loads(line)
+        except ValueError:
+            return None
+        if type(json) is not dict or 'status' not in json or 'progress' not in json:
+            return None
+        return HashcatStatus(json)
 
-            # TODO: Check status of hashcat (%); it's impossible with --quiet
+    def speed(self):
+        '''Total hashes/sec over all devices.'''
+        return sum([speed for (device_id, name, speed) in self.devices])
 
-            hashcat_proc = Process(command)
-            hashcat_proc.wait()
-            stdout = hashcat_proc.stdout()
+    def percent(self):
+        if not self.progress_total:
+            return 0.0
+        return 100.0 * self.progress / self.progress_total
 
-            if ':' not in stdout:
-                # Failed
-                continue
-            else:
-                # Cracked
-                key = stdout.strip().split(':', 1)[1]
-                return key
+    def eta(self, now=None):
+        '''Seconds until hashcat expects to finish, or None if unknown.'''
+        import time
+        if self.estimated_stop is None:
+            return None
+        if now is None:
+            now = time.time()
+        return max(0, self.estimated_stop - now)
+
+    def finished(self):
+        return self.status not in (0, 1, 2, 3, 4, 12, 15, 16)
+
+    def __str__(self):
+        from ..util.timer import Timer
+        eta = self.eta()
+        status = '%s %0.2f%%' % (self.status_name, self.percent())
+        status += ' ETA: %s' % (Timer.secs_to_str(eta) if eta is not None else 'unknown')
+        status += ' @ %s' % HashcatStatus.format_speed(self.speed())
+        if self.rejected:
+            status += ' (rejected: %d)' % self.rejected
+        return status
+
+    @staticmethod
+    def format_speed(speed):
+        for (unit, size) in (('MH/s', 1e6), ('kH/s', 1e3)):
+            if speed >= size:
+                return '%0.1f%s' % (speed / size, unit)
+        return '%dH/s' % speed
 
 
 class HcxDumpTool(Dependency):
@@ -132,31 +336,30 @@ class HcxPcapTool(Dependency):
     dependency_name = 'hcxpcaptool'
     dependency_url = 'https://github.com/ZerBea/hcxtools'
 
-    def __init__(self, target):
-        self.target = target
-        self.bssid = self.target.bssid.lower().replace(':', '')
-        self.pmkid_file = Configuration.temp('pmkid-%s.16800' % self.bssid)
-
     @staticmethod
-    def generate_hccapx_file(handshake, show_command=False):
-        hccapx_file = Configuration.temp('generated.hccapx')
-        if os.path.exists(hccapx_file):
-            os.remove(hccapx_file)
-
-        command = [
-            'hcxpcaptool',
-            '-o', hccapx_file,
-            handshake.capfile
-        ]
+    def generate_hccapx_file(handshakes, show_command=False, hccapx_file=None):
+        '''
+            Writes a legacy .hccapx record for each handshake to one file (in-process, without hcxpcaptool).
+            Args:
+                handshakes  - Handshake or list of Handshake objects.
+                hccapx_file - Output file. Defaults to a new, unique file in the temp directory.
+            Returns:
+                Path to the .hccapx file.
+        '''
+        if type(handshakes) is not list:
+            handshakes = [handshakes]
+        if hccapx_file is None:
+            hccapx_file = Hashcat.unique_temp_file('.hccapx')
 
         if show_command:
-            print(' Running: %s' % ' '.join(command))
+            print(' Writing %d handshake(s) to %s' % (len(handshakes), hccapx_file))
 
-        process = Process(command)
-        stdout, stderr = process.get_output()
-        if not os.path.exists(hccapx_file):
-            raise ValueError('Failed to generate .hccapx file, output: \n%s\n%s' % (
-                stdout, stderr))
+        with open(hccapx_file, 'wb') as fid:
+            for handshake in handshakes:
+                record = handshake.hccapx()
+                if record is None:
+                    raise ValueError('Failed to generate .hccapx record for %s' % handshake.capfile)
+                fid.write(record)
 
         return hccapx_file
 
@@ -182,36 +385,3 @@ class HcxPcapTool(Dependency):
                 stdout, stderr))
 
         return john_file
-
-    def get_pmkid_hash(self, pcapng_file):
-        if os.path.exists(self.pmkid_file):
-            os.remove(self.pmkid_file)
-
-        command = [
-            'hcxpcaptool',
-            '-z', self.pmkid_file,
-            pcapng_file
-        ]
-        hcxpcap_proc = Process(command)
-        hcxpcap_proc.wait()
-
-        if not os.path.exists(self.pmkid_file):
-            return None
-
-        with open(self.pmkid_file, 'r') as f:
-            output = f.read()
-            # Each line looks like:
-            # hash*bssid*station*essid
-
-        # Note: The dumptool will record *anything* it finds, ignoring the filterlist.
-        # Check that we got the right target (filter by BSSID)
-        matching_pmkid_hash = None
-        for line in output.split('\n'):
-            fields = line.split('*')
-            if len(fields) >= 3 and fields[1].lower() == self.bssid:
-                # Found it
-                matching_pmkid_hash = line
-                break
-
-        os.remove(self.pmkid_file)
-        return matching_pmkid_hash
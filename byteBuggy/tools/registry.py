@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import re
+import threading
+
+
+class ToolRegistry(object):
+    '''
+        Where the external tools are & what they can do.
+
+        Binaries are found with shutil.which (in-process, no `which` subprocess) once per run.
+        Versions & capabilities are probed by running each tool once, all tools in parallel,
+        and cached on disk keyed by the binary's path & mtime: warm starts run no probes,
+        and upgrading a tool invalidates its entry.
+    '''
+
+    # Tool -> list of (capability, command arguments, function(output) -> value).
+    # Output is the tool's stdout & stderr, combined.
+    PROBES = {
+        'aircrack-ng': [
+            ('version', ['--help'], lambda output: ToolRegistry.parse_version(output)),
+        ],
+        'hashcat': [
+            ('version', ['--version'], lambda output: ToolRegistry.parse_version(output)),
+            # No OpenCL/CUDA device: hashcat only runs with --force
+            ('use_force', ['-I'], lambda output: 'No devices found/left' in output),
+        ],
+        'hcxdumptool': [
+            ('version', ['--version'], lambda output: ToolRegistry.parse_version(output)),
+        ],
+        'hcxpcaptool': [
+            ('version', ['-v'], lambda output: ToolRegistry.parse_version(output)),
+        ],
+        'reaver': [
+            ('version', ['-h'], lambda output: ToolRegistry.parse_version(output)),
+            ('pixie_dust', ['-h'], lambda output: '--pixie-dust' in output),
+        ],
+    }
+
+    # Seconds a probe may run before it is killed (and its capabilities are unknown)
+    PROBE_TIMEOUT = 10
+
+    # JSON cache of probe results. None: $XDG_CACHE_HOME/byteBuggy/tools.json
+    cache_file = None
+
+    paths = {}        # Tool name -> path (None if not installed), for this run
+    cache = None      # Binary path -> {'mtime': int, 'info': dict of capability -> value}
+    partial = {}      # Tool name -> capabilities, for this run only: a probe timed out or failed to run
+    probe_thread = None
+    lock = threading.Lock()
+
+    @classmethod
+    def which(cls, name):
+        '''Returns the path of the tool's binary, or None if it is not installed.'''
+        if name not in cls.paths:
+            import shutil
+            cls.paths[name] = shutil.which(name)
+        return cls.paths[name]
+
+    @classmethod
+    def exists(cls, name):
+        return cls.which(name) is not None
+
+    @staticmethod
+    def parse_version(output):
+        '''Returns the first version number (e.g. '6.2.6') in a tool's output, or None.'''
+        match = re.search(r'\b[vV]?(\d+\.\d+(?:\.\d+)*)', output)
+        return match.group(1) if match is not None else None
+
+    @classmethod
+    def get_cache_file(cls):
+        if cls.cache_file is None:
+            cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+            cls.cache_file = os.path.join(cache_home, 'byteBuggy', 'tools.json')
+        return cls.cache_file
+
+    @classmethod
+    def load_cache(cls):
+        if cls.cache is None:
+            try:
+                with open(cls.get_cache_file(), 'r') as fid:
+                    cls.cache = json.load(fid)
+            except (OSError, ValueError):
+                cls.cache = {}
+            if type(cls.cache) is not dict:
+                cls.cache = {}
+        return cls.cache
+
+    @classmethod
+    def save_cache(cls):
+        cache_file = cls.get_cache_file()
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            temp_file = '%s.%d' % (cache_file, os.getpid())
+            with open(temp_file, 'w') as fid:
+                json.dump(cls.cache, fid, indent=1, sort_keys=True)
+            os.replace(temp_file, cache_file)  # Other runs never read a half-written file
+        except OSError:
+            pass  # Read-only home, etc: probe again next time
+
+    @staticmethod
+    def mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    @classmethod
+    def cached_info(cls, name):
+        '''Returns dict of the tool's probed capabilities from the cache, or None if it must be probed.'''
+        path = cls.which(name)
+        if path is None:
+            return {}
+        if name in cls.partial:
+            return cls.partial[name]
+        entry = cls.load_cache().get(path)
+        if type(entry) is not dict or entry.get('mtime') != cls.mtime(path):
+            return None
+        return entry.get('info', {})
+
+    @classmethod
+    def run_probe(cls, path, args):
+        '''Runs the tool, returns its output (str), or None if it could not run or timed out.'''
+        from ..util.process import Process
+        from ..util.stream import LineStream
+        import time
+        try:
+            proc = Process([path] + args)
+        except OSError:
+            return None
+        stream = LineStream(proc)
+        end_time = time.time() + cls.PROBE_TIMEOUT
+        for line in stream.lines(timeout=1):
+            if time.time() > end_time:
+                proc.interrupt()
+                return None
+        proc.wait(cls.PROBE_TIMEOUT)
+        return stream.tail()
+
+    @classmethod
+    def probe_tool(cls, name):
+        '''
+            Runs the tool's probes (sharing the output of identical commands).
+            Returns tuple(dict of capabilities, True if every probe ran).
+        '''
+        path = cls.which(name)
+        info = {}
+        outputs = {}
+        for (capability, args, parse) in cls.PROBES.get(name, []):
+            key = tuple(args)
+            if key not in outputs:
+                outputs[key] = cls.run_probe(path, args)
+            if outputs[key] is not None:
+                info[capability] = parse(outputs[key])
+        return (info, None not in outputs.values())
+
+    @classmethod
+    def probe(cls, names=None):
+        '''
+            Probes every installed tool (of names, default all PROBES) missing from the cache,
+            all in parallel. Blocks until done, returns dict of tool name -> capabilities.
+        '''
+        from concurrent.futures import ThreadPoolExecutor
+        names = list(cls.PROBES) if names is None else names
+        with cls.lock:
+            results = {}
+            stale = []
+            for name in names:
+                info = cls.cached_info(name)
+                if info is None:
+                    stale.append(name)
+                else:
+                    results[name] = info
+            if len(stale) == 0:
+                return results  # Warm start: nothing to run
+
+            with ThreadPoolExecutor(max_workers=len(stale)) as executor:
+                probed = dict(zip(stale, executor.map(cls.probe_tool, stale)))
+            for (name, (info, complete)) in probed.items():
+                results[name] = info
+                if not complete:
+                    # E.g. hashcat -I timed out initializing OpenCL: probe again next run, not never
+                    cls.partial[name] = info
+                    continue
+                path = cls.which(name)
+                cls.cache[path] = {'mtime': cls.mtime(path), 'info': info}
+            cls.save_cache()
+            return results
+
+    @classmethod
+    def probe_in_background(cls):
+        '''Starts probe() in a thread (e.g. at startup); capability() waits for it.'''
+        if cls.probe_thread is None:
+            cls.probe_thread = threading.Thread(target=cls.probe, daemon=True)
+            cls.probe_thread.start()
+
+    @classmethod
+    def capability(cls, name, capability, default=None):
+        '''Returns a probed capability of a tool (e.g. ('hashcat', 'use_force')), or default if unknown.'''
+        info = cls.cached_info(name)
+        if info is None:
+            if cls.probe_thread is not None:
+                cls.probe_thread.join()
+            info = cls.probe([name]).get(name, {})
+        return info.get(capability, default)
+
+    @classmethod
+    def version(cls, name):
+        return cls.capability(name, 'version')
+
+
+if __name__ == '__main__':
+    # python -m byteBuggy.tools.registry
+    import time
+    for name in sorted(ToolRegistry.PROBES):
+        print('%-12s %s' % (name, ToolRegistry.which(name)))
+    start = time.time()
+    results = ToolRegistry.probe()
+    print('Probed in %0.3fs (cache: %s)' % (time.time() - start, ToolRegistry.get_cache_file()))
+    for name in sorted(results):
+        print('%-12s %s' % (name, results[name]))
@@ -4,6 +4,7 @@
 from .dependency import Dependency
 from ..model.target import WPSState
 from ..util.process import Process
+from ..util.pcap import PcapFile, Dot11
 import json
 
 class Wash(Dependency):
@@ -18,8 +19,53 @@ class Wash(Dependency):
 
     @staticmethod
     def check_for_wps_and_update_targets(capfile, targets):
+        '''
+            Finds which BSSIDs in the cap file advertise WPS (from beacons & probe responses),
+            then updates the 'wps' field of those BSSIDs in the targets.
+            Reads the capture in-process; only runs wash if the capture cannot be parsed.
+        '''
+        try:
+            (wps_bssids, locked_bssids) = Wash.wps_bssids_from_capfile(capfile)
+        except (ValueError, OSError):
+            (wps_bssids, locked_bssids) = Wash.wps_bssids_from_wash(capfile)
+            if wps_bssids is None:
+                return
+
+        # Update targets
+        for t in targets:
+            target_bssid = t.bssid.upper()
+            if target_bssid in wps_bssids:
+                t.wps = WPSState.UNLOCKED
+            elif target_bssid in locked_bssids:
+                t.wps = WPSState.LOCKED
+            else:
+                t.wps = WPSState.NONE
+
+
+    @staticmethod
+    def wps_bssids_from_capfile(capfile):
+        '''Returns tuple(set of unlocked WPS BSSIDs, set of locked WPS BSSIDs) found in capfile.'''
+        wps_bssids = set()
+        locked_bssids = set()
+        with PcapFile(capfile) as pcap:
+            for frame in pcap.frames():
+                locked = Dot11.wps_locked(frame)
+                if locked is None:
+                    continue
+                bssid = Dot11.mac_to_str(frame[16:22])
+                if locked:
+                    locked_bssids.add(bssid)
+                    wps_bssids.discard(bssid)
+                elif bssid not in locked_bssids:
+                    wps_bssids.add(bssid)
+        return (wps_bssids, locked_bssids)
+
+
+    @staticmethod
+    def wps_bssids_from_wash(capfile):
+        '''Same as wps_bssids_from_capfile(), using the wash program. Returns (None, None) on failure.'''
         if not Wash.exists():
-            return
+            return (None, None)
 
         command = [
             'wash',
@@ -33,7 +79,7 @@ class Wash(Dependency):
             lines = p.stdout()
         except:
             # Failure is acceptable
-            return
+            return (None, None)
 
         # Find all BSSIDs
         wps_bssids = set()
@@ -41,7 +87,7 @@ class Wash(Dependency):
         for line in lines.split('\n'):
             try:
                 obj = json.loads(line)
-                bssid = obj['bssid']
+                bssid = obj['bssid'].upper()
                 locked = obj['wps_locked']
                 if locked != True:
                     wps_bssids.add(bssid)
@@ -49,16 +95,7 @@ class Wash(Dependency):
                     locked_bssids.add(bssid)
             except:
                 pass
-
-        # Update targets
-        for t in targets:
-            target_bssid = t.bssid.upper()
-            if target_bssid in wps_bssids:
-                t.wps = WPSState.UNLOCKED
-            elif target_bssid in locked_bssids:
-                t.wps = WPSState.LOCKED
-            else:
-                t.wps = WPSState.NONE
+        return (wps_bssids, locked_bssids)
 
 
 if __name__ == '__main__':
@@ -74,9 +74,10 @@ class Color(object):
 
     @staticmethod
     def clear_entire_line():
-        import os
-        (rows, columns) = os.popen('stty size', 'r').read().split()
-        print('\r' + (' ' * int(columns)) + '\r')
+        from .terminal import Terminal
+        if not Terminal.is_tty():
+            return  # Plain (append-only) output, nothing to clear
+        print('\r' + (' ' * Terminal.get_width()) + '\r')
 
 
     @staticmethod
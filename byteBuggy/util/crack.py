@@ -5,16 +5,16 @@ from ..config import Configuration
 from ..model.handshake import Handshake
 from ..model.wpa_result import CrackResultWPA
 from ..model.pmkid_result import CrackResultPMKID
-from ..util.process import Process
+from ..model.result import CrackResult
 # from ..util.color import Color
 from ..tools.aircrack import Aircrack
 # from ..tools.cowpatty import Cowpatty
-from ..tools.hashcat import Hashcat, HcxPcapTool
+from ..tools.hashcat import Hashcat
+from ..tools.cpucrack import CpuCrack
 # from ..tools.john import John
 
-from json import loads
-
 import os
+import sys
 
 
 # TODO: Bring back the 'print' option, for easy copy/pasting. Just one-liners people can paste into terminal.
@@ -54,17 +54,15 @@ class CrackHelper:
         # Tools for cracking & their dependencies.
         available_tools = {
             'aircrack': [Aircrack],
-            'hashcat':  [Hashcat, HcxPcapTool],
+            'hashcat':  [Hashcat],
+            'cpu':      [],  # Built-in, no external tools needed
             # 'john':     [John, HcxPcapTool],
             # 'cowpatty': [Cowpatty]
         }
         # Identify missing tools
         missing_tools = []
-        for tool, dependencies in available_tools.items():
-            missing = [
-                dep for dep in dependencies
-                if not Process.exists(dep.dependency_name)
-            ]
+        for tool, dependencies in list(available_tools.items()):
+            missing = [dep for dep in dependencies if not dep.exists()]
             if len(missing) > 0:
                 available_tools.pop(tool)
                 missing_tools.append( (tool, missing) )
@@ -75,9 +73,9 @@ class CrackHelper:
                 dep_list = ', '.join([dep.dependency_name for dep in deps])
                 print('     * %s (%s)' % (tool, dep_list))
 
-        if all_pmkid:
-            print(' Note: PMKID hashes can only be cracked using hashcat')
-            tool_name = 'hashcat'
+        if all_pmkid and 'hashcat' not in available_tools:
+            print(' Note: hashcat is missing, cracking PMKID hashes with the built-in CPU cracker')
+            tool_name = 'cpu'
         else:
             print('\n Enter the cracking tool to use (%s): ' % (
                 ', '.join(available_tools.keys())))
@@ -87,34 +85,23 @@ class CrackHelper:
                 tool_name = 'aircrack'
 
         try:
-            for hs in hs_to_crack:
-                if tool_name != 'hashcat' and hs['type'] == 'PMKID':
-                    if 'hashcat' in missing_tools:
-                        print(' Hashcat is missing, therefore we cannot crack PMKID hash')
-                cls.crack(hs, tool_name)
+            if tool_name == 'hashcat' and len(hs_to_crack) > 1:
+                cls.crack_batch(hs_to_crack)
+            else:
+                for hs in hs_to_crack:
+                    cls.crack(hs, tool_name)
         except KeyboardInterrupt:
             print('\n Interrupted')
 
     @classmethod
     def is_cracked(cls, file):
-        if not os.path.exists(Configuration.cracked_file):
-            return False
-        with open(Configuration.cracked_file) as f:
-            json = loads(f.read())
-        if json is None:
-            return False
-        for result in json:
-            for k in result.keys():
-                v = result[k]
-                if 'file' in k and os.path.basename(v) == file:
-                    return True
-        return False
+        return CrackResult.store().is_cracked(file)
 
     @classmethod
     def get_handshakes(cls):
         handshakes = []
 
-        skipped_pmkid_files = skipped_cracked_files = 0
+        skipped_cracked_files = 0
 
         hs_dir = Configuration.wpa_handshake_dir
         if not os.path.exists(hs_dir) or not os.path.isdir(hs_dir):
@@ -135,9 +122,6 @@ class CrackHelper:
                 hs_type = '4-WAY'
             elif hs_file.endswith('.16800'):
                 # PMKID hash
-                if not Process.exists('hashcat'):
-                    skipped_pmkid_files += 1
-                    continue
                 hs_type = 'PMKID'
             else:
                 continue
@@ -167,8 +151,6 @@ class CrackHelper:
 
             handshakes.append(handshake)
 
-        if skipped_pmkid_files > 0:
-            print(' Skipping %d *.16800 files because hashcat is missing.\n' % skipped_pmkid_files)
         if skipped_cracked_files > 0:
             print(' Skipping %d already cracked files.\n' % skipped_cracked_files)
 
@@ -234,6 +216,11 @@ class CrackHelper:
         else:
             raise ValueError('Cannot crack handshake: Type is not PMKID or 4-WAY. Handshake=%s' % hs)
 
+        cls.report(hs, crack_result)
+
+
+    @classmethod
+    def report(cls, hs, crack_result):
         if crack_result is None:
             # Failed to crack
             print(' Failed to crack %s (%s): Passphrase not in dictionary' % (
@@ -245,6 +232,62 @@ class CrackHelper:
             crack_result.save()
 
 
+    @staticmethod
+    def print_hashcat_status(status):
+        '''Prints a HashcatStatus on the current line, including the speed of each device.'''
+        from ..tools.hashcat import HashcatStatus
+        line = '\r Cracking: %s' % status
+        if len(status.devices) > 1:
+            line += ' [%s]' % ', '.join(['#%s %s' % (device_id, HashcatStatus.format_speed(speed))
+                                         for (device_id, name, speed) in status.devices])
+        sys.stdout.write(line + ' ')
+        sys.stdout.flush()
+
+
+    @classmethod
+    def crack_batch(cls, hs_to_crack):
+        '''
+            Cracks all selected handshakes & PMKIDs with a single hashcat session (-m 22000),
+            then maps each recovered key back to the file it came from.
+        '''
+        hash_lines = []
+        sources = []  # tuple(MIC or PMKID of the hash line, handshake dict)
+        for hs in hs_to_crack:
+            try:
+                if hs['type'] == 'PMKID':
+                    with open(hs['filename'], 'r') as fid:
+                        hash_line = Hashcat.pmkid_hash_line(fid.readline())
+                else:
+                    handshake = Handshake(hs['filename'], bssid=hs['bssid'], essid=hs['essid'])
+                    handshake.divine_bssid_and_essid()
+                    hash_line = handshake.hashcat_hash()
+                    if hash_line is None:
+                        raise ValueError('No crackable handshake in %s' % hs['filename'])
+            except (ValueError, OSError) as e:
+                print(' Skipping %s: %s' % (hs['filename'], e))
+                continue
+            hash_lines.append(hash_line)
+            sources.append((hash_line.split('*')[2].lower(), hs))
+
+        if len(hash_lines) == 0:
+            return
+
+        print('\n Cracking %d hashes in one hashcat session' % len(hash_lines))
+        keys = Hashcat.crack_hashes(hash_lines, show_command=True, progress=cls.print_hashcat_status)
+        print('')
+
+        for (hash_id, hs) in sources:
+            print('\n %s %s (%s)' % (cls.TYPES[hs['type']], hs['essid'], hs['bssid']))
+            key = keys.get(hash_id)
+            if key is None:
+                crack_result = None
+            elif hs['type'] == 'PMKID':
+                crack_result = CrackResultPMKID(hs['bssid'], hs['essid'], hs['filename'], key)
+            else:
+                crack_result = CrackResultWPA(hs['bssid'], hs['essid'], hs['filename'], key)
+            cls.report(hs, crack_result)
+
+
     @classmethod
     def crack_4way(cls, hs, tool):
 
@@ -260,7 +303,10 @@ class CrackHelper:
         if tool == 'aircrack':
             key = Aircrack.crack_handshake(handshake, show_command=True)
         elif tool == 'hashcat':
-            key = Hashcat.crack_handshake(handshake, show_command=True)
+            key = Hashcat.crack_handshake(handshake, show_command=True, progress=cls.print_hashcat_status)
+            print('')
+        elif tool == 'cpu':
+            key = CpuCrack.crack_handshake(handshake, show_command=True)
         # elif tool == 'john':
         #     key = John.crack_handshake(handshake, show_command=True)
         # elif tool == 'cowpatty':
@@ -274,10 +320,15 @@ class CrackHelper:
 
     @classmethod
     def crack_pmkid(cls, hs, tool):
-        if tool != 'hashcat':
-            print(' Note: PMKID hashes can only be cracked using hashcat')
-
-        key = Hashcat.crack_pmkid(hs['filename'], verbose=True)
+        if tool == 'cpu' or not Hashcat.exists():
+            if tool != 'cpu':
+                print(' Note: hashcat is missing, cracking PMKID hashes with the built-in CPU cracker')
+            key = CpuCrack.crack_pmkid(hs['filename'], verbose=True)
+        else:
+            if tool != 'hashcat':
+                print(' Note: PMKID hashes can only be cracked using hashcat or cpu')
+            key = Hashcat.crack_pmkid(hs['filename'], verbose=True, progress=cls.print_hashcat_status)
+            print('')
 
         if key is not None:
             return CrackResultPMKID(hs['bssid'], hs['essid'], hs['filename'], key)
@@ -0,0 +1,403 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import mmap
+import os
+import struct
+from array import array
+
+
+# File magic numbers
+PCAP_MAGIC_LE    = b'\xd4\xc3\xb2\xa1'
+PCAP_MAGIC_BE    = b'\xa1\xb2\xc3\xd4'
+PCAP_MAGIC_NS_LE = b'\x4d\x3c\xb2\xa1'
+PCAP_MAGIC_NS_BE = b'\xa1\xb2\x3c\x4d'
+PCAPNG_SHB       = b'\x0a\x0d\x0d\x0a'
+PCAPNG_BYTE_ORDER_LE = b'\x4d\x3c\x2b\x1a'
+
+# Link-layer header types we can decode
+LINKTYPE_IEEE802_11          = 105
+LINKTYPE_PRISM_HEADER        = 119
+LINKTYPE_IEEE802_11_RADIOTAP = 127
+LINKTYPE_IEEE802_11_AVS      = 163
+LINKTYPE_PPI                 = 192
+
+
+class CaptureFormat(object):
+    '''
+        Parses the record layout of pcap & pcapng data held in any buffer (bytes, mmap, ...).
+        Keeps the state that carries over between records (byte order, interface linktypes),
+        so parsing can stop at any record boundary and resume later.
+    '''
+
+    def __init__(self):
+        self.is_pcapng = None  # Unknown until the file header has been read
+        self.endian = '<'
+        self.linktype = None   # pcap: linktype of every packet
+        self.linktypes = []    # pcapng: interface ID -> linktype, for the current section
+
+    def read_header(self, buf, name='capture'):
+        '''
+            Identifies the file format from the start of the file.
+            Returns: Offset of the first record, or None if the header is not complete yet.
+        '''
+        magic = bytes(buf[:4])
+        if magic == PCAPNG_SHB:
+            self.is_pcapng = True
+            return 0
+
+        if magic in (PCAP_MAGIC_LE, PCAP_MAGIC_NS_LE):
+            endian = '<'
+        elif magic in (PCAP_MAGIC_BE, PCAP_MAGIC_NS_BE):
+            endian = '>'
+        elif len(buf) < 4:
+            return None
+        else:
+            raise ValueError('%s is not a pcap or pcapng file' % name)
+
+        if len(buf) < 24:
+            return None
+        self.is_pcapng = False
+        self.endian = endian
+        self.linktype = struct.unpack_from(endian + 'I', buf, 20)[0] & 0x0FFFFFFF
+        return 24
+
+    def records(self, buf, offset, end=None, name='capture'):
+        '''
+            Walks complete records in buf[offset:end].
+            Yields tuple(next_offset, linktype, data_offset, data_length) for every packet,
+            where next_offset is the offset just past the record. Non-packet pcapng blocks
+            are consumed without being yielded; a truncated record at the end stops iteration.
+        '''
+        if end is None:
+            end = len(buf)
+        if self.is_pcapng:
+            return self._pcapng_records(buf, offset, end, name)
+        return self._pcap_records(buf, offset, end)
+
+    def _pcap_records(self, buf, offset, end):
+        header = struct.Struct(self.endian + 'I')
+        linktype = self.linktype
+        while offset + 16 <= end:
+            incl_len = header.unpack_from(buf, offset + 8)[0]
+            next_offset = offset + 16 + incl_len
+            if next_offset > end:
+                return  # Partially-written record
+            yield (next_offset, linktype, offset + 16, incl_len)
+            offset = next_offset
+
+    def _pcapng_records(self, buf, offset, end, name):
+        while offset + 12 <= end:
+            endian = self.endian
+            if bytes(buf[offset:offset + 4]) == PCAPNG_SHB:
+                # Section Header Block: determines byte order of this section
+                endian = '<' if bytes(buf[offset + 8:offset + 12]) == PCAPNG_BYTE_ORDER_LE else '>'
+            block_type, block_len = struct.unpack_from(endian + 'II', buf, offset)
+            if block_len < 12:
+                raise ValueError('%s contains a corrupt pcapng block' % name)
+            next_offset = offset + block_len
+            if next_offset > end:
+                return  # Partially-written block
+
+            body = offset + 8
+            record = None
+            if block_type == 0x0A0D0D0A:
+                self.endian = endian
+                self.linktypes = []
+            elif block_type == 1:
+                # Interface Description Block
+                self.linktypes.append(struct.unpack_from(endian + 'H', buf, body)[0])
+            elif block_type in (2, 6):
+                # (Obsolete) Packet Block & Enhanced Packet Block
+                if block_type == 6:
+                    interface = struct.unpack_from(endian + 'I', buf, body)[0]
+                else:
+                    interface = struct.unpack_from(endian + 'H', buf, body)[0]
+                cap_len = struct.unpack_from(endian + 'I', buf, body + 12)[0]
+                if interface < len(self.linktypes):
+                    record = (next_offset, self.linktypes[interface], body + 20, cap_len)
+            elif block_type == 3:
+                # Simple Packet Block (always interface 0)
+                orig_len = struct.unpack_from(endian + 'I', buf, body)[0]
+                if len(self.linktypes) > 0:
+                    record = (next_offset, self.linktypes[0], body + 4, min(orig_len, block_len - 16))
+
+            if record is None:
+                record = (next_offset, None, 0, 0)
+            yield record
+            offset = next_offset
+
+
+class PcapFile(object):
+    '''
+        Memory-mapped, read-only view of a pcap or pcapng file.
+
+        Records are located lazily: iterating or indexing only parses as far into
+        the file as needed, and remembers the offset & length of each packet so
+        later random access is O(1). Packets are returned as memoryview slices of
+        the mapping (no copies); call bytes() on anything that must outlive close().
+
+        Usage:
+            with PcapFile('capture.cap') as pcap:
+                for (linktype, packet) in pcap:
+                    ...
+                (linktype, packet) = pcap[10]
+    '''
+
+    def __init__(self, capfile):
+        self.capfile = capfile
+        self.format = CaptureFormat()
+
+        # Lazy index of packets found so far
+        self.offsets = array('Q')
+        self.lengths = array('I')
+        self.linktypes = array('H')
+
+        self._map = None
+        self._view = memoryview(b'')
+        with open(capfile, 'rb') as fid:
+            size = os.fstat(fid.fileno()).st_size
+            if size > 0:
+                self._map = mmap.mmap(fid.fileno(), 0, access=mmap.ACCESS_READ)
+                self._view = memoryview(self._map)
+
+        self._next_offset = self.format.read_header(self._view, name=capfile)
+        self._indexed = self._next_offset is None  # Empty or header-only file
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def close(self):
+        '''Releases the memory mapping. Fails silently if packet views are still referenced.'''
+        if self._map is None:
+            return
+        try:
+            self._view.release()
+            self._map.close()
+            self._map = None
+        except BufferError:
+            pass  # Slices still in use; the mapping is released when they are garbage collected.
+
+    def _index_next(self):
+        '''Indexes the next packet in the file. Returns False once the end of the file is reached.'''
+        if self._indexed:
+            return False
+        for (next_offset, linktype, data_offset, length) in self.format.records(
+                self._view, self._next_offset, name=self.capfile):
+            self._next_offset = next_offset
+            if linktype is None:
+                continue  # Not a packet block
+            self.offsets.append(data_offset)
+            self.lengths.append(length)
+            self.linktypes.append(linktype)
+            return True
+        self._indexed = True
+        return False
+
+    def index(self):
+        '''Indexes the entire file. Returns the number of packets.'''
+        while self._index_next():
+            pass
+        return len(self.offsets)
+
+    def __len__(self):
+        return self.index()
+
+    def __getitem__(self, i):
+        '''Returns tuple(linktype, memoryview) of the i'th packet.'''
+        if i < 0:
+            i += self.index()
+        while i >= len(self.offsets) and self._index_next():
+            pass
+        if i < 0 or i >= len(self.offsets):
+            raise IndexError('packet index out of range')
+        offset = self.offsets[i]
+        return (self.linktypes[i], self._view[offset:offset + self.lengths[i]])
+
+    def __iter__(self):
+        '''Yields tuple(linktype, memoryview) for every packet in the file.'''
+        i = 0
+        while i < len(self.offsets) or self._index_next():
+            offset = self.offsets[i]
+            yield (self.linktypes[i], self._view[offset:offset + self.lengths[i]])
+            i += 1
+
+    def frames(self):
+        '''Yields 802.11 frames (memoryview, link-layer header removed) for every packet in the file.'''
+        for (linktype, packet) in self:
+            frame = Dot11.frame(linktype, packet)
+            if frame is not None:
+                yield frame
+
+
+class CaptureReader(object):
+    '''
+        Reads packets from a pcap or pcapng file that may still be growing.
+        Remembers the offset of the last complete record, so each call to read()
+        only parses records that were appended since the previous call.
+    '''
+
+    def __init__(self, capfile):
+        self.capfile = capfile
+        self.generation = 0  # Incremented every time the file is found to be replaced/truncated
+        self.reset()
+
+    def reset(self):
+        '''Forgets all progress; the next read() starts from the beginning of the file.'''
+        self.offset = 0    # Offset just past the last complete record
+        self.inode = None  # Inode of the file, to detect when it is replaced
+        self.format = CaptureFormat()
+
+    def read(self):
+        '''
+            Yields tuple(linktype, packet_bytes) for each complete record appended since the last call.
+            Partially-written records at the end of the file are left for the next call.
+        '''
+        try:
+            stat = os.stat(self.capfile)
+        except OSError:
+            return
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            # File was re-created or truncated, start over.
+            if self.inode is not None:
+                self.generation += 1
+            self.reset()
+            self.inode = stat.st_ino
+        if stat.st_size == self.offset:
+            return  # Nothing new
+
+        with open(self.capfile, 'rb') as fid:
+            fid.seek(self.offset)
+            data = fid.read(stat.st_size - self.offset)
+
+        start = 0
+        if self.format.is_pcapng is None:
+            start = self.format.read_header(data, name=self.capfile)
+            if start is None:
+                return
+            self.offset += start
+
+        for (next_offset, linktype, data_offset, length) in self.format.records(
+                data, start, name=self.capfile):
+            self.offset += next_offset - start
+            start = next_offset
+            if linktype is not None:
+                yield (linktype, data[data_offset:data_offset + length])
+
+
+class Dot11(object):
+    ''' Helpers for decoding 802.11 frames from captured packets. '''
+
+    # Management frame subtypes (first byte of the frame control field)
+    BEACON = 0x80
+    PROBE_RESPONSE = 0x50
+
+    WPS_OUI = b'\x00\x50\xf2\x04'
+    WPS_ATTR_AP_SETUP_LOCKED = 0x1057
+
+    @staticmethod
+    def frame(linktype, packet):
+        '''Returns the 802.11 frame inside a packet, or None if the link type is unsupported.'''
+        if linktype == LINKTYPE_IEEE802_11:
+            return packet
+        if len(packet) < 8:
+            return None
+        if linktype in (LINKTYPE_IEEE802_11_RADIOTAP, LINKTYPE_PPI):
+            header_len = struct.unpack_from('<H', packet, 2)[0]
+        elif linktype == LINKTYPE_PRISM_HEADER:
+            header_len = struct.unpack_from('<I', packet, 4)[0]
+        elif linktype == LINKTYPE_IEEE802_11_AVS:
+            header_len = struct.unpack_from('>I', packet, 4)[0]
+        else:
+            return None
+        return packet[header_len:]
+
+    @staticmethod
+    def mac_to_str(mac):
+        '''Converts 6 bytes to an upper-case colon-separated MAC address.'''
+        return ':'.join('%02X' % b for b in mac)
+
+    @staticmethod
+    def tags(frame):
+        '''Yields tuple(tag_number, memoryview) for the tagged parameters of a beacon/probe response.'''
+        # Tagged parameters start after the 24-byte header & 12 fixed bytes
+        offset = 36
+        while offset + 2 <= len(frame):
+            tag, length = frame[offset], frame[offset + 1]
+            yield (tag, frame[offset + 2:offset + 2 + length])
+            offset += 2 + length
+
+    @staticmethod
+    def beacon(frame, raw=False):
+        '''
+            Returns tuple(BSSID, ESSID) if the frame is a beacon or probe response, otherwise None.
+            ESSID is None for hidden networks. ESSIDs are not necessarily UTF-8: the decoded
+            ESSID is for display only; hashes & PMK salts need raw=True (ESSID as bytes).
+        '''
+        if len(frame) < 38 or frame[0] not in (Dot11.BEACON, Dot11.PROBE_RESPONSE):
+            return None
+        bssid = Dot11.mac_to_str(frame[16:22])
+        for (tag, value) in Dot11.tags(frame):
+            if tag == 0:
+                essid = bytes(value).rstrip(b'\x00')
+                if len(essid) == 0:
+                    return (bssid, None)
+                return (bssid, essid if raw else essid.decode('utf-8', errors='replace'))
+        return (bssid, None)
+
+    @staticmethod
+    def wps_locked(frame):
+        '''
+            Checks a beacon or probe response for a WPS information element.
+            Returns: None if the AP does not advertise WPS,
+                     True if WPS is advertised with 'AP Setup Locked', False otherwise.
+        '''
+        if len(frame) < 38 or frame[0] not in (Dot11.BEACON, Dot11.PROBE_RESPONSE):
+            return None
+        for (tag, value) in Dot11.tags(frame):
+            if tag != 221 or bytes(value[:4]) != Dot11.WPS_OUI:
+                continue
+            # WPS attributes are Type(2) Length(2) Value, big-endian
+            offset = 4
+            while offset + 4 <= len(value):
+                attr_type, attr_len = struct.unpack_from('>HH', value, offset)
+                if attr_type == Dot11.WPS_ATTR_AP_SETUP_LOCKED and attr_len >= 1:
+                    return value[offset + 4] != 0
+                offset += 4 + attr_len
+            return False
+        return None
+
+
+if __name__ == '__main__':
+    # Benchmark: native parsing vs. tshark on the test captures.
+    import sys, time
+    sys.path.insert(0, '.')
+    from byteBuggy.util.process import Process
+
+    files = sys.argv[1:] or [os.path.join('tests', 'files', f) for f in sorted(os.listdir(os.path.join('tests', 'files')))
+                             if f.endswith('.cap') or f.endswith('.tshark')]
+    has_tshark = Process.exists('tshark')
+    rounds = 20
+
+    print('%-45s %8s %12s %12s' % ('file', 'packets', 'native (ms)', 'tshark (ms)'))
+    for capfile in files:
+        start = time.time()
+        for _ in range(rounds):
+            with PcapFile(capfile) as pcap:
+                count = 0
+                for frame in pcap.frames():
+                    Dot11.beacon(frame)
+                    count += 1
+        native_ms = (time.time() - start) * 1000.0 / rounds
+
+        tshark_ms = 'n/a'
+        if has_tshark:
+            start = time.time()
+            # List args (Process.call would run a list through the shell, i.e. only `tshark`)
+            Process(['tshark', '-r', capfile, '-n', '-Y', 'wlan.fc.type_subtype == 0x08 || eapol']).stdout()
+            tshark_ms = '%0.2f' % ((time.time() - start) * 1000.0)
+
+        print('%-45s %8d %12.2f %12s' % (os.path.basename(capfile), count, native_ms, tshark_ms))
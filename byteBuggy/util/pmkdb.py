@@ -0,0 +1,316 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import hashlib
+import mmap
+import os
+import re
+import struct
+import time
+
+
+class PmkDatabase(object):
+    '''
+        On-disk store of precomputed WPA PMKs for one ESSID and one wordlist.
+
+        A PMK only depends on the ESSID and the passphrase, so once a store is built,
+        cracking any handshake or PMKID of a network with that ESSID only needs the
+        cheap MIC/PMKID check per word. Each store is a single file:
+
+            header (HEADER_SIZE bytes): magic, ESSID, wordlist fingerprint, count, wordlist name
+            records: one 32-byte PMK per usable passphrase, in wordlist order
+
+        Stores are appended to in chunks and can be resumed; the file is memory-mapped for lookups.
+    '''
+
+    MAGIC = b'BBPMKDB1'
+    HEADER = struct.Struct('<8sB32s20sQ128s')
+    HEADER_SIZE = 256
+    RECORD_SIZE = 32
+    COUNT_OFFSET = 8 + 1 + 32 + 20
+
+    def __init__(self, path, writable=False):
+        '''Opens an existing store. Raises ValueError if the file is not a PMK store.'''
+        self.path = path
+        self.writable = writable
+        self.fid = open(path, 'r+b' if writable else 'rb')
+        try:
+            header = self.fid.read(PmkDatabase.HEADER_SIZE)
+            if len(header) < PmkDatabase.HEADER_SIZE or header[:8] != PmkDatabase.MAGIC:
+                raise ValueError('%s is not a PMK database' % path)
+            (magic, essid_len, essid, fingerprint, count, wordlist) = \
+                    PmkDatabase.HEADER.unpack_from(header)
+            self.essid = essid[:essid_len]
+            self.fingerprint = fingerprint.hex()
+            self.wordlist = wordlist.rstrip(b'\x00').decode('utf-8', errors='replace')
+            # Ignore a partially-written trailing record (e.g. build was killed)
+            size = os.fstat(self.fid.fileno()).st_size
+            self.count = min(count, (size - PmkDatabase.HEADER_SIZE) // PmkDatabase.RECORD_SIZE)
+            if writable:
+                self.lock()
+        except Exception:
+            self.fid.close()
+            raise
+
+    def lock(self):
+        '''Takes an exclusive lock so only one process appends to the store; falls back to read-only.'''
+        import fcntl
+        try:
+            fcntl.flock(self.fid.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self.writable = False
+
+    def close(self):
+        self.fid.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    @staticmethod
+    def fingerprint_wordlist(wordlist):
+        '''Returns the SHA-1 (hex) of the wordlist's contents; stores are only valid for identical wordlists.'''
+        digest = hashlib.sha1()
+        with open(wordlist, 'rb') as fid:
+            for block in iter(lambda: fid.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def filename(essid, fingerprint):
+        return '%s_%s.pmk' % (essid.hex(), fingerprint[:16])
+
+    @staticmethod
+    def open(directory, essid, wordlist, create=False, fingerprint=None):
+        '''
+            Opens the store for an ESSID (bytes) & wordlist.
+            Args:
+                create      - Create the store (and directory) if it does not exist, and open it for appending.
+                fingerprint - Precomputed fingerprint of the wordlist (see fingerprint_wordlist).
+            Returns:
+                PmkDatabase, or None if the store does not exist and create is False.
+        '''
+        if fingerprint is None:
+            fingerprint = PmkDatabase.fingerprint_wordlist(wordlist)
+        path = os.path.join(directory, PmkDatabase.filename(essid, fingerprint))
+
+        if not os.path.exists(path):
+            if not create:
+                return None
+            if not os.path.exists(directory):
+                os.makedirs(directory)
+            header = PmkDatabase.HEADER.pack(PmkDatabase.MAGIC,
+                                             len(essid),
+                                             essid,
+                                             bytes.fromhex(fingerprint),
+                                             0,
+                                             os.path.basename(wordlist).encode('utf-8')[:128])
+            # Write to a temp file first so readers never see a partial header.
+            temp_path = '%s.%d.tmp' % (path, os.getpid())
+            with open(temp_path, 'wb') as fid:
+                fid.write(header.ljust(PmkDatabase.HEADER_SIZE, b'\x00'))
+            os.rename(temp_path, path)
+
+        return PmkDatabase(path, writable=create)
+
+    @staticmethod
+    def all(directory):
+        '''Returns list[PmkDatabase] of every store in the directory (opened read-only).'''
+        databases = []
+        if not os.path.isdir(directory):
+            return databases
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith('.pmk'):
+                continue
+            try:
+                databases.append(PmkDatabase(os.path.join(directory, filename)))
+            except (ValueError, OSError):
+                continue
+        return databases
+
+    def append(self, pmks):
+        '''Appends PMKs (list of 32-byte values) for the next passphrases in the wordlist.'''
+        if not self.writable or len(pmks) == 0:
+            return
+        self.fid.seek(PmkDatabase.HEADER_SIZE + self.count * PmkDatabase.RECORD_SIZE)
+        self.fid.write(b''.join(pmks))
+        self.fid.flush()
+        # Only count the records once they are written
+        self.count += len(pmks)
+        self.fid.seek(PmkDatabase.COUNT_OFFSET)
+        self.fid.write(struct.pack('<Q', self.count))
+        self.fid.flush()
+
+    def lookup(self, target):
+        '''
+            Finds the stored PMK that matches a HandshakeHash or PmkidHash (anything with verify(pmk)).
+            Returns:
+                Index of the passphrase in the wordlist (int), or None if no stored PMK matches.
+        '''
+        if self.count == 0:
+            return None
+        end = PmkDatabase.HEADER_SIZE + self.count * PmkDatabase.RECORD_SIZE
+        buf = mmap.mmap(self.fid.fileno(), end, access=mmap.ACCESS_READ)
+        try:
+            verify = target.verify
+            for (index, offset) in enumerate(range(PmkDatabase.HEADER_SIZE, end, PmkDatabase.RECORD_SIZE)):
+                if verify(buf[offset:offset + PmkDatabase.RECORD_SIZE]):
+                    return index
+        finally:
+            buf.close()
+        return None
+
+    def build(self, wordlist, processes=None, progress=None):
+        '''
+            Computes & stores PMKs for every passphrase in the wordlist that is not stored yet.
+            Resumes where a previous (interrupted) build stopped.
+            Args:
+                progress - Optional callback(num_stored, keys_per_second), called after each chunk.
+        '''
+        from ..tools.cpucrack import CpuCrack, PmkOnly
+        CpuCrack.crack(PmkOnly(self.essid), wordlist, processes=processes, progress=progress, pmk_db=self)
+
+    def info(self):
+        '''Returns a one-line description of the store.'''
+        size = os.path.getsize(self.path)
+        modified = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(os.path.getmtime(self.path)))
+        essid = self.essid.decode('utf-8', errors='replace')
+        return '%-32s %9d PMKs %8.1f MB  %s  %s (%s)' % (
+            essid, self.count, size / 1048576.0, modified, self.wordlist, self.fingerprint[:16])
+
+
+# BSSID in the names of saved handshakes: handshake_<ESSID>_<AA-BB-CC-DD-EE-FF>_<date>.cap
+HANDSHAKE_BSSID = re.compile(r'^handshake_.*_((?:[0-9A-Fa-f]{2}-){5}[0-9A-Fa-f]{2})_[^_]*\.cap$')
+
+
+def handshake_bssid(path):
+    '''
+        Returns the BSSID of the handshake in a capture: from the file name if byteBuggy saved it,
+        else the AP of its best message pair. None if the capture has no handshake.
+    '''
+    from ..model.handshake import Handshake
+    match = HANDSHAKE_BSSID.match(os.path.basename(path))
+    if match:
+        return match.group(1).replace('-', ':').upper()
+    best = Handshake(path, bssid=None, essid=None).best_message_pair()
+    if best is None:
+        return None
+    return best[1].ap
+
+
+def essids_from_handshake_dir(directory):
+    '''
+        Returns dict of ESSID (bytes) -> number of captures (.cap and .16800 files) in the directory.
+        The ESSID of a .cap is the one its handshake's AP broadcasts, not a neighbouring AP's.
+    '''
+    from ..model.handshake import Handshake
+    essids = {}
+    if not os.path.isdir(directory):
+        return essids
+    for filename in os.listdir(directory):
+        path = os.path.join(directory, filename)
+        essid = None
+        try:
+            if filename.endswith('.cap'):
+                bssid = handshake_bssid(path)
+                if bssid is not None:
+                    essid = Handshake(path, bssid=bssid, essid=None).hash_essid()
+            elif filename.endswith('.16800'):
+                with open(path, 'r') as fid:
+                    fields = fid.readline().strip().split('*')
+                if len(fields) >= 4:
+                    essid = bytes.fromhex(fields[3])
+        except (ValueError, OSError):
+            continue
+        if essid:
+            essids[essid] = essids.get(essid, 0) + 1
+    return essids
+
+
+def main(argv=None):
+    '''Command-line interface: build, inspect and prune PMK stores.'''
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(prog='python -m byteBuggy.util.pmkdb',
+            description='Precompute WPA PMKs per ESSID so cracking only needs the MIC/PMKID check.')
+    parser.add_argument('--pmk-dir', default='pmk', dest='pmk_dir',
+            help='Directory of PMK stores (default: pmk)')
+    commands = parser.add_subparsers(dest='command')
+
+    build = commands.add_parser('build', help='Build (or resume) stores for ESSIDs')
+    build.add_argument('--dict', dest='wordlist', default='wordlist-top4800-probable.txt',
+            help='Wordlist to precompute (default: wordlist-top4800-probable.txt)')
+    build.add_argument('--essid', action='append', default=[],
+            help='ESSID to precompute (may be repeated)')
+    build.add_argument('--hs-dir', dest='hs_dir',
+            help='Also precompute every ESSID captured in this handshake directory (e.g. hs)')
+    build.add_argument('--min-captures', dest='min_captures', type=int, default=1,
+            help='With --hs-dir, only ESSIDs with at least this many captures (default: 1)')
+    build.add_argument('--processes', type=int, default=None,
+            help='Worker processes (default: one per core)')
+
+    commands.add_parser('inspect', help='List stores')
+
+    prune = commands.add_parser('prune', help='Delete stores')
+    prune.add_argument('--essid', action='append', default=[],
+            help='Delete stores for this ESSID (may be repeated)')
+    prune.add_argument('--older-than', dest='older_than', type=int,
+            help='Delete stores not modified for this many days')
+    prune.add_argument('--stale', metavar='WORDLIST', action='append', default=[],
+            help='Delete stores built from an older version of this wordlist (may be repeated)')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        essids = [essid.encode('utf-8') for essid in args.essid]
+        if args.hs_dir:
+            for (essid, captures) in sorted(essids_from_handshake_dir(args.hs_dir).items()):
+                if captures >= args.min_captures and essid not in essids:
+                    essids.append(essid)
+        if len(essids) == 0:
+            parser.error('build needs --essid or --hs-dir')
+        fingerprint = PmkDatabase.fingerprint_wordlist(args.wordlist)
+        for essid in essids:
+            with PmkDatabase.open(args.pmk_dir, essid, args.wordlist, create=True, fingerprint=fingerprint) as db:
+                if not db.writable:
+                    print(' %s is being built by another process, skipping' % db.path)
+                    continue
+                def progress(num_stored, keys_per_second):
+                    sys.stdout.write('\r %s: %d PMKs stored @ %0.1f keys/sec ' % (
+                        essid.decode('utf-8', errors='replace'), num_stored, keys_per_second))
+                    sys.stdout.flush()
+                db.build(args.wordlist, processes=args.processes, progress=progress)
+                print('\r %s' % db.info())
+
+    elif args.command == 'inspect':
+        for db in PmkDatabase.all(args.pmk_dir):
+            print(' %s' % db.info())
+            db.close()
+
+    elif args.command == 'prune':
+        essids = [essid.encode('utf-8') for essid in args.essid]
+        current = [PmkDatabase.fingerprint_wordlist(wordlist) for wordlist in args.stale]
+        stale_names = [os.path.basename(wordlist) for wordlist in args.stale]
+        for db in PmkDatabase.all(args.pmk_dir):
+            db.close()
+            delete = db.essid in essids
+            if args.older_than is not None:
+                delete = delete or time.time() - os.path.getmtime(db.path) > args.older_than * 86400
+            if db.wordlist in stale_names and db.fingerprint not in current:
+                delete = True
+            if delete:
+                print(' Deleting %s' % db.info())
+                os.remove(db.path)
+
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
@@ -2,17 +2,195 @@
 # -*- coding: utf-8 -*-
 
 import time
+import select
 import signal
+import sys
+import threading
 import os
 
-from subprocess import Popen, PIPE
+from subprocess import Popen, PIPE, TimeoutExpired
 
 # from ..util.color import Color
 from ..config import Configuration
 
 
+class ChildManager(object):
+    '''
+        Keeps track of every child started through Process. Each child runs in its own
+        process group, so the tool and anything it spawns can be killed together, and is
+        reaped with os.wait4() to account its wall time, CPU time & peak memory per tool.
+        shutdown() kills whatever is left (at exit, or on SIGTERM/SIGHUP; see install()).
+    '''
+
+    children = {}   # PID -> tuple(tool name, start time, weakref to the Popen)
+    groups = set()  # Process group IDs of children; kept while anything is left in the group (with lock)
+    usage = {}      # Tool name -> [runs, wall seconds, user CPU seconds, system CPU seconds, max RSS KB]
+    lock = threading.Lock()
+    installed = False
+
+    @classmethod
+    def add(cls, popen, command):
+        import weakref
+        name = os.path.basename(command[0]) if len(command) > 0 else '?'
+        with cls.lock:
+            cls.children[popen.pid] = (name, time.time(), weakref.ref(popen))
+            cls.groups.add(popen.pid)
+        # Children whose Process was dropped without waiting are reaped here, instead of lingering as zombies
+        cls.reap_all()
+
+    @classmethod
+    def reap(cls, popen):
+        '''Reaps the child if it exited (without blocking). Returns its exit code, or None if still running.'''
+        with cls.lock:
+            if popen.returncode is not None:
+                return popen.returncode
+            if popen.pid not in cls.children:
+                return popen.poll()  # Not started through Process
+            try:
+                (pid, status, rusage) = os.wait4(popen.pid, os.WNOHANG)
+            except ChildProcessError:
+                # Reaped elsewhere (e.g. by Popen), without resource usage
+                cls.children.pop(popen.pid, None)
+                cls.prune_group(popen.pid)
+                return popen.poll()
+            if pid == 0:
+                return None
+            popen.returncode = os.waitstatus_to_exitcode(status)
+            cls.record(pid, rusage)
+            return popen.returncode
+
+    @classmethod
+    def reap_all(cls):
+        '''
+            Reaps every tracked child that exited, and forgets the process groups of reaped
+            children that are now empty. Returns number of children still running.
+        '''
+        with cls.lock:
+            for pid in list(cls.children):
+                popen = cls.children[pid][2]()
+                if popen is not None and popen.returncode is not None:
+                    cls.children.pop(pid)  # Reaped by Popen
+                    continue
+                try:
+                    (reaped, status, rusage) = os.wait4(pid, os.WNOHANG)
+                except ChildProcessError:
+                    cls.children.pop(pid)
+                    continue
+                if reaped == 0:
+                    continue
+                if popen is not None:
+                    popen.returncode = os.waitstatus_to_exitcode(status)
+                cls.record(pid, rusage)
+            # Groups whose leader is gone, e.g. reaped by Popen or kept alive by the tool's children
+            for pgid in cls.groups.difference(cls.children):
+                cls.prune_group(pgid)
+            return len(cls.children)
+
+    @classmethod
+    def record(cls, pid, rusage):
+        '''Adds a reaped child's resource usage to its tool's totals (call with lock held).'''
+        (name, start_time, popen) = cls.children.pop(pid)
+        usage = cls.usage.setdefault(name, [0, 0.0, 0.0, 0.0, 0])
+        usage[0] += 1
+        usage[1] += time.time() - start_time
+        usage[2] += rusage.ru_utime
+        usage[3] += rusage.ru_stime
+        usage[4] = max(usage[4], rusage.ru_maxrss)  # Kilobytes on Linux
+        cls.prune_group(pid)
+
+    @classmethod
+    def prune_group(cls, pgid):
+        '''
+            Forgets a process group once nothing is left in it (call with lock held), so an
+            unrelated group that reuses the ID later is never signalled by shutdown().
+        '''
+        try:
+            os.killpg(pgid, 0)
+        except ProcessLookupError:
+            cls.groups.discard(pgid)
+        except OSError:
+            pass  # Exists (EPERM)
+
+    @classmethod
+    def signal_all(cls, signum):
+        '''
+            Signals every process group that still has processes in it (signal 0 only checks).
+            A group outlives its leader if the tool left children behind.
+            Returns number of groups signalled.
+        '''
+        with cls.lock:
+            groups = list(cls.groups)
+        signalled = 0
+        for pgid in groups:
+            try:
+                os.killpg(pgid, signum)
+                signalled += 1
+            except ProcessLookupError:
+                with cls.lock:
+                    cls.groups.discard(pgid)  # Everyone in the group exited
+            except OSError:
+                pass
+        return signalled
+
+    @classmethod
+    def running(cls):
+        '''Returns True if any child (or anything left in its process group) is running.'''
+        return cls.reap_all() > 0 or cls.signal_all(0) > 0
+
+    @classmethod
+    def shutdown(cls, wait_time=2.0):
+        '''Interrupts every child's process group, kills groups that outlive wait_time, reaps all.'''
+        for signum in (signal.SIGINT, signal.SIGKILL):
+            if not cls.running():
+                return
+            cls.signal_all(signum)
+            end_time = time.time() + wait_time
+            while cls.running() and time.time() < end_time:
+                time.sleep(0.05)
+
+    @classmethod
+    def install(cls):
+        '''Kills all children when byteBuggy exits, including on SIGTERM & SIGHUP.'''
+        if cls.installed:
+            return
+        cls.installed = True
+        import atexit
+        atexit.register(cls.shutdown)
+        if threading.current_thread() is not threading.main_thread():
+            return  # Signal handlers can only be set from the main thread
+        for signum in (signal.SIGTERM, signal.SIGHUP):
+            signal.signal(signum, cls.on_signal)
+
+    @classmethod
+    def on_signal(cls, signum, frame):
+        cls.shutdown()
+        raise SystemExit(128 + signum)  # Runs the usual clean-up (temp files, atexit)
+
+    @classmethod
+    def report(cls):
+        '''Returns list of lines: resource usage per tool, most CPU first.'''
+        lines = ['%-16s %5s %9s %9s %9s %9s' % ('tool', 'runs', 'wall', 'user', 'system', 'max RSS')]
+        rows = sorted(cls.usage.items(), key=lambda item: item[1][2] + item[1][3], reverse=True)
+        for (name, (runs, wall, user, system, maxrss)) in rows:
+            lines.append('%-16s %5d %8.1fs %8.2fs %8.2fs %7dMB' % (
+                name, runs, wall, user, system, maxrss // 1024))
+        return lines
+
+
 class Process(object):
-    ''' Represents a running/ran process '''
+    '''
+        Represents a running/ran process.
+
+        Exit is signalled through a pidfd (Linux 5.3+), so waiting with a timeout blocks in
+        select()/the asyncio loop instead of sleeping & polling. Synchronous callers use
+        wait(timeout) & interrupt(); coroutines use `await exited(timeout)` and
+        `async for line in lines()`. Without pidfd, waits fall back to Popen.wait().
+
+        The process runs in its own process group & is reaped by ChildManager.
+    '''
+
+    # Bytes read from a pipe at a time by lines()
+    READ_SIZE = 65536
 
     @staticmethod
     def devnull():
@@ -53,15 +231,9 @@ class Process(object):
 
     @staticmethod
     def exists(program):
-        ''' Checks if program is installed on this system '''
-        p = Process(['which', program])
-        stdout = p.stdout().strip()
-        stderr = p.stderr().strip()
-
-        if stdout == '' and stderr == '':
-            return False
-
-        return True
+        ''' Checks if program is installed on this system (see ToolRegistry.which) '''
+        from ..tools.registry import ToolRegistry
+        return ToolRegistry.exists(program)
 
     def __init__(self, command, devnull=False, stdout=PIPE, stderr=PIPE, cwd=None, bufsize=0, stdin=PIPE):
         ''' Starts executing command '''
@@ -86,7 +258,35 @@ class Process(object):
 
         self.start_time = time.time()
 
-        self.pid = Popen(command, stdout=sout, stderr=serr, stdin=stdin, cwd=cwd, bufsize=bufsize)
+        # Own process group: signals reach the tool & its children, but not byteBuggy
+        # (Ctrl+C in the terminal only interrupts byteBuggy, which then stops its tools)
+        if sys.version_info >= (3, 11):
+            group = {'process_group': 0}
+        else:
+            group = {'preexec_fn': os.setpgrp}
+        self.pid = Popen(command, stdout=sout, stderr=serr, stdin=stdin, cwd=cwd, bufsize=bufsize, **group)
+        ChildManager.add(self.pid, command)
+        # Opened right away: once the process is reaped, its PID may be re-used
+        self.pidfd = Process.open_pidfd(self.pid.pid)
+        self.pidfd_lock = threading.Lock()  # poll() may be called from several threads
+
+    @staticmethod
+    def open_pidfd(pid):
+        '''Returns a pidfd (readable once the process exits), or None if not supported.'''
+        if not hasattr(os, 'pidfd_open'):
+            return None
+        try:
+            return os.pidfd_open(pid)
+        except OSError:
+            return None  # Kernel older than 5.3, or the process is already gone
+
+    def close_pidfd(self):
+        if getattr(self, 'pidfd', None) is None:
+            return
+        with self.pidfd_lock:
+            (pidfd, self.pidfd) = (self.pidfd, None)
+        if pidfd is not None:
+            os.close(pidfd)
 
     def __del__(self):
         '''
@@ -94,10 +294,11 @@ class Process(object):
             If process is still running at this point, it should die.
         '''
         try:
-            if self.pid and self.pid.poll() is None:
+            if self.pid and self.poll() is None:
                 self.interrupt()
         except AttributeError:
             pass
+        self.close_pidfd()
 
     def stdout(self):
         ''' Waits for process to finish, returns stdout output '''
@@ -126,10 +327,10 @@ class Process(object):
 
     def get_output(self):
         ''' Waits for process to finish, sets stdout & stderr '''
-        if self.pid.poll() is None:
-            self.pid.wait()
         if self.out is None:
-            (self.out, self.err) = self.pid.communicate()
+            # Read both pipes while waiting, so a chatty process can not fill one & block
+            (self.out, self.err) = self.read_pipes()
+        self.wait()
 
         if type(self.out) is bytes:
             self.out = self.out.decode('utf-8')
@@ -139,12 +340,147 @@ class Process(object):
 
         return (self.out, self.err)
 
+    def read_pipes(self):
+        '''Reads stdout & stderr (those that are pipes) until closed. Returns tuple(bytes or None, bytes or None).'''
+        import selectors
+        pipes = [pipe for pipe in (self.pid.stdout, self.pid.stderr) if pipe is not None]
+        chunks = dict((pipe.fileno(), []) for pipe in pipes)
+        selector = selectors.DefaultSelector()
+        for pipe in pipes:
+            selector.register(pipe.fileno(), selectors.EVENT_READ)
+        try:
+            while len(selector.get_map()) > 0:
+                for (key, mask) in selector.select():
+                    data = os.read(key.fd, 65536)
+                    if data == b'':
+                        selector.unregister(key.fd)
+                    else:
+                        chunks[key.fd].append(data)
+        finally:
+            selector.close()
+        (out, err) = (None, None)
+        if self.pid.stdout is not None:
+            out = b''.join(chunks[self.pid.stdout.fileno()])
+        if self.pid.stderr is not None:
+            err = b''.join(chunks[self.pid.stderr.fileno()])
+        return (out, err)
+
     def poll(self):
         ''' Returns exit code if process is dead, otherwise 'None' '''
-        return self.pid.poll()
+        returncode = ChildManager.reap(self.pid)
+        if returncode is not None:
+            self.close_pidfd()
+        return returncode
 
-    def wait(self):
-        self.pid.wait()
+    def wait(self, timeout=None):
+        '''
+            Blocks until the process exits, or until timeout (seconds) passes.
+            Returns: Exit code, or None if the process is still running after timeout.
+        '''
+        if self.poll() is not None:
+            return self.pid.returncode
+        pidfd = self.pidfd
+        if pidfd is not None:
+            try:
+                # Readable once the process exited; poll() then reaps it (with its resource usage)
+                select.select([pidfd], [], [], None if timeout is None else max(0, timeout))
+                return self.poll()
+            except (OSError, ValueError):
+                pass  # Closed by another thread's poll(): the process has exited
+        try:
+            self.pid.wait(timeout=None if timeout is None else max(0, timeout))
+        except TimeoutExpired:
+            return None
+        return self.poll()
+
+    async def exited(self, timeout=None):
+        '''
+            Awaitable exit: returns the exit code, or None if the process is still running
+            after timeout (seconds). Waits on the pidfd in the running asyncio loop.
+        '''
+        import asyncio
+        if self.poll() is not None:
+            return self.pid.returncode
+        loop = asyncio.get_running_loop()
+        if self.pidfd is None:
+            # No pidfd: wait in a thread instead
+            waiter = loop.run_in_executor(None, self.wait, timeout)
+            return await waiter
+
+        pidfd = self.pidfd
+        future = loop.create_future()
+        def on_exit():
+            if not future.done():
+                future.set_result(None)
+        loop.add_reader(pidfd, on_exit)
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            loop.remove_reader(pidfd)
+        return self.poll()
+
+    async def lines(self, stderr=False):
+        '''
+            Async iterator over lines (str, without line endings) of stdout (or stderr) as
+            the process writes them, until the pipe is closed. Carriage returns also end a line
+            (tools redraw progress lines with them). The process must be started with PIPE.
+        '''
+        import asyncio
+        from .stream import LineSplitter
+        pipe = self.pid.stderr if stderr else self.pid.stdout
+        fd = pipe.fileno()
+        loop = asyncio.get_running_loop()
+        os.set_blocking(fd, False)
+        splitter = LineSplitter()
+        try:
+            while True:
+                data = await Process.read_async(loop, fd)
+                if not data:
+                    break  # EOF
+                for line in splitter.split(data):
+                    yield line.decode('utf-8', errors='replace')
+            for line in splitter.flush():
+                yield line.decode('utf-8', errors='replace')
+        finally:
+            os.set_blocking(fd, True)
+
+    @staticmethod
+    async def read_async(loop, fd):
+        '''Reads up to READ_SIZE bytes from a non-blocking fd once it is readable (b'' at EOF).'''
+        future = loop.create_future()
+        def on_readable():
+            try:
+                data = os.read(fd, Process.READ_SIZE)
+            except BlockingIOError:
+                return  # Spurious wake-up, keep waiting
+            except OSError:
+                data = b''
+            if not future.done():
+                future.set_result(data)
+        loop.add_reader(fd, on_readable)
+        try:
+            return await future
+        finally:
+            loop.remove_reader(fd)
+
+    @staticmethod
+    def run_async(coroutine):
+        '''Synchronous facade: runs a coroutine (e.g. one awaiting exited()/lines()) to completion.'''
+        import asyncio
+        return asyncio.run(coroutine)
+
+    @staticmethod
+    def signal_group(pid, signum):
+        '''Signals the process' group (the tool & its children), or just the process if it has no group of its own.'''
+        try:
+            if os.getpgid(pid) == pid:
+                os.killpg(pid, signum)
+                return
+        except OSError:
+            pass
+        os.kill(pid, signum)
 
     def running_time(self):
         ''' Returns number of seconds since process was started '''
@@ -156,6 +492,8 @@ class Process(object):
             If process fails to exit within `wait_time` seconds, terminates it.
         '''
         try:
+            if self.poll() is not None:
+                return  # Already exited (and reaped: the PID may belong to another process now)
             pid = self.pid.pid
             cmd = self.command
             if type(cmd) is list:
@@ -164,19 +502,17 @@ class Process(object):
             if Configuration.verbose > 1:
                 print('\n  sending interrupt to PID %d (%s)' % (pid, cmd))
 
-            os.kill(pid, signal.SIGINT)
-
-            start_time = time.time()  # Time since Interrupt was sent
-            while self.pid.poll() is None:
-                # Process is still running
-                time.sleep(0.1)
-                if time.time() - start_time > wait_time:
-                    # We waited too long for process to die, terminate it.
-                    if Configuration.verbose > 1:
-                        print('\n  Waited > %0.2f seconds for process to die, killing it' % wait_time)
-                    os.kill(pid, signal.SIGTERM)
-                    self.pid.terminate()
-                    break
+            Process.signal_group(pid, signal.SIGINT)
+
+            # Returns as soon as the process exits
+            if self.wait(wait_time) is None:
+                # We waited too long for process to die, terminate it.
+                if Configuration.verbose > 1:
+                    print('\n  Waited > %0.2f seconds for process to die, killing it' % wait_time)
+                Process.signal_group(pid, signal.SIGTERM)
+                if self.wait(wait_time) is None:
+                    Process.signal_group(pid, signal.SIGKILL)
+                    self.wait(wait_time)
 
         except OSError as e:
             if 'No such process' in e.__str__():
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from ..config import Configuration
+from ..model.target import WPSState
+
+import json
+import sys
+
+from time import time
+
+
+class ScanStream(object):
+    '''
+        Headless scan (--scan-json): runs the same airodump loop as the Scanner, but
+        writes one compact JSON object per line for every target that appeared,
+        disappeared or changed, instead of drawing the targets table.
+
+            {"event":"new","time":..,"bssid":..,"essid":..,"channel":..,"encryption":..,...}
+            {"event":"change","time":..,"bssid":..,"changes":{"power":[41,43]}}
+            {"event":"lost","time":..,"bssid":..}
+    '''
+
+    # Stream that JSON lines are written to when no file is given.
+    # byteBuggy points sys.stdout at stderr for --scan-json, so other output does not mix in.
+    stdout = None
+
+    WPS_NAMES = {
+        WPSState.NONE: 'no',
+        WPSState.UNLOCKED: 'unlocked',
+        WPSState.LOCKED: 'locked',
+        WPSState.UNKNOWN: 'unknown'
+    }
+
+    def __init__(self, output='-', rate=1.0):
+        '''
+            Args:
+                output - File to append JSON lines to, or '-' for stdout.
+                rate   - Seconds between scan refreshes (and so between batches of events).
+        '''
+        self.output = output
+        self.rate = rate
+        self.fid = None
+
+    @staticmethod
+    def claim_stdout():
+        '''Keeps stdout for the JSON lines and sends everything else printed to stderr.'''
+        if ScanStream.stdout is None:
+            ScanStream.stdout = sys.stdout
+            sys.stdout = sys.stderr
+
+    @staticmethod
+    def value(field, value):
+        '''Returns a TargetDiff field value as stored in JSON.'''
+        if field == 'wps':
+            return ScanStream.WPS_NAMES.get(value, value)
+        if field == 'clients':
+            return list(value)
+        return value
+
+    @staticmethod
+    def target_json(target):
+        '''Returns dict of the target's fields, for "new" events.'''
+        return {
+            'bssid': target.bssid,
+            'essid': target.essid,
+            'channel': target.channel,
+            'encryption': target.encryption,
+            'power': target.power,
+            'beacons': target.beacons,
+            'ivs': target.ivs,
+            'wps': ScanStream.value('wps', target.wps),
+            'decloaked': target.decloaked,
+            'clients': sorted(client.station for client in target.clients)
+        }
+
+    @staticmethod
+    def events(diff, now=None):
+        '''Returns list of events (dicts) for a TargetDiff.'''
+        now = int(time()) if now is None else now
+        events = []
+        for target in diff.added:
+            event = {'event': 'new', 'time': now}
+            event.update(ScanStream.target_json(target))
+            events.append(event)
+        for (target, fields) in diff.changed:
+            changes = {}
+            for (field, (old, new)) in fields.items():
+                changes[field] = [ScanStream.value(field, old), ScanStream.value(field, new)]
+            events.append({'event': 'change', 'time': now, 'bssid': target.bssid, 'changes': changes})
+        for bssid in diff.removed:
+            events.append({'event': 'lost', 'time': now, 'bssid': bssid})
+        return events
+
+    def write(self, diff):
+        '''Airodump subscriber: writes the diff's events, one JSON object per line.'''
+        lines = [json.dumps(event, separators=(',', ':'), sort_keys=True) for event in ScanStream.events(diff)]
+        self.fid.write('\n'.join(lines) + '\n')
+        self.fid.flush()
+
+    def run(self):
+        '''Scans until interrupted, airodump dies, or the scan time (-p) runs out.'''
+        from ..tools.airodump import Airodump
+
+        if self.output == '-':
+            self.fid = ScanStream.stdout or sys.stdout
+        else:
+            self.fid = open(self.output, 'a')
+
+        try:
+            with Airodump() as airodump:
+                airodump.subscribe(self.write)
+                scan_start_time = time()
+                while True:
+                    if airodump.pid.poll() is not None:
+                        return  # Airodump process died
+
+                    # Diffs reach self.write() through the subscription
+                    airodump.get_targets()
+                    airodump.spill()  # Keep scanning on disk once tmpfs is full
+
+                    if Configuration.scan_time > 0 and time() > scan_start_time + Configuration.scan_time:
+                        return
+
+                    # Wakes up as soon as airodump rewrites its CSV (at most `rate` seconds)
+                    airodump.wait_for_files(self.rate, endswith='.csv')
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if self.fid is not ScanStream.stdout and self.fid is not sys.stdout:
+                self.fid.close()
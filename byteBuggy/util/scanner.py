@@ -1,34 +1,29 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from ..util.color import Color
 from ..tools.airodump import Airodump
 from ..model.target import Target, WPSState
 from ..config import Configuration
 from ..util.process import Process
+from ..util.terminal import Terminal, TableRenderer
 
-import sys,os
-import hashlib
-
-from time import sleep, time
+from time import time
 
 class Scanner(object):
     ''' Scans wifi networks & provides menu for selecting targets '''
 
-    # Console code for moving up one line
-    UP_CHAR = '\x1B[1F'
-
     def __init__(self):
         '''
         Scans for targets via Airodump.
         Loops until scan is interrupted via user or config.
         Note: Sets this object's `targets` attrbute (list[Target]) upon interruption.
         '''
-        self.last_sameline_length = 0
         self.previous_target_count = 0
+        self.renderer = TableRenderer()
+        self.rows = [] # Rendered target table, rebuilt when targets change
         self.targets = []
         self.target = None # Target specified by user (based on ESSID/BSSID)
-        self.last_hash = ''
+        self.redraw = False # Set when airodump reports added/removed/changed targets
 
         max_scan_time = Configuration.scan_time
 
@@ -37,6 +32,8 @@ class Scanner(object):
         # Loads airodump with interface/channel/etc from Configuration
         try:
             with Airodump() as airodump:
+                airodump.subscribe(self.on_targets_changed)
+
                 # Loop until interrupted (Ctrl+C)
                 scan_start_time = time()
 
@@ -45,6 +42,7 @@ class Scanner(object):
                         return  # Airodump process died
 
                     self.targets = airodump.get_targets(old_targets=self.targets)
+                    airodump.spill()  # Keep scanning on disk once tmpfs is full
 
                     if self.found_target():
                         return  # We found the target we want
@@ -56,47 +54,38 @@ class Scanner(object):
                     #     if target.bssid in airodump.decloaked_bssids:
                     #         target.decloaked = True
 
-                    current_hash = self.targets_hash()
-                    if current_hash != self.last_hash:
-                        self.print_targets()
-                        self.last_hash = current_hash
+                    if self.redraw:
+                        self.rows = self.target_rows()
+                        self.redraw = False
 
                     target_count = len(self.targets)
                     client_count = sum(len(t.clients) for t in self.targets)
 
-                    outline = '\r Scanning'
+                    outline = ' Scanning'
                     if airodump.decloaking:
                         outline += ' & decloaking'
                     outline += '. Found'
                     outline += ' %d target(s),' % target_count
                     outline += ' %d client(s).' % client_count
                     outline += ' Ctrl+C when ready '
-                    Color.clear_entire_line()
-                    self.print_update(outline)
+                    # Only rows that changed since the last second are redrawn
+                    self.renderer.render(self.rows + [outline])
 
                     if max_scan_time > 0 and time() > scan_start_time + max_scan_time:
                         return
 
-                    sleep(1)
+                    # Refresh as soon as airodump re-writes its CSV (at most 1 second)
+                    airodump.wait_for_files(1, endswith='.csv')
 
         except KeyboardInterrupt:
             pass
 
-    def print_update(self, text):
-        '''Clears enough lines for the new text, then prints it on the same line.'''
-        lines = text.count('\n') + 1  # Count how many lines we will need.
-        # Clear lines
-        print('\033[2K', end='')  # Clear the current line.
-        for _ in range(lines - 1):
-            print('\033[1A\033[2K', end='')  # Move up and clear line.
-        print('\r' + text, end='')  # Carriage return and print the new text.
-        sys.stdout.flush()  # Make sure the text appears immediately.
-        self.last_sameline_length = len(text)
-        
-    def targets_hash(self):
-        '''Generates a hash of the current targets list for comparison.'''
-        targets_str = ''.join([f'{target.bssid}{target.essid}{target.channel}' for target in self.targets])
-        return hashlib.md5(targets_str.encode()).hexdigest()
+    def on_targets_changed(self, diff):
+        '''Called by Airodump with a TargetDiff when the targets changed since the last refresh.'''
+        self.redraw = True
+        if Configuration.verbose > 1:
+            self.renderer.finish()
+            print(diff)
 
     def found_target(self):
         '''
@@ -128,52 +117,34 @@ class Scanner(object):
         return False
 
 
-    def print_targets(self):
-        '''Prints targets selection menu (1 target per row).'''
+    def target_rows(self):
+        '''Returns the targets selection menu as a list of rows (1 target per row).'''
         if len(self.targets) == 0:
-            self.print_update('\r')
-            return
-
-        output = ''
-        # terminal_height = Scanner.get_terminal_height()
-
-        # if self.previous_target_count > 0:
-        #     # We need to 'overwrite' the previous list of targets.
-        #     if Configuration.verbose <= 1:
-        #         # Don't clear screen buffer in verbose mode.
-        #         if self.previous_target_count > len(self.targets) or \
-        #            terminal_height < self.previous_target_count + 3:
-        #             # Either:
-        #             # 1) We have less targets than before, so we can't overwrite the previous list
-        #             # 2) The terminal can't display the targets without scrolling.
-        #             # Clear the screen.
-        #             Process.call('clear')
-        #         else:
-        #             # We can fit the targets in the terminal without scrolling
-        output = '\r'
-                    
+            return []
+
         # First row: columns
-        output += 'NUM                     ESSID               BSSID   CH  ENCR  POWER  WPS?  CLIENT\n'
+        rows = ['NUM                     ESSID               BSSID   CH  ENCR  POWER  WPS?  CLIENT']
         # Second row: separator
-        output += '---            --------------       -------------  ---  ----  -----  ----  ------\n'
+        rows.append('---            --------------       -------------  ---  ----  -----  ----  ------')
 
         for idx, target in enumerate(self.targets, start=1):
-            output += f"{str(idx).rjust(3)}  {target.to_str()}\n" 
-
+            rows.append(f"{str(idx).rjust(3)}  {target.to_str()}")
+        return rows
 
-        self.print_update(output.rstrip('\n'))
+    def print_targets(self):
+        '''Prints targets selection menu (1 target per row).'''
+        self.rows = self.target_rows()
+        self.renderer.render(self.rows)
 
 
     @staticmethod
     def get_terminal_height():
-        rows, _ = os.popen('stty size', 'r').read().split()
-        return int(rows)
+        return Terminal.get_height()
 
 
     @staticmethod
     def get_terminal_width():
-        _, columns = os.popen('stty size', 'r').read().split()
-        return int(columns)
+        return Terminal.get_width()
 
 
     def select_targets(self):
@@ -201,11 +172,12 @@ class Scanner(object):
 
         # Return all targets if user specified a wait time ('pillage').
         if Configuration.scan_time > 0:
+            self.renderer.finish()
             return self.targets
 
         # Ask user for targets.
         self.print_targets()
-        Color.clear_entire_line()
+        self.renderer.finish()
 
         if self.err_msg is not None:
             print(self.err_msg)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import selectors
+import time
+
+
+class LineSplitter(object):
+    '''
+        Splits chunks of output (bytes) into lines without decoding them. Both '\n' and '\r'
+        end a line (tools redraw progress lines with '\r'); empty lines are dropped.
+        A partial line longer than max_line bytes is cut, so memory stays bounded.
+    '''
+
+    def __init__(self, max_line=65536):
+        self.max_line = max_line
+        self.pending = b''  # Partial line from the previous chunk
+
+    def split(self, data):
+        '''Returns list of complete lines (bytes, without line endings) in pending + data.'''
+        lines = (self.pending + data).replace(b'\r', b'\n').split(b'\n')
+        self.pending = lines.pop()[-self.max_line:]
+        return [line for line in lines if line]
+
+    def flush(self):
+        '''Returns list with the remaining partial line (at EOF), or an empty list.'''
+        (pending, self.pending) = (self.pending, b'')
+        return [pending] if pending else []
+
+
+class RingBuffer(object):
+    '''Keeps the last `size` bytes written to it (e.g. a tool's output, for error messages).'''
+
+    def __init__(self, size=65536):
+        self.size = size
+        self.data = bytearray()
+
+    def write(self, data):
+        self.data += data
+        if len(self.data) > self.size:
+            # Deleting from the front of a bytearray does not copy the rest
+            del self.data[:len(self.data) - self.size]
+
+    def __len__(self):
+        return len(self.data)
+
+    def text(self):
+        return self.data.decode('utf-8', errors='replace')
+
+
+class Throttle(object):
+    '''Rate-limits UI updates: ready() is True at most once every `interval` seconds.'''
+
+    def __init__(self, interval=0.25):
+        self.interval = interval
+        self.last = 0
+
+    def ready(self, now=None):
+        now = time.time() if now is None else now
+        if now - self.last < self.interval:
+            return False
+        self.last = now
+        return True
+
+
+class LineStream(object):
+    '''
+        Reads a process' stdout (and drains its stderr) without blocking on either pipe,
+        yielding stdout lines as bytes. Only the last buffer_size bytes of output are kept
+        (see tail()), however long the process runs.
+
+            stream = LineStream(Process(command))
+            for line in stream:
+                ...
+    '''
+
+    def __init__(self, process, stderr=True, buffer_size=65536):
+        '''
+            Args:
+                process     - Process started with stdout=PIPE (and stderr=PIPE if stderr).
+                stderr      - Also read stderr (into the ring buffer), so the process never
+                              blocks writing to it.
+                buffer_size - Bytes of output kept for tail().
+        '''
+        self.process = process
+        self.buffer = RingBuffer(buffer_size)
+        self.splitter = LineSplitter(max_line=buffer_size)
+        self.pipes = [process.pid.stdout]
+        if stderr and process.pid.stderr is not None:
+            self.pipes.append(process.pid.stderr)
+
+    def __iter__(self):
+        return self.lines()
+
+    def lines(self, timeout=None):
+        '''
+            Yields stdout lines (bytes) until both pipes are closed (the process exited).
+            If timeout (seconds) is given, also yields None whenever nothing was read within it,
+            so callers can do other work while the process is quiet.
+        '''
+        selector = selectors.DefaultSelector()
+        stdout = self.process.pid.stdout.fileno()
+        for pipe in self.pipes:
+            selector.register(pipe.fileno(), selectors.EVENT_READ)
+        try:
+            while len(selector.get_map()) > 0:
+                events = selector.select(timeout)
+                if len(events) == 0:
+                    yield None  # Timed out
+                    continue
+                for (key, mask) in events:
+                    data = os.read(key.fd, 65536)
+                    if data == b'':
+                        selector.unregister(key.fd)  # EOF
+                        if key.fd == stdout:
+                            for line in self.splitter.flush():
+                                yield line
+                        continue
+                    self.buffer.write(data)
+                    if key.fd == stdout:
+                        for line in self.splitter.split(data):
+                            yield line
+        finally:
+            selector.close()
+
+    def tail(self):
+        '''Returns the last buffer_size bytes of output (stdout & stderr), decoded.'''
+        return self.buffer.text()
+
+
+if __name__ == '__main__':
+    # python -m byteBuggy.util.stream
+    # Streams 500,000 progress lines & checks memory stays flat.
+    import sys
+    import tracemalloc
+    from .process import Process
+    script = 'import sys\nfor i in range(500000): sys.stdout.write("%d/500000 keys tested\\r" % i)\n'
+    stream = LineStream(Process([sys.executable, '-c', script]))
+    throttle = Throttle(0.25)
+    (count, updates) = (0, 0)
+    tracemalloc.start()
+    start = time.time()
+    for line in stream:
+        count += 1
+        if throttle.ready():
+            updates += 1
+    elapsed = time.time() - start
+    print('%d lines in %0.2fs (%d UI updates), peak memory %dKB, tail %dKB' % (
+        count, elapsed, updates, tracemalloc.get_traced_memory()[1] / 1024, len(stream.buffer) / 1024))
@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import time
+
+
+class TempDirectory(object):
+    '''
+        byteBuggy's working directory (see Configuration.temp()).
+
+        Created on tmpfs (/dev/shm) when possible: airodump rewrites its CSV every
+        second and appends to its capture non-stop, which is slow on (and wears out)
+        SD cards. Bytes used are tracked per subsystem (by file name), and old
+        capture files are pruned once the directory grows past max_size. If that is
+        not enough, the directory is `full` and Configuration.spill_temp() moves on to
+        a new directory on disk.
+    '''
+
+    # Preferred locations, in order. None is the system default (usually /tmp).
+    BASES = ('/dev/shm', None)
+
+    # Bases that are backed by RAM.
+    MEMORY_BASES = ('/dev/shm',)
+
+    # Subsystem that writes files starting with each prefix.
+    SUBSYSTEMS = (
+        ('airodump', ('airodump', 'capture-', 'wpa-', 'wep-', 'handshake.')),
+        ('aireplay', ('aireplay_', 'replay_', 'fragment-')),
+        ('hashcat',  ('hashcat-', 'pmkid.', 'generated.')),
+        ('aircrack', ('wepkey', 'wpakey')),
+    )
+
+    # Files that can be pruned, and how long a file must be untouched before it is.
+    CAPTURE_SUFFIXES = ('.cap', '.pcapng', '.ivs', '.xor', '.csv', '.output', '.bak')
+    IDLE_SECONDS = 10
+
+    # Seconds between size checks (see check()).
+    CHECK_INTERVAL = 5
+
+    def __init__(self, path, max_size=0, in_memory=False):
+        '''
+            Args:
+                path      - Existing directory.
+                max_size  - Size cap in bytes (0 for no cap).
+                in_memory - True if the directory is on tmpfs.
+        '''
+        self.path = path if path.endswith(os.sep) else path + os.sep
+        self.max_size = max_size
+        self.in_memory = in_memory
+        self.keep_suffixes = ()  # Capture files that are never pruned (e.g. '.ivs' for --keep-ivs)
+        self.full = False        # Still over max_size after the last prune()
+        self.last_check = 0
+        self.warned = False
+
+    @staticmethod
+    def create(max_size=0, bases=BASES):
+        '''Creates a new directory on the first usable base (e.g. tmpfs), returns TempDirectory.'''
+        from tempfile import mkdtemp
+        for base in bases:
+            if base is not None and not (os.path.isdir(base) and os.access(base, os.W_OK | os.X_OK)):
+                continue
+            try:
+                return TempDirectory(mkdtemp(prefix='byteBuggy', dir=base), max_size,
+                                     in_memory=base in TempDirectory.MEMORY_BASES)
+            except OSError:
+                continue
+        return TempDirectory(mkdtemp(prefix='byteBuggy'), max_size)
+
+    @staticmethod
+    def subsystem(name):
+        '''Returns the subsystem (e.g. 'airodump') that writes a file, or 'other'.'''
+        for (subsystem, prefixes) in TempDirectory.SUBSYSTEMS:
+            if name.startswith(prefixes):
+                return subsystem
+        return 'other'
+
+    def files(self):
+        '''Yields tuple(path, name, size, mtime) of every file, including files in subdirectories.'''
+        for (directory, dirs, names) in os.walk(self.path):
+            for name in names:
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.lstat(path)
+                except OSError:
+                    continue  # Deleted meanwhile
+                yield (path, name, stat.st_size, stat.st_mtime)
+
+    def usage(self):
+        '''Returns dict of subsystem -> bytes used.'''
+        usage = {}
+        for (path, name, size, mtime) in self.files():
+            subsystem = TempDirectory.subsystem(name)
+            usage[subsystem] = usage.get(subsystem, 0) + size
+        return usage
+
+    def check(self):
+        '''Calls prune() at most once every CHECK_INTERVAL seconds. Cheap enough to call in loops.'''
+        if self.max_size <= 0 or time.time() - self.last_check < TempDirectory.CHECK_INTERVAL:
+            return []
+        self.last_check = time.time()
+        return self.prune()
+
+    def prune(self):
+        '''
+            Deletes the oldest idle capture files until the directory is under max_size.
+            Files that are still being written (modified within IDLE_SECONDS), or that
+            end with keep_suffixes, are kept. Returns list of deleted paths.
+        '''
+        if self.max_size <= 0:
+            return []
+        files = list(self.files())
+        total = sum(size for (path, name, size, mtime) in files)
+        deleted = []
+        now = time.time()
+        for (path, name, size, mtime) in sorted(files, key=lambda f: f[3]):
+            if total <= self.max_size:
+                break
+            if now - mtime < TempDirectory.IDLE_SECONDS or not name.endswith(TempDirectory.CAPTURE_SUFFIXES):
+                continue
+            if name.endswith(self.keep_suffixes):
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            deleted.append(path)
+
+        self.full = total > self.max_size
+        if self.full and not self.warned:
+            self.warned = True
+            usage = ', '.join('%s %0.1fMB' % (subsystem, size / 1048576.0)
+                              for (subsystem, size) in sorted(self.usage().items()))
+            print('\n Warning: %s uses %0.1fMB, over the %0.1fMB cap (%s)%s' % (
+                self.path, total / 1048576.0, self.max_size / 1048576.0, usage,
+                ', moving to disk' if self.in_memory else ''))
+        elif total <= self.max_size:
+            self.warned = False
+        return deleted
+
+    def delete(self):
+        '''Removes the directory and everything in it (including subdirectories).'''
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    temp = TempDirectory.create()
+    print('Created %s' % temp.path)
+    with open(os.path.join(temp.path, 'airodump-01.csv'), 'w') as fid:
+        fid.write('BSSID\n')
+    print('Usage: %s' % temp.usage())
+    temp.delete()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+
+
+class Terminal(object):
+    '''
+        Terminal size & capabilities. The size is read once (ioctl, no subprocess)
+        and only read again after the terminal is resized (SIGWINCH).
+    '''
+
+    # (rows, columns), None until first requested or after a SIGWINCH
+    size = None
+    previous_handler = None
+    handler_installed = False
+
+    @staticmethod
+    def is_tty(stream=None):
+        '''Returns True if stream (default: stdout) is a terminal that understands cursor movement.'''
+        stream = sys.stdout if stream is None else stream
+        try:
+            return stream.isatty() and os.environ.get('TERM') != 'dumb'
+        except (AttributeError, ValueError):
+            return False
+
+    @classmethod
+    def get_size(cls):
+        '''Returns tuple(rows, columns); 24x80 if the size can not be determined.'''
+        if cls.size is None:
+            import shutil
+            (columns, rows) = shutil.get_terminal_size(fallback=(80, 24))
+            cls.size = (rows, columns)
+            cls.install_handler()
+        return cls.size
+
+    @classmethod
+    def get_height(cls):
+        return cls.get_size()[0]
+
+    @classmethod
+    def get_width(cls):
+        return cls.get_size()[1]
+
+    @classmethod
+    def install_handler(cls):
+        '''Invalidates the cached size on SIGWINCH (chaining any existing handler).'''
+        if cls.handler_installed:
+            return
+        import signal
+        import threading
+        if not hasattr(signal, 'SIGWINCH') or threading.current_thread() is not threading.main_thread():
+            return  # Signal handlers can only be set from the main thread
+        cls.previous_handler = signal.signal(signal.SIGWINCH, cls.on_resize)
+        cls.handler_installed = True
+
+    @classmethod
+    def on_resize(cls, signum, frame):
+        cls.size = None
+        if callable(cls.previous_handler):
+            cls.previous_handler(signum, frame)
+
+
+class TableRenderer(object):
+    '''
+        Draws a block of lines (e.g. the target table & a status line) that is redrawn in place.
+        The last frame is kept, and only rows whose text changed are rewritten.
+        When the output is not a terminal, changed rows are appended as plain lines instead.
+    '''
+
+    def __init__(self, stream=None, tty=None):
+        self.stream = sys.stdout if stream is None else stream
+        self.tty = Terminal.is_tty(self.stream) if tty is None else tty
+        self.rows = []  # Rows of the last frame, as drawn
+
+    def render(self, rows):
+        '''Draws rows (list of str, without newlines), replacing the previous frame.'''
+        if len(rows) == 0:
+            rows = ['']
+        if self.tty:
+            width = Terminal.get_width()
+            # Rows wider than the terminal would wrap & break cursor movement
+            rows = [row[:width - 1] for row in rows]
+            output = self.frame(rows)
+        else:
+            output = ''.join('%s\n' % row for (i, row) in enumerate(rows)
+                             if i >= len(self.rows) or self.rows[i] != row)
+        self.rows = rows
+        if output:
+            self.stream.write(output)
+            self.stream.flush()
+
+    def frame(self, rows):
+        '''Returns the escape sequences & text that turn the previous frame into rows.'''
+        previous = self.rows
+        if len(previous) == 0:
+            return '\r\033[2K' + '\n'.join(rows)
+
+        # The cursor is at the end of the previous frame's last row
+        output = []
+        if len(previous) > 1:
+            output.append('\033[%dF' % (len(previous) - 1))  # Up to the first row
+        else:
+            output.append('\r')
+
+        for (i, row) in enumerate(rows):
+            if i > 0:
+                # Next row. Newlines (not cursor-down) past the old frame, so the terminal scrolls.
+                output.append('\033[1E' if i < len(previous) else '\n')
+            if i >= len(previous) or previous[i] != row:
+                output.append('\033[2K' + row)
+            elif i == len(rows) - 1:
+                output.append('\033[%dG' % (len(row) + 1))  # Leave the cursor after the text
+
+        # Clear rows of the previous frame that are no longer used, then go back up
+        extra = len(previous) - len(rows)
+        if extra > 0:
+            for i in range(extra):
+                output.append('\033[1E\033[2K')
+            output.append('\033[%dF' % extra)
+            output.append('\033[%dG' % (len(rows[-1]) + 1))
+        return ''.join(output)
+
+    def finish(self):
+        '''Ends the frame: following output starts on a new line and the next render starts over.'''
+        if self.tty and len(self.rows) > 0:
+            self.stream.write('\n')
+            self.stream.flush()
+        self.rows = []
+
+
+if __name__ == '__main__':
+    import time
+    renderer = TableRenderer()
+    print('Terminal: %d rows, %d columns, tty: %s' % (Terminal.get_size() + (renderer.tty,)))
+    for second in range(5):
+        renderer.render(['row 1: unchanged', 'row 2: %d' % second, 'status: %d/5' % (second + 1)])
+        time.sleep(1)
+    renderer.finish()
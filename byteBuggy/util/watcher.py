@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import select
+import struct
+import time
+
+
+class FileWatcher(object):
+    '''
+        Wakes up when files in a directory are created or modified, so loops that wait
+        for airodump/aireplay/hcxdumptool output do not have to sleep & re-list the directory.
+        Uses Linux inotify (through ctypes, no extra dependency); falls back to polling
+        the directory's files (stat) every POLL_INTERVAL seconds.
+
+        Only files whose name starts with `prefix` and ends with one of `suffixes` are tracked.
+    '''
+
+    # Capture & output files written by the tools byteBuggy runs
+    SUFFIXES = ('.csv', '.cap', '.ivs', '.pcapng', '.xor', '.output')
+
+    # Seconds between directory scans when inotify is not available
+    POLL_INTERVAL = 0.25
+
+    # inotify(7) constants
+    IN_MODIFY      = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM  = 0x00000040
+    IN_MOVED_TO    = 0x00000080
+    IN_CREATE      = 0x00000100
+    IN_DELETE      = 0x00000200
+    IN_Q_OVERFLOW  = 0x00004000
+    IN_NONBLOCK    = 0o4000
+    IN_CLOEXEC     = 0o2000000
+    EVENT = struct.Struct('iIII')  # wd, mask, cookie, len (followed by the name)
+
+    def __init__(self, directory, prefix='', suffixes=SUFFIXES, inotify=True):
+        '''
+            Args:
+                inotify - False to always poll (e.g. for tests).
+        '''
+        self.directory = directory
+        self.prefix = prefix
+        self.suffixes = tuple(suffixes)
+        self.fd = FileWatcher.inotify_init(directory) if inotify else None
+        self.stats = {}  # Name -> tuple(mtime, size) of tracked files (polling) or None (inotify)
+        self.pending = set()  # Names changed according to events drained by files(), for the next wait()
+        self.last_poll = time.time()
+        for name in self.list_directory():
+            self.stats[name] = self.stat(name)
+
+    @staticmethod
+    def inotify_init(directory):
+        '''Returns an inotify fd watching the directory, or None if inotify is not available.'''
+        try:
+            import ctypes
+            import ctypes.util
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            fd = libc.inotify_init1(FileWatcher.IN_NONBLOCK | FileWatcher.IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None  # Not Linux, or no inotify in libc
+        if fd < 0:
+            return None
+        mask = FileWatcher.IN_MODIFY | FileWatcher.IN_CLOSE_WRITE | FileWatcher.IN_CREATE | \
+               FileWatcher.IN_DELETE | FileWatcher.IN_MOVED_FROM | FileWatcher.IN_MOVED_TO
+        if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+            os.close(fd)
+            return None
+        return fd
+
+    @property
+    def uses_inotify(self):
+        return self.fd is not None
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def matches(self, name):
+        return name.startswith(self.prefix) and name.endswith(self.suffixes)
+
+    def list_directory(self):
+        try:
+            return [name for name in os.listdir(self.directory) if self.matches(name)]
+        except OSError:
+            return []
+
+    def stat(self, name):
+        if self.fd is not None:
+            return None  # inotify reports changes, no need to compare stats
+        try:
+            stat = os.stat(os.path.join(self.directory, name))
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def files(self, endswith=None):
+        '''Returns list of paths of tracked files that currently exist (no directory listing with inotify).'''
+        if self.fd is not None:
+            # Files created since the last wait() (e.g. airodump's first CSV) are only known from the queued events
+            self.pending.update(self.read_events(0))
+        elif time.time() - self.last_poll >= FileWatcher.POLL_INTERVAL:
+            self.pending.update(self.poll())
+        return [os.path.join(self.directory, name) for name in sorted(self.stats)
+                if endswith is None or name.endswith(endswith)]
+
+    def wait(self, timeout, endswith=None):
+        '''
+            Blocks until a tracked file (ending with `endswith`, if given) is created or
+            modified, or until timeout (seconds) passes.
+            Returns:
+                Set of paths that changed; empty if the timeout passed without changes.
+        '''
+        end_time = time.time() + max(0, timeout)
+        while True:
+            remaining = end_time - time.time()
+            wait_time = 0 if self.pending else max(0, remaining)
+            if self.fd is not None:
+                names = self.read_events(wait_time)
+            else:
+                names = self.poll(wait_time)
+            names.update(self.pending.intersection(self.stats))  # Minus files deleted since
+            self.pending = set()
+            changed = set(os.path.join(self.directory, name) for name in names
+                          if endswith is None or name.endswith(endswith))
+            if len(changed) > 0 or time.time() >= end_time:
+                return changed
+
+    def read_events(self, timeout):
+        '''Returns set of names created/modified according to inotify events received within timeout.'''
+        (readable, _, _) = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        names = set()
+        # Writes usually generate several events; read everything queued in one go
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset + FileWatcher.EVENT.size <= len(data):
+                (wd, mask, cookie, length) = FileWatcher.EVENT.unpack_from(data, offset)
+                offset += FileWatcher.EVENT.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+                offset += length
+                if mask & FileWatcher.IN_Q_OVERFLOW:
+                    # Events were dropped: re-sync & report everything
+                    self.stats = dict((name, None) for name in self.list_directory())
+                    names.update(self.stats)
+                    continue
+                if not self.matches(name):
+                    continue
+                if mask & (FileWatcher.IN_DELETE | FileWatcher.IN_MOVED_FROM):
+                    self.stats.pop(name, None)
+                    self.pending.discard(name)
+                    names.discard(name)
+                else:
+                    self.stats[name] = None
+                    names.add(name)
+        return names
+
+    def poll(self, timeout=0):
+        '''Polling fallback: returns set of names whose mtime/size changed, checking until timeout.'''
+        end_time = time.time() + timeout
+        while True:
+            names = set()
+            stats = {}
+            for name in self.list_directory():
+                stats[name] = self.stat(name)
+                if self.stats.get(name) != stats[name] or name not in self.stats:
+                    names.add(name)
+            self.stats = stats
+            self.last_poll = time.time()
+            remaining = end_time - time.time()
+            if len(names) > 0 or remaining <= 0:
+                return names
+            time.sleep(min(FileWatcher.POLL_INTERVAL, remaining))
@@ -26,11 +26,12 @@ def contact_us():
 def help():
     from ..config import Configuration
     from ..args import Arguments
-    
-    config = Configuration
-    args = Arguments(config)
 
-    help_text = args.get_help_text()
+    if not Configuration.initialized:
+        Configuration.load_defaults()  # Defaults shown in the help text
+
+    # Formatted once, then served from Arguments' cache
+    help_text = Arguments.help_text(Configuration)
     return render_template('help.html', help_text=help_text)
 
 @app.route('/run-command', methods=['POST'])
@@ -4,7 +4,8 @@
 import sys
 sys.path.insert(0, '..')
 
-from byteBuggy.tools.airodump import Airodump
+from byteBuggy.tools.airodump import Airodump, AirodumpCsv, CaptureSession, CaptureView
+from byteBuggy.config import Configuration
 
 import unittest
 
@@ -40,6 +41,150 @@ class TestAirodump(unittest.TestCase):
         assert target.essid_len == 19, 'ESSID length shold be 19, but got %s' % target.essid_len
 
 
+    def test_airodump_csv_reload(self):
+        import os, shutil, tempfile
+        temp_dir = tempfile.mkdtemp()
+        try:
+            csv_filename = os.path.join(temp_dir, 'airodump-01.csv')
+            shutil.copy(self.getFile('airodump-weird-ssids.csv'), csv_filename)
+            csv = AirodumpCsv(csv_filename)
+
+            (targets, changed) = csv.load()
+            assert changed, 'First load should report a change'
+            assert len(targets) == 5, 'Expected 5 targets, got %d' % len(targets)
+
+            (again, changed) = csv.load()
+            assert not changed, 'Unchanged file should not be re-parsed'
+            assert again is targets
+
+            # Re-written with the same contents (new mtime): read, but not parsed
+            with open(csv_filename, 'rb') as fid:
+                data = fid.read()
+            with open(csv_filename, 'wb') as fid:
+                fid.write(data)
+            os.utime(csv_filename, ns=(0, 0))
+            (again, changed) = csv.load()
+            assert not changed, 'Identical contents should not be re-parsed'
+
+            # One target changed: only its row is parsed again, the other Targets are re-used
+            lines = data.split(b'\n')
+            for (i, line) in enumerate(lines):
+                if b'Comma\\, Trailing space ' in line:
+                    lines[i] = line.replace(b'Comma\\, Trailing space ', b'Renamed')
+            with open(csv_filename, 'wb') as fid:
+                fid.write(b'\n'.join(lines))
+            (updated, changed) = csv.load()
+            assert changed
+            assert len(updated) == 5
+            assert updated[0] is targets[0], 'Unchanged row should re-use its Target'
+            assert updated[2] is not targets[2]
+            assert updated[2].essid == 'Renamed', 'Expected ESSID (Renamed) but got (%s)' % updated[2].essid
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+    def test_filter_targets(self):
+        targets = Airodump.get_targets_from_csv(self.getFile('airodump.csv'))
+        Configuration.target_bssid = Configuration.target_essid = Configuration.ignore_essid = None
+        Configuration.clients_only = False
+        Configuration.encryption_filter = ['WEP', 'WPA', 'WPS']
+
+        filtered = Airodump.filter_targets(targets)
+        assert filtered == [t for t in targets if t.encryption in ('WEP', 'WPA')]
+
+        Configuration.encryption_filter = ['WEP']
+        assert Airodump.filter_targets(targets) == [t for t in targets if t.encryption == 'WEP']
+        assert Airodump.filter_targets(targets, skip_wps=True) == targets
+        Configuration.encryption_filter = ['WEP', 'WPA', 'WPS']
+
+        essid = [t.essid for t in filtered if t.essid is not None][0]
+        Configuration.ignore_essid = essid.upper()
+        assert essid not in [t.essid for t in Airodump.filter_targets(targets)]
+        Configuration.ignore_essid = None
+
+        Configuration.target_bssid = filtered[0].bssid.lower()
+        assert Airodump.filter_targets(targets) == [filtered[0]]
+        Configuration.target_bssid = None
+
+        Configuration.clients_only = True
+        assert all([len(t.clients) > 0 for t in Airodump.filter_targets(targets)])
+        Configuration.clients_only = False
+
+
+    def test_capture_view(self):
+        saved = dict((name, Configuration.__dict__.get(name))
+                     for name in ('initialized', 'five_ghz', 'no_deauth'))  # Restored below
+        Configuration.initialized = True  # Airodump() would parse sys.argv otherwise
+        Configuration.five_ghz = False
+        Configuration.no_deauth = True
+        try:
+            # Session that is not started: airodump's CSV is the test file
+            session = CaptureSession('wlan0mon', 11)
+            session.airodump.csv = AirodumpCsv(self.getFile('airodump.csv'))
+            all_targets = Airodump.get_targets_from_csv(self.getFile('airodump.csv'))
+            (first, second) = (all_targets[0].bssid, all_targets[1].bssid)
+
+            view = CaptureView(11, first.lower(), session=session)
+            diffs = []
+            view.subscribe(diffs.append)
+            other = CaptureView(11, second, session=session)
+            other.get_targets()
+
+            targets = view.get_targets()
+            assert [t.bssid for t in targets] == [first], 'View should only see its BSSID'
+            assert view.target_index.get(first) is targets[0]
+            assert second not in view.target_index
+            assert len(session.airodump.targets) == len(all_targets), 'Session should keep every target'
+
+            # The other view's refresh reported every target; this view only heard of its own
+            assert len(diffs) == 1 and [t.bssid for t in diffs[0].added] == [first]
+            assert list(diffs[0].snapshots) == [first.upper()]
+
+            view.unsubscribe(diffs.append)
+            assert len(session.airodump.subscribers) == 0
+        finally:
+            for (name, value) in saved.items():
+                if value is None:
+                    delattr(Configuration, name)  # Only set by Configuration.initialize()
+                else:
+                    setattr(Configuration, name, value)
+
+
+    def test_capture_options(self):
+        from byteBuggy.model.attack import Attack
+        names = ('initialized', 'interface', 'five_ghz', 'target_channel')
+        saved = dict((name, Configuration.__dict__[name]) for name in names if name in Configuration.__dict__)
+        Configuration.initialized = True
+        Configuration.interface = 'wlan0mon'
+        Configuration.five_ghz = False
+        Configuration.target_channel = None
+        target = Airodump.get_targets_from_csv(self.getFile('airodump.csv'))[0]
+        attack = Attack(target)
+        CaptureSession.shared = True
+        try:
+            # WPA's options are the session's: a view of it
+            CaptureSession.active = session = CaptureSession('wlan0mon', target.channel)
+            assert isinstance(attack.capture(skip_wps=True, output_file_prefix='wpa'), CaptureView)
+            assert CaptureSession.active is session
+
+            # WEP only captures IVs, and keeps them with --keep-ivs: an Airodump of its own
+            airodump = attack.capture(ivs_only=True, skip_wps=True, output_file_prefix='wep',
+                                      delete_existing_files=False)
+            assert isinstance(airodump, Airodump)
+            assert airodump.ivs_only and airodump.capture_extension == '.ivs'
+            assert airodump.output_file_prefix == 'wep' and not airodump.delete_existing_files
+            assert airodump.target_bssid == target.bssid and airodump.channel == target.channel
+            assert CaptureSession.active is None, 'Session should be stopped for the interface'
+        finally:
+            CaptureSession.shared = False
+            CaptureSession.active = None
+            for name in names:
+                if name in saved:
+                    setattr(Configuration, name, saved[name])
+                else:
+                    delattr(Configuration, name)  # Only set by Configuration.initialize()
+
+
     def getFile(self, filename):
         ''' Helper method to parse targets from filename '''
         import os, inspect
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+sys.path.insert(0, '..')
+
+from byteBuggy.model.handshake import Handshake
+from byteBuggy.model.pmkid import PmkidTracker
+from byteBuggy.tools.cpucrack import CpuCrack, HandshakeHash, PmkidHash
+
+import unittest
+
+class TestCpuCrack(unittest.TestCase):
+    ''' Test suite for the built-in CPU cracker '''
+
+    def getFile(self, filename):
+        ''' Helper method to find files in tests/files '''
+        import os, inspect
+        this_file = os.path.abspath(inspect.getsourcefile(self.getFile))
+        this_dir = os.path.dirname(this_file)
+        return os.path.join(this_dir, 'files', filename)
+
+    def setUp(self):
+        import tempfile
+        (fd, self.wordlist) = tempfile.mkstemp(suffix='.txt')
+        with open(fd, 'wb') as fid:
+            fid.write(b'short\n12345678\npassword\r\nsunshine\niloveyou1\npassword1\n')
+
+    def tearDown(self):
+        import os
+        os.remove(self.wordlist)
+
+    def testPassphrases(self):
+        passphrases = list(CpuCrack.passphrases(self.wordlist))
+        assert(passphrases == [b'12345678', b'password', b'sunshine', b'iloveyou1', b'password1'])
+        chunks = list(CpuCrack.chunks(passphrases, 2))
+        assert([len(chunk) for chunk in chunks] == [2, 2, 1])
+
+    def testCrackHandshake(self):
+        hs = Handshake(self.getFile('handshake_has_iloveyou1.cap'), bssid='02:00:00:00:00:01')
+        target = HandshakeHash.from_handshake(hs)
+        assert(target.essid == b'byteBuggy')
+        assert(not target.verify(CpuCrack.pmk(b'password', target.essid)))
+        progress = []
+        key = CpuCrack.crack(target, self.wordlist, processes=2,
+                             progress=lambda tried, kps: progress.append(tried))
+        assert(key == 'iloveyou1')
+        assert(len(progress) > 0)
+
+    def testCrackPmkid(self):
+        tracker = PmkidTracker(self.getFile('pmkid_has_iloveyou1.pcapng'), bssid='02:00:00:00:00:01')
+        target = PmkidHash.from_line(tracker.update())
+        assert(CpuCrack.crack(target, self.wordlist, processes=1) == 'iloveyou1')
+
+    def testCrackNotInWordlist(self):
+        hs = Handshake(self.getFile('handshake_has_iloveyou1.cap'), bssid='02:00:00:00:00:01')
+        target = HandshakeHash.from_handshake(hs)
+        with open(self.wordlist, 'wb') as fid:
+            fid.write(b'password\nsunshine\n')
+        assert(CpuCrack.crack(target, self.wordlist, processes=1) is None)
+
+    def testCrackWithStatusPmkStore(self):
+        import io, os, shutil, tempfile
+        from byteBuggy.config import Configuration
+        from byteBuggy.util.pmkdb import PmkDatabase
+        hs = Handshake(self.getFile('handshake_has_iloveyou1.cap'), bssid='02:00:00:00:00:01')
+        target = HandshakeHash.from_handshake(hs)
+        pmk_dir = os.path.join(tempfile.mkdtemp(), 'pmk')
+        saved = dict((name, Configuration.__dict__.get(name))
+                     for name in ('wordlist', 'wpa_pmk_dir', 'wpa_pmk_store'))
+        (Configuration.wordlist, Configuration.wpa_pmk_dir) = (self.wordlist, pmk_dir)
+        stdout = sys.stdout
+        try:
+            sys.stdout = io.StringIO()
+            Configuration.wpa_pmk_store = False
+            assert(CpuCrack.crack_with_status(target, 'WPA Handshake') == 'iloveyou1')
+            assert(not os.path.exists(pmk_dir)), 'PMKs should only be stored with --pmk-store'
+
+            Configuration.wpa_pmk_store = True
+            assert(CpuCrack.crack_with_status(target, 'WPA Handshake') == 'iloveyou1')
+            output = sys.stdout.getvalue()
+        finally:
+            sys.stdout = stdout
+            for (name, value) in saved.items():
+                if value is None:
+                    delattr(Configuration, name)
+                else:
+                    setattr(Configuration, name, value)
+        try:
+            assert(output.count('\n') <= 2), 'Progress should stay on one line: %r' % output
+            assert('keys/s' in output)
+            with PmkDatabase.open(pmk_dir, b'byteBuggy', self.wordlist) as db:
+                assert(len(db) == 4)  # Up to & including the key
+        finally:
+            shutil.rmtree(os.path.dirname(pmk_dir))
+
+    def testCrackHelperPmkidWithoutHashcat(self):
+        import io, os
+        from byteBuggy.config import Configuration
+        from byteBuggy.tools.registry import ToolRegistry
+        from byteBuggy.util.crack import CrackHelper
+        tracker = PmkidTracker(self.getFile('pmkid_has_iloveyou1.pcapng'), bssid='02:00:00:00:00:01')
+        pmkid_file = self.wordlist + '.16800'
+        with open(pmkid_file, 'w') as fid:
+            fid.write(tracker.update() + '\n')
+        saved = dict((name, Configuration.__dict__.get(name))
+                     for name in ('wordlist', 'wpa_pmk_dir', 'wpa_pmk_store'))
+        saved_paths = dict(ToolRegistry.paths)
+        stdout = sys.stdout
+        try:
+            (Configuration.wordlist, Configuration.wpa_pmk_store) = (self.wordlist, False)
+            Configuration.wpa_pmk_dir = self.wordlist + '.pmk'  # Not created without --pmk-store
+            ToolRegistry.paths['hashcat'] = None  # Not installed
+            sys.stdout = io.StringIO()
+            hs = {'filename': pmkid_file, 'bssid': '02:00:00:00:00:01', 'essid': 'byteBuggy'}
+            result = CrackHelper.crack_pmkid(hs, 'aircrack')  # Also the default for unknown tools
+        finally:
+            sys.stdout = stdout
+            ToolRegistry.paths.clear()
+            ToolRegistry.paths.update(saved_paths)
+            for (name, value) in saved.items():
+                if value is None:
+                    delattr(Configuration, name)
+                else:
+                    setattr(Configuration, name, value)
+            os.remove(pmkid_file)
+        assert(result is not None and result.key == 'iloveyou1')
+
+
+if __name__ == '__main__':
+    unittest.main()
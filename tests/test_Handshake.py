@@ -4,7 +4,7 @@
 import sys
 sys.path.insert(0, '..')
 
-from byteBuggy.model.handshake import Handshake
+from byteBuggy.model.handshake import EapolKey, Handshake, HandshakeTracker
 from byteBuggy.util.process import Process
 
 import unittest
@@ -27,6 +27,137 @@ class TestHandshake(unittest.TestCase):
         except Exception:
             self.fail()
 
+    def testHandshakeEapol(self):
+        hs_file = self.getFile('handshake_exists.cap')
+        hs = Handshake(hs_file, bssid='A4:2B:8C:16:6B:3A')
+        assert(hs.has_handshake())
+        assert(hs.eapol_handshakes() == [('A4:2B:8C:16:6B:3A', None)])
+
+    def testHandshakeEapolWithoutBssid(self):
+        hs_file = self.getFile('handshake_has_1234.cap')
+        hs = Handshake(hs_file)
+        assert(hs.eapol_handshakes() == [('18:D6:C7:6D:6B:18', None)])
+
+    def testHandshakeEapolWrongBssid(self):
+        hs_file = self.getFile('handshake_exists.cap')
+        hs = Handshake(hs_file, bssid='00:11:22:33:44:55')
+        assert(not hs.has_handshake())
+
+    def testHandshakeEapolNotExists(self):
+        hs_file = self.getFile('handshake_not_exists.cap')
+        hs = Handshake(hs_file, bssid='00:1D:D5:9B:11:00')
+        assert(not hs.has_handshake())
+        # Only contains a lone M1
+        assert([key.message for key in hs.eapol_keys()] == [1])
+
+    def testHandshakeEapolPcapng(self):
+        hs_file = self.getFile('handshake_exists.cap.stripped.tshark')
+        hs = Handshake(hs_file)
+        assert(hs.has_handshake())
+
+    def testHandshakeEapolMessagePairs(self):
+        hs_file = self.getFile('handshake_has_1234.cap')
+        hs = Handshake(hs_file, bssid='18:D6:C7:6D:6B:18')
+        pairs = hs.eapol_message_pairs()
+        assert([(a.message, b.message) for (a, b) in pairs] == [(1, 2), (1, 2), (2, 3)])
+        # M2 is paired with the M1 that immediately preceded it (same ANonce as M3)
+        m1, m2 = pairs[1]
+        m2_again, m3 = pairs[2]
+        assert(m2 is m2_again)
+        assert(m1.nonce == m3.nonce)
+
+    def testEapolKeyMalformed(self):
+        # EAPOL-Key (RSN) frame of 120 bytes declaring a 10 byte body: ignored, not a struct.error
+        frame = bytearray(120)
+        frame[0:5] = bytes([2, 3, 0, 10, 2])
+        frame[5:7] = bytes([0x00, 0x8a])  # Pairwise + ACK: would be M1
+        addr1 = bytes.fromhex('020000000001')
+        addr2 = bytes.fromhex('020000000002')
+        assert EapolKey.from_eapol(bytes(frame), addr1, addr2) is None
+
+        frame[2:4] = bytes([0, 116])  # Declared length that covers the key fields
+        key = EapolKey.from_eapol(bytes(frame), addr1, addr2)
+        assert key is not None and key.message == 1
+        assert EapolKey.from_eapol(bytes(frame[:98]), addr1, addr2) is None  # Truncated
+
+    def testHandshakeTrackerIncremental(self):
+        import os, shutil, tempfile
+        with open(self.getFile('handshake_exists.cap'), 'rb') as fid:
+            data = fid.read()
+        temp_dir = tempfile.mkdtemp()
+        try:
+            capfile = os.path.join(temp_dir, 'wpa-01.cap')
+            tracker = HandshakeTracker(capfile, bssid='a4:2b:8c:16:6b:3a')
+            assert(not tracker.update())  # File does not exist yet
+
+            # Write the capture in small chunks, splitting records in half
+            found = False
+            for end in range(500, len(data) + 500, 500):
+                with open(capfile, 'ab') as fid:
+                    fid.write(data[end - 500:end])
+                found = tracker.update()
+                if found:
+                    break
+            assert(found)
+            assert(tracker.reader.offset <= os.path.getsize(capfile))
+            assert(tracker.essid == 'Test Router Please Ignore')
+
+            handshake = tracker.snapshot(os.path.join(temp_dir, 'handshake.cap'))
+            assert(handshake.has_handshake())
+
+            # Re-created capture file (e.g. airodump restarted) starts over
+            os.remove(capfile)
+            with open(capfile, 'wb') as fid:
+                fid.write(data[:24])
+            assert(not tracker.update())
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def testHashcatHash(self):
+        import hashlib, hmac
+        hs = Handshake(self.getFile('handshake_has_iloveyou1.cap'), bssid='02:00:00:00:00:01')
+        fields = hs.hashcat_hash().split('*')
+        assert(fields[:2] == ['WPA', '02'])
+        (mic, ap, sta, essid, anonce, eapol, pair) = fields[2:]
+        assert(bytes.fromhex(essid) == b'byteBuggy')
+        assert(pair == '%02x' % Handshake.MESSAGE_PAIR_M32E2)
+        # Recompute the MIC from the known PSK
+        (ap, sta) = (bytes.fromhex(ap), bytes.fromhex(sta))
+        (anonce, eapol) = (bytes.fromhex(anonce), bytes.fromhex(eapol))
+        snonce = eapol[17:49]
+        pmk = hashlib.pbkdf2_hmac('sha1', b'iloveyou1', b'byteBuggy', 4096, 32)
+        data = b'Pairwise key expansion\x00' + min(ap, sta) + max(ap, sta) + \
+               min(anonce, snonce) + max(anonce, snonce) + b'\x00'
+        kck = hmac.new(pmk, data, hashlib.sha1).digest()[:16]
+        assert(hmac.new(kck, eapol, hashlib.sha1).digest()[:16].hex() == mic)
+
+    def testHashEssidNotUtf8(self):
+        # Same capture, but the AP broadcasts an ESSID that is not UTF-8
+        import os, shutil, tempfile
+        temp_dir = tempfile.mkdtemp()
+        try:
+            capfile = os.path.join(temp_dir, 'handshake.cap')
+            with open(self.getFile('handshake_has_1234.cap'), 'rb') as fid:
+                data = fid.read()
+            with open(capfile, 'wb') as fid:
+                fid.write(data.replace(b'YZWifi', b'YZWif\xff'))
+
+            hs = Handshake(capfile, bssid='18:D6:C7:6D:6B:18', essid='YZWif\ufffd')
+            assert(hs.hash_essid() == b'YZWif\xff')
+            assert(hs.hashcat_hash().split('*')[5] == b'YZWif\xff'.hex())
+            assert(hs.bssid_essid_pairs() == [('18:D6:C7:6D:6B:18', 'YZWif\ufffd')])  # Display
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def testHccapx(self):
+        hs = Handshake(self.getFile('handshake_has_iloveyou1.cap'), bssid='02:00:00:00:00:01')
+        hccapx = hs.hccapx()
+        assert(len(hccapx) == 393)
+        fields = Handshake.HCCAPX_FORMAT.unpack(hccapx)
+        assert(fields[0] == Handshake.HCCAPX_SIGNATURE)
+        assert(fields[4][:fields[3]] == b'byteBuggy')
+        assert(fields[6].hex() == hs.hashcat_hash().split('*')[2])
+
     @unittest.skipUnless(Process.exists('tshark'), 'tshark is missing')
     def testHandshakeTshark(self):
         hs_file = self.getFile('handshake_exists.cap')
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+sys.path.insert(0, '..')
+
+from byteBuggy.model.handshake import Handshake
+from byteBuggy.model.pmkid import PmkidTracker
+from byteBuggy.tools.hashcat import Hashcat, HashcatStatus
+
+import unittest
+
+class TestHashcat(unittest.TestCase):
+    ''' Test suite for building & parsing hashcat -m 22000 batches '''
+
+    def getFile(self, filename):
+        ''' Helper method to find files in tests/files '''
+        import os, inspect
+        this_file = os.path.abspath(inspect.getsourcefile(self.getFile))
+        this_dir = os.path.dirname(this_file)
+        return os.path.join(this_dir, 'files', filename)
+
+    def testPmkidHashLine(self):
+        tracker = PmkidTracker(self.getFile('pmkid_has_iloveyou1.pcapng'), bssid='02:00:00:00:00:01')
+        pmkid_hash = tracker.update()
+        line = Hashcat.pmkid_hash_line(pmkid_hash)
+        fields = line.split('*')
+        assert(fields[:2] == ['WPA', '01'])
+        assert(fields[2:6] == pmkid_hash.split('*'))
+        assert(len(fields) == 9)
+
+    def testParseCracked(self):
+        hs = Handshake(self.getFile('handshake_has_iloveyou1.cap'), bssid='02:00:00:00:00:01')
+        handshake_line = hs.hashcat_hash()
+        pmkid_line = 'WPA*01*b579b8016c6b982a660ae43352ae142c*020000000001*020000000002*%s***' % \
+                b'my:net'.hex()
+        mic = handshake_line.split('*')[2]
+        stdout = '\n'.join([
+            '%s:020000000001:020000000002:byteBuggy:iloveyou1' % mic,
+            'b579b8016c6b982a660ae43352ae142c:020000000001:020000000002:my:net:pass:word',
+            'ffffffffffffffffffffffffffffffff:020000000003:020000000004:other:unrelated'
+        ])
+        keys = Hashcat.parse_cracked(stdout, [handshake_line, pmkid_line])
+        assert(keys == {
+            mic: 'iloveyou1',
+            'b579b8016c6b982a660ae43352ae142c': 'pass:word'
+        })
+
+    def testStatusJson(self):
+        with open(self.getFile('hashcat_status.txt'), 'r') as fid:
+            lines = fid.read().split('\n')
+        statuses = [HashcatStatus.from_json(line) for line in lines]
+        statuses = [status for status in statuses if status is not None]
+        assert(len(statuses) == 2)
+
+        (running, exhausted) = statuses
+        assert(running.status_name == 'Running' and not running.finished())
+        assert((running.progress, running.progress_total) == (1024, 4800))
+        assert(round(running.percent(), 2) == 21.33)
+        assert(running.rejected == 7)
+        assert([speed for (device_id, name, speed) in running.devices] == [1873, 148210])
+        assert(running.speed() == 150083)
+        assert(running.eta(now=1697000030) == 12)
+        assert(str(running).startswith('Running 21.33% ETA: '))
+        assert('@ 150.1kH/s (rejected: 7)' in str(running))
+
+        assert(exhausted.status_name == 'Exhausted' and exhausted.finished())
+        assert((exhausted.recovered, exhausted.recovered_total) == (1, 2))
+        assert(exhausted.percent() == 100.0)
+
+    def testStatusJsonInvalid(self):
+        assert(HashcatStatus.from_json('{ "session": "hashcat", "status": 3') is None)
+        assert(HashcatStatus.from_json('{"a": 1}') is None)
+        assert(HashcatStatus.from_json('Status...........: Running') is None)
+
+    def testRunWithStatus(self):
+        # Any process printing hashcat's output exercises the non-blocking reader
+        script = 'import sys; sys.stdout.write(open(sys.argv[1]).read())'
+        command = [sys.executable, '-c', script, self.getFile('hashcat_status.txt')]
+        updates = []
+        (status, lines) = Hashcat.run_with_status(command, progress=updates.append)
+        assert([update.status for update in updates] == [3, 5])
+        assert(status is updates[-1])
+        assert('Stopped: Wed Oct 11 04:54:01 2023' in lines)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+sys.path.insert(0, '..')
+
+from byteBuggy.util.pcap import PcapFile, CaptureReader, Dot11, LINKTYPE_IEEE802_11
+
+import unittest
+
+class TestPcap(unittest.TestCase):
+    ''' Test suite for the in-process pcap/pcapng reader '''
+
+    def getFile(self, filename):
+        ''' Helper method to find files in tests/files '''
+        import os, inspect
+        this_file = os.path.abspath(inspect.getsourcefile(self.getFile))
+        this_dir = os.path.dirname(this_file)
+        return os.path.join(this_dir, 'files', filename)
+
+    def testPcapIteration(self):
+        with PcapFile(self.getFile('handshake_exists.cap')) as pcap:
+            packets = [(linktype, bytes(packet)) for (linktype, packet) in pcap]
+        assert(len(packets) == 179)
+        assert(all(linktype == LINKTYPE_IEEE802_11 for (linktype, packet) in packets))
+
+    def testPcapRandomAccess(self):
+        with PcapFile(self.getFile('handshake_has_1234.cap')) as pcap:
+            (linktype, last) = pcap[-1]
+            assert(isinstance(last, memoryview))
+            # Lazy index: only as many records as needed are located
+            pcap2 = PcapFile(self.getFile('handshake_has_1234.cap'))
+            (linktype, fifth) = pcap2[4]
+            assert(len(pcap2.offsets) == 5)
+            assert(bytes(fifth) == bytes(pcap[4][1]))
+            # Trailing partially-written record is ignored
+            assert(len(pcap) == 2189)
+            del last, fifth
+            pcap2.close()
+
+    def testPcapng(self):
+        with PcapFile(self.getFile('handshake_exists.cap.stripped.tshark')) as pcap:
+            assert(len(pcap) == 14)
+            assert(list(pcap.linktypes) == [LINKTYPE_IEEE802_11] * 14)
+            frames = [bytes(frame) for frame in pcap.frames()]
+        # Stripped to EAPOL frames only (no beacons)
+        assert(all(Dot11.beacon(frame) is None for frame in frames))
+
+    def testEmptyFile(self):
+        import tempfile, os
+        (fd, path) = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            with PcapFile(path) as pcap:
+                assert(len(pcap) == 0)
+        finally:
+            os.remove(path)
+
+    def testCaptureReaderMatchesPcapFile(self):
+        capfile = self.getFile('handshake_not_exists.cap')
+        reader = CaptureReader(capfile)
+        tail_packets = [bytes(packet) for (linktype, packet) in reader.read()]
+        assert(list(reader.read()) == [])  # Nothing new
+        with PcapFile(capfile) as pcap:
+            assert(tail_packets == [bytes(packet) for (linktype, packet) in pcap])
+
+    def testBeaconEssid(self):
+        with PcapFile(self.getFile('contains_wps_network.cap')) as pcap:
+            beacons = set([Dot11.beacon(frame) for frame in pcap.frames()])
+        assert(('A4:2B:8C:16:6B:3A', 'Test Router Please Ignore') in beacons)
+
+    def testWps(self):
+        with PcapFile(self.getFile('contains_wps_network.cap')) as pcap:
+            wps = set([Dot11.wps_locked(frame) for frame in pcap.frames()])
+        assert(False in wps)  # Advertises WPS, not locked
+        assert(True not in wps)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+sys.path.insert(0, '..')
+
+from byteBuggy.model.handshake import Handshake
+from byteBuggy.tools.cpucrack import CpuCrack, HandshakeHash
+from byteBuggy.util.pmkdb import PmkDatabase, essids_from_handshake_dir, main
+
+import unittest
+
+class TestPmkDatabase(unittest.TestCase):
+    ''' Test suite for the precomputed PMK store '''
+
+    def getFile(self, filename):
+        ''' Helper method to find files in tests/files '''
+        import os, inspect
+        this_file = os.path.abspath(inspect.getsourcefile(self.getFile))
+        this_dir = os.path.dirname(this_file)
+        return os.path.join(this_dir, 'files', filename)
+
+    def setUp(self):
+        import os, tempfile
+        self.temp_dir = tempfile.mkdtemp()
+        self.pmk_dir = os.path.join(self.temp_dir, 'pmk')
+        self.wordlist = os.path.join(self.temp_dir, 'words.txt')
+        with open(self.wordlist, 'wb') as fid:
+            fid.write(b'12345678\npassword\nsunshine\niloveyou1\npassword1\n')
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def testBuildAndLookup(self):
+        with PmkDatabase.open(self.pmk_dir, b'byteBuggy', self.wordlist, create=True) as db:
+            assert(db.writable)
+            db.build(self.wordlist, processes=1)
+            assert(len(db) == 5)
+        assert(PmkDatabase.open(self.pmk_dir, b'other', self.wordlist) is None)
+
+        with PmkDatabase.open(self.pmk_dir, b'byteBuggy', self.wordlist) as db:
+            assert(len(db) == 5 and db.essid == b'byteBuggy')
+            hs = Handshake(self.getFile('handshake_has_iloveyou1.cap'), bssid='02:00:00:00:00:01')
+            target = HandshakeHash.from_handshake(hs)
+            assert(db.lookup(target) == 3)
+            # Cracking with a complete store does not compute any PMKs
+            progress = []
+            key = CpuCrack.crack(target, self.wordlist, processes=1, pmk_db=db,
+                                 progress=lambda tried, kps: progress.append(tried))
+            assert(key == 'iloveyou1')
+            assert(progress == [])
+
+    def testResume(self):
+        with PmkDatabase.open(self.pmk_dir, b'byteBuggy', self.wordlist, create=True) as db:
+            db.append([CpuCrack.pmk(b'12345678', b'byteBuggy')])
+        with PmkDatabase.open(self.pmk_dir, b'byteBuggy', self.wordlist, create=True) as db:
+            assert(len(db) == 1)
+            db.build(self.wordlist, processes=1)
+            assert(len(db) == 5)
+        with PmkDatabase.open(self.pmk_dir, b'byteBuggy', self.wordlist) as db:
+            assert(len(db) == 5)
+
+    def testWordlistChanged(self):
+        with PmkDatabase.open(self.pmk_dir, b'byteBuggy', self.wordlist, create=True) as db:
+            db.build(self.wordlist, processes=1)
+        with open(self.wordlist, 'ab') as fid:
+            fid.write(b'letmein1\n')
+        assert(PmkDatabase.open(self.pmk_dir, b'byteBuggy', self.wordlist) is None)
+        main(['--pmk-dir', self.pmk_dir, 'prune', '--stale', self.wordlist])
+        assert(PmkDatabase.all(self.pmk_dir) == [])
+
+    def testEssidsFromHandshakeDir(self):
+        import os, shutil
+        hs_dir = os.path.join(self.temp_dir, 'hs')
+        os.makedirs(hs_dir)
+        shutil.copy(self.getFile('handshake_has_iloveyou1.cap'), hs_dir)
+        shutil.copy(self.getFile('handshake_exists.cap'), hs_dir)
+        with open(os.path.join(hs_dir, 'pmkid_byteBuggy.16800'), 'w') as fid:
+            fid.write('00*020000000001*020000000002*%s\n' % b'byteBuggy'.hex())
+        essids = essids_from_handshake_dir(hs_dir)
+        assert(essids == {b'byteBuggy': 2, b'Test Router Please Ignore': 1})
+
+    def testEssidsFromHandshakeDirNeighbour(self):
+        import os, struct
+        hs_dir = os.path.join(self.temp_dir, 'hs')
+        os.makedirs(hs_dir)
+        with open(self.getFile('handshake_exists.cap'), 'rb') as fid:
+            data = fid.read()
+        # A neighbouring AP's beacon before the handshake AP's (copy of its first beacon)
+        (length,) = struct.unpack('<I', data[32:36])
+        beacon = bytearray(data[24:40 + length])
+        beacon[16 + 10:16 + 22] = bytes.fromhex('020000000099') * 2
+        beacon = bytes(beacon).replace(b'Test Router Please Ignore', b'Neighbouring AP Not Yours')
+        data = data[:24] + beacon + data[24:]
+        for filename in ('handshake_TestRouterPleaseIgnore_A4-2B-8C-16-6B-3A_2026-10-18T12-00-00.cap',
+                         'renamed.cap'):  # BSSID of the handshake's EAPOL
+            with open(os.path.join(hs_dir, filename), 'wb') as fid:
+                fid.write(data)
+        essids = essids_from_handshake_dir(hs_dir)
+        assert(essids == {b'Test Router Please Ignore': 2}), essids
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+sys.path.insert(0, '..')
+
+from byteBuggy.model.pmkid import PmkidTracker
+
+import unittest
+
+class TestPmkid(unittest.TestCase):
+    ''' Test suite for extracting PMKIDs from hcxdumptool captures '''
+
+    def getFile(self, filename):
+        ''' Helper method to find files in tests/files '''
+        import os, inspect
+        this_file = os.path.abspath(inspect.getsourcefile(self.getFile))
+        this_dir = os.path.dirname(this_file)
+        return os.path.join(this_dir, 'files', filename)
+
+    def testPmkidHash(self):
+        import hashlib, hmac
+        tracker = PmkidTracker(self.getFile('pmkid_has_iloveyou1.pcapng'), bssid='02:00:00:00:00:01')
+        (pmkid, bssid, station, essid) = tracker.update().split('*')
+        assert(bssid == '020000000001')
+        assert(station == '020000000002')
+        assert(bytes.fromhex(essid) == b'byteBuggy')
+        # PMKID = HMAC-SHA1-128(PMK, 'PMK Name' | AA | SPA)
+        pmk = hashlib.pbkdf2_hmac('sha1', b'iloveyou1', b'byteBuggy', 4096, 32)
+        data = b'PMK Name' + bytes.fromhex(bssid) + bytes.fromhex(station)
+        assert(hmac.new(pmk, data, hashlib.sha1).hexdigest()[:32] == pmkid)
+
+    def testPmkidEssidNotUtf8(self):
+        # ESSID from airodump was decoded lossily: the hash uses the ESSID from the beacon
+        import os, shutil, tempfile
+        temp_dir = tempfile.mkdtemp()
+        try:
+            capfile = os.path.join(temp_dir, 'pmkid.pcapng')
+            with open(self.getFile('pmkid_has_iloveyou1.pcapng'), 'rb') as fid:
+                data = fid.read()
+            with open(capfile, 'wb') as fid:
+                fid.write(data.replace(b'byteBuggy', b'byteBugg\xe9'))
+            tracker = PmkidTracker(capfile, bssid='02:00:00:00:00:01', essid='byteBugg\ufffd')
+            essid = tracker.update().split('*')[3]
+            assert(bytes.fromhex(essid) == b'byteBugg\xe9')
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def testPmkidWrongBssid(self):
+        tracker = PmkidTracker(self.getFile('pmkid_has_iloveyou1.pcapng'), bssid='02:00:00:00:00:03')
+        assert(tracker.update() is None)
+
+    def testPmkidNotInHandshake(self):
+        # M1 of an ordinary handshake capture without a PMKID KDE
+        tracker = PmkidTracker(self.getFile('handshake_exists.cap'), bssid='A4:2B:8C:16:6B:3A')
+        assert(tracker.update() is None)
+
+    def testPmkidTrackerIncremental(self):
+        import os, shutil, tempfile
+        with open(self.getFile('pmkid_has_iloveyou1.pcapng'), 'rb') as fid:
+            data = fid.read()
+        temp_dir = tempfile.mkdtemp()
+        try:
+            capfile = os.path.join(temp_dir, 'pmkid.pcapng')
+            tracker = PmkidTracker(capfile, bssid='02:00:00:00:00:01')
+            assert(tracker.update() is None)  # File does not exist yet
+            found = []
+            for offset in range(0, len(data), 50):
+                with open(capfile, 'ab') as fid:
+                    fid.write(data[offset:offset + 50])
+                found.append(tracker.update())
+            assert(found[-1] is not None)
+            assert(found.count(None) == len(found) - 1)  # Found as soon as the M1 is complete
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+sys.path.insert(0, '..')
+
+from byteBuggy.util.process import ChildManager, Process
+
+import os
+
+import time
+import unittest
+
+
+class TestProcess(unittest.TestCase):
+    ''' Test suite for waiting on & streaming from child processes '''
+
+    def testWaitTimeout(self):
+        proc = Process(['sleep', '5'])
+        start = time.time()
+        assert proc.wait(0.2) is None, 'Process should still be running'
+        assert time.time() - start < 2
+
+        proc.interrupt()
+        assert proc.poll() is not None, 'Interrupted process should have exited'
+        assert proc.pidfd is None, 'pidfd should be closed once the process exited'
+
+    def testWaitExit(self):
+        proc = Process(['sh', '-c', 'exit 3'])
+        assert proc.wait(5) == 3
+        assert proc.wait(5) == 3, 'Waiting again should return the same exit code'
+
+    def testExitedAsync(self):
+        proc = Process(['sleep', '5'])
+        assert Process.run_async(proc.exited(0.2)) is None
+        proc.interrupt()
+
+        proc = Process(['true'])
+        assert Process.run_async(proc.exited(5)) == 0
+
+    def testLinesAsync(self):
+        proc = Process(['printf', 'first\\nprogress 1\\rprogress 2\\nlast'])
+        async def collect():
+            return [line async for line in proc.lines()]
+        lines = Process.run_async(collect())
+        assert lines == ['first', 'progress 1', 'progress 2', 'last'], lines
+        assert proc.wait(5) == 0
+
+    def testResourceAccounting(self):
+        proc = Process(['sh', '-c', 'i=0; while [ $i -lt 20000 ]; do i=$((i+1)); done'])
+        runs = ChildManager.usage.get('sh', [0])[0]
+        assert proc.wait(30) == 0
+        assert proc.pid.pid not in ChildManager.children, 'Exited child should be reaped'
+        (count, wall, user, system, maxrss) = ChildManager.usage['sh']
+        assert count == runs + 1
+        assert wall > 0 and user + system > 0 and maxrss > 0
+        assert any(line.startswith('sh ') for line in ChildManager.report())
+
+    def testReapedGroupForgotten(self):
+        # Its ID could be reused by an unrelated group, which shutdown() must not signal
+        proc = Process(['sleep', '0.2'])
+        assert proc.pid.pid in ChildManager.groups
+        assert proc.wait(5) == 0
+        assert proc.pid.pid not in ChildManager.groups, 'Empty group of a reaped child should be forgotten'
+
+        # Group kept while the tool's own children are left in it
+        proc = Process(['sh', '-c', 'sleep 0.5 & exit 0'])
+        assert proc.wait(5) == 0
+        assert proc.pid.pid in ChildManager.groups
+        # The orphaned sleep stays in the group (as a zombie) until init reaps it
+        end_time = time.time() + 10
+        while proc.pid.pid in ChildManager.groups and time.time() < end_time:
+            time.sleep(0.1)
+            ChildManager.reap_all()
+        assert proc.pid.pid not in ChildManager.groups
+
+    def testShutdownKillsGroup(self):
+        # The shell exits on SIGINT, but its background child ignores it (no job control)
+        proc = Process(['sh', '-c', 'sleep 30 & echo $!; wait'])
+        child = int(proc.stdoutln())
+        assert os.getpgid(child) == proc.pid.pid, 'Tool & its children should share their own group'
+        assert os.getpgid(child) != os.getpgid(0)
+
+        ChildManager.shutdown(wait_time=1)
+        assert proc.poll() is not None
+        # The orphaned child was killed (it may wait a moment for init to reap it)
+        try:
+            with open('/proc/%d/status' % child) as fid:
+                state = [line for line in fid if line.startswith('State:')][0]
+            assert 'zombie' in state, 'Child left in the group should be killed, is %s' % state
+        except (OSError, IndexError):
+            pass  # Already reaped
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+sys.path.insert(0, '..')
+
+from byteBuggy.model.result_store import ResultStore
+
+import unittest
+
+class TestResultStore(unittest.TestCase):
+    ''' Test suite for the append-only crack results store '''
+
+    def setUp(self):
+        import tempfile, os
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'cracked.jsonl')
+        ResultStore.stores = {}
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def result(self, bssid='AA:BB:CC:DD:EE:FF', key='abcd1234', date=1433402428):
+        return {'type': 'WPA', 'date': date, 'essid': 'Test Router', 'bssid': bssid,
+                'key': key, 'handshake_file': 'hs/handshake_TestRouter_AA-BB-CC-DD-EE-FF_2015-05-27T19-28-44.cap'}
+
+    def testAddAndDuplicates(self):
+        store = ResultStore.open(self.path)
+        assert(store.add(self.result()))
+        assert(not store.add(self.result(date=1500000000)))  # Same result, later date
+        assert(store.add(self.result(key='other key')))
+        assert(len(store) == 2)
+        assert(store.is_cracked('handshake_TestRouter_AA-BB-CC-DD-EE-FF_2015-05-27T19-28-44.cap'))
+        assert(not store.is_cracked('handshake_Other_11-22-33-44-55-66_2015-05-27T19-28-44.cap'))
+        with open(self.path, 'r') as fid:
+            assert(len(fid.readlines()) == 2)
+
+    def testAppendedByOtherProcess(self):
+        import json
+        store = ResultStore.open(self.path)
+        store.add(self.result())
+        with open(self.path, 'a') as fid:
+            fid.write(json.dumps(self.result(bssid='11:22:33:44:55:66')) + '\n')
+            fid.write('{"type": "WPA", "bssid"')  # Partially-written line
+        store = ResultStore.open(self.path)
+        assert(len(store) == 2)
+        with open(self.path, 'a') as fid:
+            fid.write(': "22:33:44:55:66:77"}\n')
+        assert(len(ResultStore.open(self.path)) == 3)
+
+    def testMigrateLegacy(self):
+        import json, os
+        legacy = os.path.join(self.temp_dir, 'cracked.txt')
+        with open(legacy, 'w') as fid:
+            fid.write(json.dumps([self.result(), self.result(), self.result(bssid='11:22:33:44:55:66')], indent=2))
+        store = ResultStore.open(self.path)
+        assert(len(store) == 2)
+        assert(os.path.exists(legacy))  # Left in place
+        # Migration only happens once
+        ResultStore.stores = {}
+        store = ResultStore.open(self.path)
+        store.add(self.result(key='new key'))
+        ResultStore.stores = {}
+        assert(len(ResultStore.open(self.path)) == 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from byteBuggy.config import Configuration
+from byteBuggy.tools.airodump import Airodump
+from byteBuggy.model.target import TargetDiff, WPSState
+from byteBuggy.util.scan_stream import ScanStream
+
+import io
+import json
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+
+
+class TestScanStream(unittest.TestCase):
+    ''' Test suite for the headless JSON-lines scan output '''
+
+    def getTargets(self, filename):
+        import os, inspect
+        this_file = os.path.abspath(inspect.getsourcefile(TestScanStream.getTargets))
+        this_dir = os.path.dirname(this_file)
+        return Airodump.get_targets_from_csv(os.path.join(this_dir, 'files', filename))
+
+    def testEvents(self):
+        targets = self.getTargets('airodump.csv')
+        diff = TargetDiff.between({}, targets)
+        events = ScanStream.events(diff, now=1234)
+        assert len(events) == len(targets)
+        assert all([e['event'] == 'new' and e['time'] == 1234 for e in events])
+        assert events[0]['bssid'] == targets[0].bssid
+        assert events[0]['wps'] == 'unknown'
+
+        targets[0].wps = WPSState.UNLOCKED
+        changed = TargetDiff.between(diff.snapshots, targets[:-1])
+        events = ScanStream.events(changed, now=1235)
+        assert events == [
+            {'event': 'change', 'time': 1235, 'bssid': targets[0].bssid,
+             'changes': {'wps': ['unknown', 'unlocked']}},
+            {'event': 'lost', 'time': 1235, 'bssid': targets[-1].bssid}
+        ], events
+
+    def testWrite(self):
+        targets = self.getTargets('airodump.csv')
+        stream = ScanStream()
+        stream.fid = io.StringIO()
+        stream.write(TargetDiff.between({}, targets))
+        lines = stream.fid.getvalue().splitlines()
+        assert len(lines) == len(targets)
+        for (line, target) in zip(lines, targets):
+            event = json.loads(line)
+            assert event['bssid'] == target.bssid
+            assert line == json.dumps(event, separators=(',', ':'), sort_keys=True)  # Compact
+        assert '\033' not in stream.fid.getvalue()
+
+    def testRun(self):
+        # Fake airodump-ng: writes its CSV (-w prefix) only after the scan loop started
+        csv_filename = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'files', 'airodump.csv')
+        temp_dir = tempfile.mkdtemp()
+        fake = os.path.join(temp_dir, 'bin', 'airodump-ng')
+        os.mkdir(os.path.dirname(fake))
+        with open(fake, 'w') as fid:
+            fid.write('#!/bin/sh\n'
+                      'while [ "$1" != "-w" ]; do shift; done\n'
+                      'sleep 0.5\n'
+                      'cp "%s" "$2-01.csv"\n'
+                      'exec sleep 10\n' % csv_filename)
+        os.chmod(fake, os.stat(fake).st_mode | stat.S_IXUSR)
+
+        saved = dict((key, value) for (key, value) in Configuration.__dict__.items() if not key.startswith('__'))
+        path = os.environ['PATH']
+        try:
+            Configuration.load_defaults()
+            Configuration.initialized = True  # Airodump() would parse sys.argv otherwise
+            Configuration.interface = 'wlan0mon'
+            Configuration.no_deauth = True
+            Configuration.scan_time = 2
+            Configuration.temp_dir = os.path.join(temp_dir, 'temp') + os.sep
+            Configuration.temp_manager = None
+            os.mkdir(Configuration.temp_dir)
+            os.environ['PATH'] = os.path.dirname(fake) + os.pathsep + path
+
+            output = os.path.join(temp_dir, 'scan.jsonl')
+            ScanStream(output, rate=0.25).run()
+            with open(output) as fid:
+                events = [json.loads(line) for line in fid]
+            targets = Airodump.filter_targets(self.getTargets('airodump.csv'))
+        finally:
+            os.environ['PATH'] = path
+            for key in [key for key in Configuration.__dict__ if not key.startswith('__')]:
+                if key not in saved:
+                    delattr(Configuration, key)
+            for (key, value) in saved.items():
+                setattr(Configuration, key, value)
+            shutil.rmtree(temp_dir)
+
+        assert len(targets) > 0
+        assert [e['event'] for e in events] == ['new'] * len(targets), events
+        assert set(e['bssid'] for e in events) == set(t.bssid for t in targets)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+sys.path.insert(0, '..')
+
+from byteBuggy.args import Arguments
+from byteBuggy.config import Configuration
+
+import os
+import subprocess
+import unittest
+
+
+class TestStartup(unittest.TestCase):
+    ''' Test suite for byteBuggy's cold start (imports & argument parsing) '''
+
+    # Seconds from a cold interpreter to the first scan refresh, and for the imports on the way
+    STARTUP_BUDGET = 0.5
+    IMPORT_BUDGET = 0.35
+
+    # Modules that are only needed once attacking/cracking starts (or by the web UI)
+    DEFERRED = ('byteBuggy.attack', 'byteBuggy.model.handshake', 'byteBuggy.util.crack',
+                'byteBuggy.tools.airmon', 'byteBuggy.web', 'flask')
+
+    # What `byteBuggy -i wlan0mon` runs before the scanner's first refresh, minus root
+    # & the tools (the dependency check only imports the tools' modules here).
+    STARTUP = '''
+import sys, time
+start = time.perf_counter()
+sys.argv = ['byteBuggy', '-i', 'wlan0mon']
+from byteBuggy.__main__ import ByteBuggy
+from byteBuggy.config import Configuration
+Configuration.initialize(load_interface=False)
+from byteBuggy.tools.dependency import Dependency
+Dependency.dependency_apps()
+from byteBuggy.util.scanner import Scanner
+from byteBuggy.tools.airodump import Airodump, AirodumpCsv
+(targets, changed) = AirodumpCsv(%r).load()
+Airodump.filter_targets(targets)
+print('startup %%f' %% (time.perf_counter() - start))
+'''
+
+    def setUp(self):
+        self.saved = dict((key, value) for (key, value) in Configuration.__dict__.items()
+                          if not key.startswith('__'))
+        Configuration.load_defaults()  # Defaults shown in the help text
+
+    def tearDown(self):
+        for key in [key for key in Configuration.__dict__ if not key.startswith('__')]:
+            if key not in self.saved:
+                delattr(Configuration, key)
+        for (key, value) in self.saved.items():
+            setattr(Configuration, key, value)
+
+    def testColdStartBudget(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        csv_filename = os.path.join(root, 'tests', 'files', 'airodump.csv')
+        env = dict(os.environ, PYTHONPATH=root)
+        env.pop('PYTHONDONTWRITEBYTECODE', None)
+        command = [sys.executable, '-X', 'importtime', '-c', TestStartup.STARTUP % csv_filename]
+        # Once to write the .pyc files (a cold start is one without a warm page cache, not without bytecode)
+        subprocess.run(command, cwd=root, env=env, capture_output=True)
+        result = subprocess.run(command, cwd=root, env=env, capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr[-2000:]
+
+        startup = float(result.stdout.split('startup ')[-1])
+        imports = {}  # Top-level module -> cumulative microseconds
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or line.endswith('| imported package'):
+                continue  # Not an import, or the header
+            (_, cumulative, name) = line.split('|')
+            if not name.startswith('  '):
+                imports[name.strip()] = int(cumulative)
+        import_time = sum(imports.values()) / 1000000.0
+
+        slowest = ', '.join('%s %dms' % (name, us / 1000)
+                            for (name, us) in sorted(imports.items(), key=lambda i: -i[1])[:5])
+        assert import_time < TestStartup.IMPORT_BUDGET, \
+            'Imports took %0.3fs (budget %0.3fs): %s' % (import_time, TestStartup.IMPORT_BUDGET, slowest)
+        assert startup < TestStartup.STARTUP_BUDGET, \
+            'Cold start took %0.3fs (budget %0.3fs): %s' % (startup, TestStartup.STARTUP_BUDGET, slowest)
+
+        imported = [line.split('|')[-1].strip() for line in result.stderr.splitlines()
+                    if line.startswith('import time:')]
+        for module in imported:
+            assert not module.startswith(TestStartup.DEFERRED), '%s should not be imported before scanning' % module
+
+    def testParsedOnce(self):
+        Arguments.parsed.clear()
+        first = Arguments(Configuration, argv=['-i', 'wlan0mon', '--chopchop']).args
+        again = Arguments(Configuration, argv=['-i', 'wlan0mon', '--chopchop']).args
+        assert first is again, 'The same arguments should only be parsed once'
+        assert first.interface == 'wlan0mon' and first.wep_attack_chopchop
+
+    def testHelpTextCached(self):
+        Arguments.helps.clear()
+        help_text = Arguments.help_text(Configuration)
+        assert '--wps-only' in help_text and '--pmkid' in help_text
+        assert Arguments.help_text(Configuration) is help_text
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+sys.path.insert(0, '..')
+
+from byteBuggy.util.process import Process
+from byteBuggy.util.stream import LineSplitter, LineStream, RingBuffer, Throttle
+
+import unittest
+
+
+class TestStream(unittest.TestCase):
+    ''' Test suite for streaming tool output line by line '''
+
+    def testLineSplitter(self):
+        splitter = LineSplitter(max_line=8)
+        assert splitter.split(b'first\nsec') == [b'first']
+        assert splitter.split(b'ond\r\n1/10 keys\r2/10') == [b'second', b'1/10 keys']
+        assert splitter.flush() == [b'2/10']
+        assert splitter.flush() == []
+
+        # A line that never ends is cut to max_line bytes
+        splitter.split(b'x' * 100)
+        assert splitter.pending == b'x' * 8
+
+    def testRingBuffer(self):
+        buffer = RingBuffer(size=10)
+        for i in range(100):
+            buffer.write(b'%d,' % i)
+        assert len(buffer) == 10
+        assert buffer.text() == '96,97,98,99,'[-10:]
+
+    def testThrottle(self):
+        throttle = Throttle(0.25)
+        assert throttle.ready(now=100.0)
+        assert not throttle.ready(now=100.1)
+        assert throttle.ready(now=100.3)
+
+    def testLineStream(self):
+        proc = Process(['sh', '-c', 'printf "one\\ntwo\\rthree"; echo error >&2'])
+        stream = LineStream(proc, buffer_size=1024)
+        lines = [line for line in stream]
+        assert lines == [b'one', b'two', b'three'], lines
+        assert 'error' in stream.tail(), 'stderr should be kept in the ring buffer'
+        assert proc.wait(5) == 0
+
+        proc = Process(['sh', '-c', 'seq 1 100000'])
+        stream = LineStream(proc, buffer_size=1024)
+        count = sum(1 for line in stream)
+        assert count == 100000
+        assert len(stream.buffer) == 1024, 'Only the last buffer_size bytes should be kept'
+        assert stream.tail().endswith('100000\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
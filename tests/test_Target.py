@@ -2,6 +2,8 @@
 # -*- coding: utf-8 -*-
 
 from byteBuggy.tools.airodump import Airodump
+from byteBuggy.model.target import Encryption, TargetDiff, TargetIndex, WPSState
+from byteBuggy.model.mac import Mac
 
 import unittest
 
@@ -31,5 +33,59 @@ class TestTarget(unittest.TestCase):
             if t.bssid == '00:1D:D5:9B:11:00':
                 assert(len(t.clients) > 0)
 
+    def testTargetIndex(self):
+        ''' Asserts targets can be looked up by (normalized) BSSID '''
+        targets = self.getTargets(TestTarget.airodump_csv)
+        index = TargetIndex(targets)
+        assert(len(index) == len(set([t.bssid for t in targets])))
+        target = index.get(' 00:1d:d5:9b:11:00')
+        assert(target is not None and target.bssid == '00:1D:D5:9B:11:00')
+        assert('00:1d:d5:9b:11:00' in index)
+        assert(index.get('11:22:33:44:55:66') is None)
+        # Every client is attached to the target it is associated with
+        for t in targets:
+            assert(all([TargetIndex.key(c.bssid) == TargetIndex.key(t.bssid) for c in t.clients]))
+    def testTargetDiff(self):
+        ''' Asserts refreshes are reported as added, removed & changed targets '''
+        targets = self.getTargets(TestTarget.airodump_csv)
+        diff = TargetDiff.between({}, targets)
+        assert(len(diff.added) == len(targets) and diff.removed == [] and diff.changed == [])
+
+        # Nothing changed
+        same = TargetDiff.between(diff.snapshots, targets)
+        assert(not same)
+
+        # Targets are updated in place between refreshes
+        (first, second) = (targets[0], targets[1])
+        old_power = first.power
+        first.power += 1
+        first.wps = WPSState.LOCKED
+        first.clients = []
+        changed = TargetDiff.between(diff.snapshots, targets[:1] + targets[2:])
+        assert(changed.added == [])
+        assert(changed.removed == [TargetIndex.key(second.bssid)])
+        assert(len(changed.changed) == 1)
+        (target, fields) = changed.changed[0]
+        assert(target is first)
+        assert(fields['power'] == (old_power, old_power + 1))
+        assert(fields['wps'] == (WPSState.UNKNOWN, WPSState.LOCKED))
+        assert('essid' not in fields)
+    def testCompactModels(self):
+        ''' Asserts targets & clients use slots, packed MACs and small-int encryption '''
+        targets = self.getTargets(TestTarget.airodump_csv)
+        for t in targets:
+            assert(not hasattr(t, '__dict__'))
+            assert(type(t.mac) is int and t.bssid == Mac.to_str(t.mac))
+            assert(t.bssid is t.bssid)  # String is cached
+            assert(Encryption.names[t.encryption_type] == t.encryption)
+            for c in t.clients:
+                assert(not hasattr(c, '__dict__'))
+                assert(c.bssid == t.bssid)
+        assert(Mac.parse(' 00:1d:d5:9b:11:00 ') == 0x001DD59B1100)
+        assert(Mac.to_str(0x001DD59B1100) == '00:1D:D5:9B:11:00')
+        assert(Encryption.from_label('WPA2 WPA') == Encryption.WPA)
+        assert(Encryption.from_label('WEP') == Encryption.WEP)
+        assert(Encryption.from_label('OPN') == Encryption.OPN)
+
 if __name__ == '__main__':
     unittest.main()
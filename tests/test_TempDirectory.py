@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from byteBuggy.config import Configuration
+from byteBuggy.util.tempdir import TempDirectory
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+
+class TestTempDirectory(unittest.TestCase):
+    ''' Test suite for the size-capped temporary directory '''
+
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+        self.temp = TempDirectory.create(max_size=1000, bases=('/nonexistent', self.base))
+
+    def tearDown(self):
+        shutil.rmtree(self.base)
+
+    def write(self, name, size, age=0):
+        path = os.path.join(self.temp.path, name)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as fid:
+            fid.write(b'\0' * size)
+        mtime = time.time() - age
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def testCreate(self):
+        assert self.temp.path.startswith(self.base), 'Skips bases that do not exist'
+        assert self.temp.path.endswith(os.sep)
+
+    def testUsage(self):
+        self.write('airodump-01.csv', 100)
+        self.write('wpa-01.cap', 200)
+        self.write('aireplay_replay.output', 10)
+        self.write('hashcat-abc.22000', 20)
+        self.write('pmkid.pcapng', 30)
+        self.write('something.txt', 5)
+        assert self.temp.usage() == {'airodump': 300, 'aireplay': 10, 'hashcat': 50, 'other': 5}
+
+    def testPrune(self):
+        oldest = self.write('wpa-01.cap', 400, age=300)
+        old = self.write('wep-01.ivs', 400, age=200)
+        key = self.write('wpakey.txt', 400, age=400)     # Not a capture
+        active = self.write('airodump-01.cap', 400)      # Still being written
+        deleted = self.temp.prune()
+        assert deleted == [oldest, old], deleted
+        assert os.path.exists(key) and os.path.exists(active)
+
+        # Under the cap: nothing to do
+        os.remove(key)
+        assert self.temp.prune() == []
+
+    def testPruneKeepSuffixes(self):
+        ivs = self.write('wep-01.ivs', 600, age=300)
+        cap = self.write('wpa-01.cap', 600, age=200)
+        self.temp.keep_suffixes = ('.ivs',)
+        assert self.temp.prune() == [cap]
+        assert os.path.exists(ivs) and not self.temp.full
+
+        # Still over the cap: nothing else can be pruned
+        self.write('wep-02.ivs', 600, age=100)
+        assert self.temp.prune() == []
+        assert self.temp.full
+
+    def testSpill(self):
+        saved = (Configuration.temp_dir, Configuration.temp_manager)
+        try:
+            Configuration.temp_manager = self.temp
+            Configuration.temp_dir = self.temp.path
+            self.write('airodump-01.cap', 2000)  # Still being written
+            self.temp.prune()
+            assert self.temp.full and not Configuration.temp_full(), 'Only tmpfs is moved to disk'
+            assert not Configuration.spill_temp()
+
+            self.temp.in_memory = True
+            assert Configuration.temp_full()
+            assert Configuration.spill_temp()
+            assert not os.path.exists(self.temp.path)
+            assert Configuration.temp() == Configuration.temp_manager.path != self.temp.path
+            assert os.path.isdir(Configuration.temp())
+            assert Configuration.temp_manager.max_size == 1000 and not Configuration.temp_manager.full
+            assert not Configuration.spill_temp()
+        finally:
+            if Configuration.temp_manager is not self.temp:
+                Configuration.temp_manager.delete()
+            (Configuration.temp_dir, Configuration.temp_manager) = saved
+
+    def testDeleteRecursive(self):
+        self.write('wpa-01.cap', 10)
+        self.write(os.path.join('sub', 'dir', 'replay_arp.cap'), 10)
+        self.temp.delete()
+        assert not os.path.exists(self.temp.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from byteBuggy.util.terminal import Terminal, TableRenderer
+
+import io
+import unittest
+
+
+class TestTerminal(unittest.TestCase):
+    ''' Test suite for the terminal size cache & table renderer '''
+
+    def testSizeCached(self):
+        Terminal.size = None
+        size = Terminal.get_size()
+        assert Terminal.get_size() is size, 'Size should be cached'
+        Terminal.on_resize(None, None)
+        assert Terminal.size is None, 'SIGWINCH should invalidate the cached size'
+        assert Terminal.get_size() == size
+
+    def testAppendOnly(self):
+        stream = io.StringIO()
+        renderer = TableRenderer(stream=stream, tty=False)
+        renderer.render(['header', 'row 1', 'status 1'])
+        renderer.render(['header', 'row 1', 'status 2'])
+        renderer.render(['header', 'row 1', 'status 2'])
+        assert stream.getvalue() == 'header\nrow 1\nstatus 1\nstatus 2\n', repr(stream.getvalue())
+        assert '\033' not in stream.getvalue() and '\r' not in stream.getvalue()
+
+    def testOnlyChangedRowsRedrawn(self):
+        stream = io.StringIO()
+        renderer = TableRenderer(stream=stream, tty=True)
+        renderer.render(['header', 'row 1', 'status 1'])
+        assert stream.getvalue() == '\r\033[2Kheader\nrow 1\nstatus 1', repr(stream.getvalue())
+
+        stream.seek(0)
+        stream.truncate()
+        renderer.render(['header', 'row 1', 'status 2'])
+        output = stream.getvalue()
+        assert 'header' not in output and 'row 1' not in output, repr(output)
+        assert output == '\033[2F\033[1E\033[1E\033[2Kstatus 2', repr(output)
+
+        # Shorter frame: the leftover row is cleared
+        stream.seek(0)
+        stream.truncate()
+        renderer.render(['header', 'status 3'])
+        output = stream.getvalue()
+        assert output == '\033[2F\033[1E\033[2Kstatus 3\033[1E\033[2K\033[1F\033[9G', repr(output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+sys.path.insert(0, '..')
+
+from byteBuggy.tools.registry import ToolRegistry
+
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class TestToolRegistry(unittest.TestCase):
+    ''' Test suite for finding tools & caching their probed capabilities '''
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.saved = (ToolRegistry.PROBES, ToolRegistry.cache_file, ToolRegistry.cache,
+                      ToolRegistry.paths, ToolRegistry.partial, ToolRegistry.PROBE_TIMEOUT, os.environ['PATH'])
+        # Fake tool that counts how many times it ran
+        self.tool = os.path.join(self.temp_dir, 'faketool')
+        self.runs = os.path.join(self.temp_dir, 'runs')
+        with open(self.tool, 'w') as fid:
+            fid.write('#!/bin/sh\necho run >> %s\necho "faketool v1.2.3 (--pixie-dust)"\n' % self.runs)
+        os.chmod(self.tool, 0o755)
+        os.environ['PATH'] = self.temp_dir + os.pathsep + os.environ['PATH']
+
+        ToolRegistry.PROBES = {'faketool': [
+            ('version', ['-h'], lambda output: ToolRegistry.parse_version(output)),
+            ('pixie_dust', ['-h'], lambda output: '--pixie-dust' in output),
+        ]}
+        ToolRegistry.cache_file = os.path.join(self.temp_dir, 'cache', 'tools.json')
+        self.new_run()
+
+    def tearDown(self):
+        (ToolRegistry.PROBES, ToolRegistry.cache_file, ToolRegistry.cache,
+         ToolRegistry.paths, ToolRegistry.partial, ToolRegistry.PROBE_TIMEOUT, os.environ['PATH']) = self.saved
+        shutil.rmtree(self.temp_dir)
+
+    def new_run(self):
+        '''Forgets everything but the disk cache, as if byteBuggy was started again.'''
+        ToolRegistry.cache = None
+        ToolRegistry.paths = {}
+        ToolRegistry.partial = {}
+
+    def count_runs(self):
+        if not os.path.exists(self.runs):
+            return 0
+        with open(self.runs) as fid:
+            return len(fid.readlines())
+
+    def testWhich(self):
+        assert ToolRegistry.which('faketool') == self.tool
+        assert ToolRegistry.exists('faketool')
+        assert not ToolRegistry.exists('byteBuggy-missing-tool')
+        assert ToolRegistry.capability('byteBuggy-missing-tool', 'version', 'none') == 'none'
+
+    def testProbeCache(self):
+        assert ToolRegistry.version('faketool') == '1.2.3'
+        assert ToolRegistry.capability('faketool', 'pixie_dust') is True
+        assert self.count_runs() == 1, 'Probes with the same arguments should run the tool once'
+
+        # Warm start: answered from the disk cache
+        self.new_run()
+        assert ToolRegistry.probe() == {'faketool': {'version': '1.2.3', 'pixie_dust': True}}
+        assert self.count_runs() == 1, 'Cached tools should not be probed again'
+
+        # Upgraded binary (new mtime): probed again
+        self.new_run()
+        stat = os.stat(self.tool)
+        os.utime(self.tool, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert ToolRegistry.version('faketool') == '1.2.3'
+        assert self.count_runs() == 2
+
+    def testProbeTimeoutNotCached(self):
+        # First run: the probe hangs (e.g. hashcat -I initializing OpenCL) and times out
+        with open(self.tool, 'w') as fid:
+            fid.write('#!/bin/sh\necho run >> %s\nexec sleep 5\n' % self.runs)
+        ToolRegistry.PROBE_TIMEOUT = 1
+        assert ToolRegistry.capability('faketool', 'pixie_dust', 'unknown') == 'unknown'
+        assert ToolRegistry.capability('faketool', 'pixie_dust', 'unknown') == 'unknown'
+        assert self.count_runs() == 1, 'A failed probe should not be retried within the same run'
+
+        # Next run: probed again (same binary), and cached once it answers
+        stat = os.stat(self.tool)
+        with open(self.tool, 'w') as fid:
+            fid.write('#!/bin/sh\necho run >> %s\necho "--pixie-dust"\n' % self.runs)
+        os.utime(self.tool, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.new_run()
+        assert ToolRegistry.capability('faketool', 'pixie_dust') is True
+        assert self.count_runs() == 2
+        self.new_run()
+        assert ToolRegistry.capability('faketool', 'pixie_dust') is True
+        assert self.count_runs() == 2
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from byteBuggy.util.watcher import FileWatcher
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+
+class TestWatcher(unittest.TestCase):
+    ''' Test suite for waiting on tool output files (inotify & polling) '''
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write_later(self, name, delay=0.1):
+        def write():
+            time.sleep(delay)
+            with open(os.path.join(self.temp_dir, name), 'a') as fid:
+                fid.write('data\n')
+        thread = threading.Thread(target=write)
+        thread.start()
+        return thread
+
+    def check_watcher(self, inotify):
+        with FileWatcher(self.temp_dir, prefix='wpa', inotify=inotify) as watcher:
+            assert watcher.uses_inotify == inotify or not inotify
+            assert watcher.files() == []
+
+            # Wakes up as soon as a matching file is written, not after the timeout
+            thread = self.write_later('wpa-01.cap')
+            start = time.time()
+            changed = watcher.wait(5, endswith='.cap')
+            thread.join()
+            assert changed == set([os.path.join(self.temp_dir, 'wpa-01.cap')]), changed
+            assert time.time() - start < 2
+            assert watcher.files('.cap') == [os.path.join(self.temp_dir, 'wpa-01.cap')]
+            watcher.wait(0.2)  # Events of the same write that arrived late (e.g. close)
+
+            # Other files (prefix / suffix) are ignored
+            thread = self.write_later('other-01.cap', delay=0)
+            thread.join()
+            thread = self.write_later('wpa-01.txt', delay=0)
+            thread.join()
+            assert watcher.wait(0.5) == set()
+
+            os.remove(os.path.join(self.temp_dir, 'wpa-01.cap'))
+            watcher.wait(0.5)
+            assert watcher.files() == []
+
+    def testInotify(self):
+        fd = FileWatcher.inotify_init(self.temp_dir)
+        if fd is None:
+            self.skipTest('inotify is not available')
+        os.close(fd)
+        self.check_watcher(inotify=True)
+
+    def testPolling(self):
+        self.check_watcher(inotify=False)
+
+    def testFilesWithoutWait(self):
+        # Files created after the watcher started are listed without anyone calling wait()
+        for inotify in (True, False):
+            with FileWatcher(self.temp_dir, prefix='airodump', inotify=inotify) as watcher:
+                path = os.path.join(self.temp_dir, 'airodump-01.csv')
+                self.write_later('airodump-01.csv', delay=0).join()
+                if not watcher.uses_inotify:
+                    time.sleep(FileWatcher.POLL_INTERVAL)
+                assert watcher.files('.csv') == [path], watcher.files()
+
+                # The change is still reported by the next wait()
+                assert watcher.wait(0.5, endswith='.csv') == set([path])
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    unittest.main()